@@ -0,0 +1,74 @@
+"""
+Crawl benchmark, with a stub Jina reader serving generated article pages.
+
+Times a crawl, i.e. the fetch and the readability extraction, and the
+conversion of the extracted article to markdown and to an LLM message, for a
+short and a long page, with the peak memory of the conversion. Also reports the tokens of the message with the whole
+page and with the passages selected for a query, and the time to select them.
+
+Usage:
+    python -m benchmarks.bench_crawl
+"""
+
+import logging
+import statistics
+import time
+import tracemalloc
+
+from src.crawler import Crawler, select_passages
+from src.crawler.readability_extractor import ReadabilityExtractor
+from src.prompts.context import estimate_tokens
+
+from .fakes import STUB_SITE, article_html, offline, stub_jina_client
+
+PAGES = {"short": 40, "long": 400}
+QUERY = "paragraph 12"
+
+
+def mean_ms(func, number: int) -> float:
+    durations = []
+    for _ in range(number):
+        start = time.perf_counter()
+        func()
+        durations.append(time.perf_counter() - start)
+    return round(statistics.mean(durations) * 1000, 3)
+
+
+def peak_kib(func) -> float:
+    tracemalloc.start()
+    try:
+        func()
+        return round(tracemalloc.get_traced_memory()[1] / 1024, 1)
+    finally:
+        tracemalloc.stop()
+
+
+def run(number: int = 10) -> dict:
+    extractor = ReadabilityExtractor()
+    results = {"extractor": extractor.backend}
+    with offline():
+        for name, paragraphs in PAGES.items():
+            crawler = Crawler(stub_jina_client(paragraphs), extractor=extractor)
+            url = f"{STUB_SITE}/0"
+            article = crawler.crawl(url)
+            markdown = article.to_markdown()
+            results[name] = {
+                "html_chars": len(article_html(0, paragraphs)),
+                "markdown_chars": len(markdown),
+                "full_text_tokens": estimate_tokens(markdown),
+                "selected_tokens": estimate_tokens(select_passages(markdown, QUERY)),
+                "crawl_ms": mean_ms(lambda: crawler.crawl(url), number),
+                "to_markdown_ms": mean_ms(article.to_markdown, number),
+                "to_message_ms": mean_ms(article.to_message, number),
+                "to_message_peak_kib": peak_kib(article.to_message),
+                "select_passages_ms": mean_ms(
+                    lambda: select_passages(markdown, QUERY), number
+                ),
+            }
+    return results
+
+
+if __name__ == "__main__":
+    logging.disable(logging.INFO)
+    for name, value in run().items():
+        print(f"{name}: {value}")
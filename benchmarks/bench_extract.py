@@ -0,0 +1,134 @@
+"""
+Article extraction benchmark of the extractor backends on a fixture corpus.
+
+Times every backend of `ReadabilityExtractor` on generated pages of several
+shapes and sizes, and compares their output to the one of the per-page Node
+process, the reference Readability.js path, or to the pure Python extractor
+when Node or the Readability.js modules are not installed. Parity is the share
+of matching titles and the mean similarity of the extracted texts, from 0 to 1.
+
+Throughput is also measured with `CONCURRENCY` pages extracted at once from
+threads, as concurrent crawls do, next to the one page at a time timing.
+
+Usage:
+    python -m benchmarks.bench_extract
+"""
+
+import difflib
+import logging
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from src.crawler.readability_extractor import EXTRACTORS, ReadabilityExtractor
+
+from .fakes import article_html
+
+REFERENCE = "node"
+
+# Pages extracted at once in the concurrent throughput benchmark
+CONCURRENCY = 8
+
+
+def _page(title: str, body: str) -> str:
+    return f"""<!DOCTYPE html>
+<html><head><title>{title}</title></head>
+<body><nav><a href="/">Home</a> <a href="/news">News</a></nav>
+<article><h1>{title}</h1>{body}</article>
+<footer>Copyright Example</footer></body></html>"""
+
+
+def corpus() -> dict[str, str]:
+    """Pages of the shapes found in crawls, from a short post to a long report."""
+    structured = "".join(
+        f"<h2>Part {i}</h2><p>Introduction of part {i}, with a "
+        f'<a href="/ref/{i}">reference</a> and <em>emphasis</em>.</p>'
+        f"<ul>{''.join(f'<li>Item {j} of part {i}</li>' for j in range(5))}</ul>"
+        "<table><tr><th>Year</th><th>Revenue</th></tr>"
+        f"{''.join(f'<tr><td>{2000 + j}</td><td>{j * 7}</td></tr>' for j in range(6))}"
+        f"</table><pre><code>print({i})</code></pre>"
+        for i in range(8)
+    )
+    chinese = "".join(
+        f"<p>第{i}段：模型上下文协议将大语言模型应用连接到工具和数据源。</p>"
+        for i in range(30)
+    )
+    return {
+        "short": article_html(0, paragraphs=5),
+        "news": article_html(1, paragraphs=40),
+        "long": article_html(2, paragraphs=400),
+        "structured": _page("Annual report", structured),
+        "chinese": _page("模型上下文协议", chinese),
+    }
+
+
+def _text(article) -> str:
+    return " ".join(article.to_markdown(including_title=False).split())
+
+
+def similarity(a: str, b: str) -> float:
+    return difflib.SequenceMatcher(None, a.split(), b.split(), autojunk=False).ratio()
+
+
+def bench_backend(backend: str, pages: dict[str, str], number: int) -> dict:
+    extractor = ReadabilityExtractor(backend)
+    if extractor.backend != backend:
+        return {"available": False}
+    # Warms up the extractor, e.g. starts the worker process
+    extractor.extract_article(pages["short"])
+    durations = []
+    for _ in range(number):
+        for html in pages.values():
+            start = time.perf_counter()
+            extractor.extract_article(html)
+            durations.append(time.perf_counter() - start)
+    batch = list(pages.values()) * number
+    with ThreadPoolExecutor(CONCURRENCY) as executor:
+        # Warms up, e.g. starts the worker processes of the pool
+        list(executor.map(extractor.extract_article, batch[:CONCURRENCY]))
+        start = time.perf_counter()
+        list(executor.map(extractor.extract_article, batch))
+        concurrent = time.perf_counter() - start
+    return {
+        "available": True,
+        "ms_per_page": round(statistics.mean(durations) * 1000, 3),
+        "pages_per_second": round(len(durations) / sum(durations), 2),
+        "concurrent_pages_per_second": round(len(batch) / concurrent, 2),
+        "articles": {
+            name: extractor.extract_article(html) for name, html in pages.items()
+        },
+    }
+
+
+def run(number: int = 3) -> dict:
+    pages = corpus()
+    backends = {
+        backend: bench_backend(backend, pages, number) for backend in EXTRACTORS
+    }
+    reference = REFERENCE if backends[REFERENCE]["available"] else "python"
+    expected = backends[reference]["articles"]
+    results = {"reference": reference}
+    for backend, result in backends.items():
+        articles = result.pop("articles", None)
+        if articles is not None:
+            result["title_parity"] = round(
+                statistics.mean(
+                    articles[name].title == expected[name].title for name in pages
+                ),
+                3,
+            )
+            result["text_parity"] = round(
+                statistics.mean(
+                    similarity(_text(articles[name]), _text(expected[name]))
+                    for name in pages
+                ),
+                3,
+            )
+        results[backend] = result
+    return results
+
+
+if __name__ == "__main__":
+    logging.disable(logging.WARNING)
+    for name, value in run().items():
+        print(f"{name}: {value}")
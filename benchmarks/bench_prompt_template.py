@@ -0,0 +1,77 @@
+"""
+Microbenchmark for prompt rendering.
+
+Compares the per-render cost of the previous `apply_prompt_template`
+implementation, which read and compiled the prompt file on every call, with
+the precompiled prompt registry.
+
+Usage:
+    python -m benchmarks.bench_prompt_template
+"""
+
+import os
+import re
+import timeit
+from datetime import datetime
+
+from langchain_core.prompts import PromptTemplate
+
+from src.config import TEAM_MEMBERS
+from src.prompts.template import PROMPTS_DIR, apply_prompt_template
+
+PROMPT_NAMES = ["coordinator", "planner", "supervisor", "researcher", "reporter"]
+
+STATE = {
+    "TEAM_MEMBERS": TEAM_MEMBERS,
+    "messages": [{"role": "user", "content": "What is MCP?"}],
+    "deep_thinking_mode": False,
+    "search_before_planning": False,
+}
+
+
+def legacy_apply_prompt_template(prompt_name: str, state: dict) -> list:
+    template = open(os.path.join(PROMPTS_DIR, f"{prompt_name}.md")).read()
+    template = template.replace("{", "{{").replace("}", "}}")
+    template = re.sub(r"<<([^>>]+)>>", r"{\1}", template)
+    system_prompt = PromptTemplate(
+        input_variables=["CURRENT_TIME"],
+        template=template,
+    ).format(CURRENT_TIME=datetime.now().strftime("%a %b %d %Y %H:%M:%S %z"), **state)
+    return [{"role": "system", "content": system_prompt}] + state["messages"]
+
+
+def strip_time(messages: list) -> str:
+    # CURRENT_TIME may tick between two renders, compare the rest
+    return re.sub(r"CURRENT_TIME: .*", "", messages[0]["content"])
+
+
+def check_parity() -> None:
+    for prompt_name in PROMPT_NAMES:
+        legacy = legacy_apply_prompt_template(prompt_name, STATE)
+        current = apply_prompt_template(prompt_name, STATE)
+        assert strip_time(legacy) == strip_time(current), prompt_name
+
+
+def bench(func, number: int = 2000) -> float:
+    """Return the mean cost of one render in microseconds."""
+    total = timeit.timeit(
+        lambda: [func(prompt_name, STATE) for prompt_name in PROMPT_NAMES],
+        number=number,
+    )
+    return total / (number * len(PROMPT_NAMES)) * 1e6
+
+
+def run() -> dict:
+    check_parity()
+    before = bench(legacy_apply_prompt_template)
+    after = bench(apply_prompt_template)
+    return {
+        "legacy_us_per_render": round(before, 2),
+        "registry_us_per_render": round(after, 2),
+        "speedup": round(before / after, 1),
+    }
+
+
+if __name__ == "__main__":
+    for name, value in run().items():
+        print(f"{name}: {value}")
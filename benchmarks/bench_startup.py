@@ -0,0 +1,89 @@
+"""
+Startup benchmark.
+
+Measures how long importing the API server and the CLI takes in a fresh
+interpreter, and fails when it exceeds a budget or when a heavy dependency
+is imported at startup, which autoscaled servers and the CLI pay on every
+cold start. LLM clients, agents and browsers are created on first use.
+
+Usage:
+    python -m benchmarks.bench_startup [budget_seconds]
+"""
+
+import json
+import statistics
+import subprocess
+import sys
+
+MODULES = ["src.api.app", "src.workflow"]
+
+# Only imported when a browser task runs
+LAZY_MODULES = ["browser_use", "playwright"]
+
+# Median import time not to exceed, in seconds
+DEFAULT_BUDGET = 4.0
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+from src.agents import get_agent
+from src.agents.llm import _llm_cache
+print(json.dumps({{
+    "seconds": elapsed,
+    "lazy_imported": [m for m in {lazy_modules!r} if m in sys.modules],
+    "llms": len(_llm_cache),
+    "agents": get_agent.cache_info().currsize,
+}}))
+"""
+
+
+def probe(module: str) -> dict:
+    """Import a module in a fresh interpreter and report what it cost."""
+    output = subprocess.run(
+        [sys.executable, "-c", PROBE.format(module=module, lazy_modules=LAZY_MODULES)],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def run(number: int = 5) -> dict:
+    results = {}
+    for module in MODULES:
+        probes = [probe(module) for _ in range(number)]
+        results[module] = {
+            "median_seconds": round(statistics.median(p["seconds"] for p in probes), 3),
+            "lazy_imported": probes[0]["lazy_imported"],
+            "llms": probes[0]["llms"],
+            "agents": probes[0]["agents"],
+        }
+    return results
+
+
+def check(results: dict, budget: float) -> list[str]:
+    """Return the startup regressions found in the results."""
+    errors = []
+    for module, result in results.items():
+        if result["median_seconds"] > budget:
+            errors.append(
+                f"{module} takes {result['median_seconds']}s to import, over {budget}s"
+            )
+        if result["lazy_imported"]:
+            errors.append(f"{module} imports {', '.join(result['lazy_imported'])}")
+        if result["llms"] or result["agents"]:
+            errors.append(f"{module} creates LLM clients or agents on import")
+    return errors
+
+
+if __name__ == "__main__":
+    budget = float(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_BUDGET
+    results = run()
+    for module, result in results.items():
+        print(f"{module}: {result}")
+    errors = check(results, budget)
+    for error in errors:
+        print(f"REGRESSION: {error}")
+    sys.exit(1 if errors else 0)
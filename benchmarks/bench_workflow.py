@@ -0,0 +1,119 @@
+"""
+Workflow benchmark, with the scripted LLM and stub search and crawl backends.
+
+Times what the framework adds around the LLM calls: compiling the graph,
+running a research workflow through it, and streaming the same workflow as
+protocol events with `run_agent_workflow`. The translation of the LangGraph
+events is also timed on its own, by replaying recorded events.
+
+Usage:
+    python -m benchmarks.bench_workflow
+"""
+
+import asyncio
+import logging
+import statistics
+import time
+
+from src.config import TEAM_MEMBERS
+from src.graph import build_graph
+from src.service.event_stream import WorkflowEventStream
+from src.service.workflow_service import run_agent_workflow
+
+from .fakes import offline
+
+REQUEST = "What is the Model Context Protocol?"
+
+
+def workflow_input(request: str) -> dict:
+    return {
+        "TEAM_MEMBERS": TEAM_MEMBERS,
+        "messages": [{"role": "user", "content": request}],
+        "deep_thinking_mode": False,
+        "search_before_planning": False,
+        "parallel_execution": False,
+        "follow_plan": False,
+    }
+
+
+def mean_ms(durations: list[float]) -> float:
+    return round(statistics.mean(durations) * 1000, 3)
+
+
+def bench_build_graph(number: int) -> float:
+    durations = []
+    for _ in range(number):
+        start = time.perf_counter()
+        build_graph()
+        durations.append(time.perf_counter() - start)
+    return mean_ms(durations)
+
+
+async def bench_graph(number: int) -> float:
+    graph = build_graph()
+    durations = []
+    for i in range(number):
+        # A new request every run, so the search cache does not answer it
+        state = workflow_input(f"{REQUEST} #{i}")
+        start = time.perf_counter()
+        await graph.ainvoke(state)
+        durations.append(time.perf_counter() - start)
+    return mean_ms(durations)
+
+
+async def bench_stream(number: int) -> tuple[float, int]:
+    durations = []
+    for i in range(number):
+        messages = [{"role": "user", "content": f"{REQUEST} @{i}"}]
+        start = time.perf_counter()
+        events = [event async for event in run_agent_workflow(messages)]
+        durations.append(time.perf_counter() - start)
+        assert events[-1]["event"] == "end_of_workflow", events[-1]
+    return mean_ms(durations), len(events)
+
+
+async def record_graph_events() -> list[dict]:
+    graph = build_graph()
+    return [
+        event
+        async for event in graph.astream_events(
+            workflow_input(f"{REQUEST} (recorded)"), version="v2"
+        )
+    ]
+
+
+def bench_translate(graph_events: list[dict], number: int) -> float:
+    durations = []
+    for _ in range(number):
+        stream = WorkflowEventStream("benchmark", [])
+        start = time.perf_counter()
+        for event in graph_events:
+            for _ in stream.translate(event):
+                pass
+        durations.append(time.perf_counter() - start)
+    return round(statistics.mean(durations) / len(graph_events) * 1e6, 3)
+
+
+def run(number: int = 20) -> dict:
+    async def run_async() -> dict:
+        graph_ms = await bench_graph(number)
+        stream_ms, events = await bench_stream(number)
+        graph_events = await record_graph_events()
+        return {
+            "build_graph_ms": bench_build_graph(number),
+            "graph_run_ms": graph_ms,
+            "workflow_stream_ms": stream_ms,
+            "streaming_overhead_ms": round(stream_ms - graph_ms, 3),
+            "events_per_workflow": events,
+            "graph_events_per_workflow": len(graph_events),
+            "translate_us_per_graph_event": bench_translate(graph_events, number),
+        }
+
+    with offline():
+        return asyncio.run(run_async())
+
+
+if __name__ == "__main__":
+    logging.disable(logging.INFO)
+    for name, value in run().items():
+        print(f"{name}: {value}")
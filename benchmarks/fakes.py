@@ -0,0 +1,312 @@
+"""
+Offline stand-ins for the LLMs, Tavily and Jina, shared by the benchmarks.
+
+`ScriptedChatModel` plays every agent of a research workflow from the system
+prompt it is given: the coordinator hands off to the planner, the plan has a
+researcher and a reporter step, the researcher searches and crawls once, and
+the supervisor routes through the plan. Replies stream token by token, tool
+calls and structured output work like with a real chat model, and the same
+request always gets the same reply.
+
+Usage:
+    with offline():
+        ...  # run workflows without network access
+"""
+
+import asyncio
+import contextlib
+import json
+import os
+import re
+import time
+from typing import Any, AsyncIterator, Iterator, Optional
+from unittest import mock
+from urllib.parse import urlparse
+
+import httpx
+from langchain_community.utilities.tavily_search import TavilySearchAPIWrapper
+from langchain_core.callbacks import (
+    AsyncCallbackManagerForLLMRun,
+    CallbackManagerForLLMRun,
+)
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import (
+    AIMessage,
+    AIMessageChunk,
+    BaseMessage,
+    ToolMessage,
+)
+from langchain_core.messages.tool import tool_call_chunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+from src.agents import get_agent
+from src.agents import llm
+from src.crawler.jina_client import JinaClient
+from src.tools.crawl import crawler
+from src.tools.search import tavily_tool
+
+STUB_SITE = "https://example.com"
+
+# Agents recognized from the opening of their system prompt
+ROLES = {
+    "Deep Researcher": "planner",
+    "You are Langmanus": "coordinator",
+    "professional reporter": "reporter",
+    "researcher tasked": "researcher",
+    "supervisor coordinating": "supervisor",
+    "software engineer": "coder",
+    "web browser": "browser",
+}
+
+
+def _role(messages: list[BaseMessage]) -> str:
+    opening = messages[0].content[:500] if messages else ""
+    for marker, role in ROLES.items():
+        if marker in opening:
+            return role
+    return "assistant"
+
+
+def _request(messages: list[BaseMessage]) -> str:
+    for message in messages:
+        if message.type == "human" and not message.name:
+            return message.content
+    return ""
+
+
+def _count_tokens(text: str) -> int:
+    return max(len(text) // 4, 1)
+
+
+def _words(length: int) -> str:
+    vocabulary = (
+        "the agent framework streams tokens to the client while it works".split()
+    )
+    return " ".join(vocabulary[i % len(vocabulary)] for i in range(length))
+
+
+class ScriptedChatModel(BaseChatModel):
+    """A deterministic chat model that plays every agent of the workflow.
+
+    Args:
+        report_words: Number of words of the streamed report
+        latency: Time before the first token, in seconds
+        token_interval: Time between two streamed tokens, in seconds
+    """
+
+    report_words: int = 200
+    latency: float = 0.0
+    token_interval: float = 0.0
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted"
+
+    def bind_tools(self, tools: list, *, tool_choice: Any = None, **kwargs: Any):
+        return self.bind(tools=[convert_to_openai_tool(t) for t in tools], **kwargs)
+
+    def _reply(self, messages: list[BaseMessage], tools: list[dict]) -> AIMessage:
+        role = _role(messages)
+        request = _request(messages)
+        if role == "coordinator":
+            return AIMessage("handoff_to_planner()")
+        if role == "planner":
+            plan = {
+                "thought": f"The user wants to know about {request}",
+                "title": f"Research on {request}",
+                "steps": [
+                    {
+                        "agent_name": "researcher",
+                        "title": "Gather information",
+                        "description": f"Search and read about {request}",
+                    },
+                    {
+                        "agent_name": "reporter",
+                        "title": "Write the report",
+                        "description": "Summarize the findings",
+                    },
+                ],
+            }
+            return AIMessage(json.dumps(plan))
+        if role == "supervisor":
+            done = {message.name for message in messages if message.type == "human"}
+            next_agent = next(
+                (name for name in ["researcher", "reporter"] if name not in done),
+                "FINISH",
+            )
+            return self._tool_call("Router", {"next": next_agent})
+        if role == "researcher":
+            tool_results = [m for m in messages if isinstance(m, ToolMessage)]
+            if not tool_results and "tavily_search" in _tool_names(tools):
+                return self._tool_call("tavily_search", {"query": request})
+            if len(tool_results) == 1 and "crawl_tool" in _tool_names(tools):
+                return self._tool_call("crawl_tool", {"url": f"{STUB_SITE}/0"})
+            return AIMessage(f"Findings about {request}: {_words(60)}")
+        if role == "reporter":
+            return AIMessage(f"# Report on {request}\n\n{_words(self.report_words)}")
+        return AIMessage(f"Done: {request}")
+
+    def _tool_call(self, name: str, args: dict) -> AIMessage:
+        tool_call_id = f"call_{name}_{abs(hash(json.dumps(args))) % 10**8}"
+        return AIMessage(
+            "", tool_calls=[{"name": name, "args": args, "id": tool_call_id}]
+        )
+
+    def _usage(self, messages: list[BaseMessage], reply: AIMessage) -> dict:
+        prompt_tokens = sum(_count_tokens(str(m.content)) for m in messages)
+        completion_tokens = _count_tokens(reply.content or json.dumps(reply.tool_calls))
+        return {
+            "input_tokens": prompt_tokens,
+            "output_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        }
+
+    def _chunks(self, messages: list[BaseMessage], **kwargs: Any) -> Iterator:
+        reply = self._reply(messages, kwargs.get("tools") or [])
+        usage = self._usage(messages, reply)
+        if reply.tool_calls:
+            chunks = [
+                AIMessageChunk(
+                    "",
+                    tool_call_chunks=[
+                        tool_call_chunk(
+                            name=call["name"],
+                            args=json.dumps(call["args"]),
+                            id=call["id"],
+                            index=0,
+                        )
+                        for call in reply.tool_calls
+                    ],
+                )
+            ]
+        else:
+            chunks = [
+                AIMessageChunk(token) for token in re.findall(r"\S+\s*", reply.content)
+            ]
+        chunks.append(AIMessageChunk("", usage_metadata=usage))
+        return iter(chunks)
+
+    def _generate(
+        self,
+        messages: list[BaseMessage],
+        stop: Optional[list[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        time.sleep(self.latency)
+        reply = self._reply(messages, kwargs.get("tools") or [])
+        reply.usage_metadata = self._usage(messages, reply)
+        return ChatResult(generations=[ChatGeneration(message=reply)])
+
+    async def _agenerate(
+        self,
+        messages: list[BaseMessage],
+        stop: Optional[list[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        await asyncio.sleep(self.latency)
+        reply = self._reply(messages, kwargs.get("tools") or [])
+        reply.usage_metadata = self._usage(messages, reply)
+        return ChatResult(generations=[ChatGeneration(message=reply)])
+
+    async def _astream(
+        self,
+        messages: list[BaseMessage],
+        stop: Optional[list[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        await asyncio.sleep(self.latency)
+        for i, message in enumerate(self._chunks(messages, **kwargs)):
+            if i:
+                await asyncio.sleep(self.token_interval)
+            chunk = ChatGenerationChunk(message=message)
+            if run_manager and message.content:
+                await run_manager.on_llm_new_token(message.content, chunk=chunk)
+            yield chunk
+
+
+def _tool_names(tools: list[dict]) -> set[str]:
+    return {tool["function"]["name"] for tool in tools}
+
+
+def article_html(index: int, paragraphs: int = 40) -> str:
+    """A news article page with the navigation, images and footer of a real site."""
+    body = "\n".join(
+        f"<p>Paragraph {i} of article {index}. {_words(40)}.</p>"
+        + (
+            f'<img src="/images/{index}-{i}.png" alt="Figure {i}">'
+            if i % 10 == 0
+            else ""
+        )
+        for i in range(paragraphs)
+    )
+    links = "".join(f'<li><a href="/{i}">Section {i}</a></li>' for i in range(20))
+    return f"""<!DOCTYPE html>
+<html><head><title>Article {index}</title>
+<script>var analytics = {{"page": {index}}};</script>
+<style>body {{ font-family: sans-serif; }}</style></head>
+<body><nav><ul>{links}</ul></nav>
+<article><h1>Article {index}</h1>{body}</article>
+<aside><h2>Related</h2><ul>{links}</ul></aside>
+<footer>Copyright Example</footer></body></html>"""
+
+
+class StubTavilySearchAPIWrapper(TavilySearchAPIWrapper):
+    """Answers every search with links to the stub site."""
+
+    tavily_api_key: Any = "stub"
+
+    def raw_results(
+        self, query: str, max_results: Optional[int] = 5, *args: Any, **kwargs: Any
+    ):
+        return {
+            "query": query,
+            "results": [
+                {
+                    "title": f"Result {i} for {query}",
+                    "url": f"{STUB_SITE}/{i}",
+                    "content": f"{query}: {_words(50)}",
+                    "score": 1 - i / 10,
+                }
+                for i in range(max_results)
+            ],
+        }
+
+    async def raw_results_async(self, query: str, *args: Any, **kwargs: Any):
+        return self.raw_results(query, *args, **kwargs)
+
+
+def stub_jina_client(paragraphs: int = 40) -> JinaClient:
+    """A Jina client that serves `article_html` pages of the stub site locally."""
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        url = json.loads(request.content)["url"]
+        index = int(urlparse(url).path.strip("/") or 0)
+        return httpx.Response(200, text=article_html(index, paragraphs))
+
+    transport = httpx.MockTransport(handler)
+    return JinaClient(transport=transport, async_transport=transport)
+
+
+@contextlib.contextmanager
+def offline(model: Optional[BaseChatModel] = None) -> Iterator[BaseChatModel]:
+    """Serve every LLM, search and crawl of the workflows from local stand-ins."""
+    model = model or ScriptedChatModel()
+    llms = {llm_type: model for llm_type in ["basic", "reasoning", "vision"]}
+    with contextlib.ExitStack() as stack:
+        stack.enter_context(mock.patch.dict(llm._llm_cache, llms))
+        stack.enter_context(mock.patch.dict(llm._response_cached_llms, llms))
+        stack.enter_context(
+            mock.patch.object(tavily_tool, "api_wrapper", StubTavilySearchAPIWrapper())
+        )
+        stack.enter_context(
+            mock.patch.object(crawler, "jina_client", stub_jina_client())
+        )
+        stack.enter_context(mock.patch.dict(os.environ, {"JINA_API_KEY": "stub"}))
+        # Agents hold on to the LLM they were created with
+        get_agent.cache_clear()
+        stack.callback(get_agent.cache_clear)
+        yield model
@@ -0,0 +1,392 @@
+"""
+Load test of the SSE chat endpoint, sweeping the number of concurrent clients.
+
+Starts the API server with the scripted LLM and stub search and crawl
+backends, see `benchmarks/fakes.py`, and ramps up from 1 to `--max-clients`
+clients, each streaming `--requests` workflows from `/api/chat/stream` one
+after the other. For every level it reports the time to the first event, the
+time between two events of a stream, the total workflow time, the server CPU
+time per workflow and the server memory per concurrent workflow.
+
+By default the server runs in a subprocess on a local port, so that its CPU
+and memory are measured on their own. With `--in-process` it runs in the
+event loop of the clients, whose CPU and memory are then included. CPU and
+memory are only reported when `psutil` is installed.
+
+The server admits `MAX_CONCURRENT_WORKFLOWS` workflows at a time, the others
+are queued, which shows in the time to the first workflow event.
+
+Usage:
+    python -m benchmarks.load_test [--max-clients 32] [--requests 2]
+        [--latency-ms 50] [--token-interval-ms 2] [--in-process]
+        [--output load.json]
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import logging
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from typing import AsyncIterator, NamedTuple, Optional
+
+import httpx
+
+try:
+    import psutil
+except ImportError:  # CPU and memory are not reported
+    psutil = None
+
+from .fakes import ScriptedChatModel, offline
+
+
+class StreamTiming(NamedTuple):
+    # Seconds from the request to the first event, and to the first event of
+    # the workflow itself, i.e. after waiting in the queue
+    first_event: float
+    first_workflow_event: float
+    # Seconds between two consecutive events
+    gaps: list[float]
+    total: float
+    events: int
+    error: Optional[str] = None
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def percentiles(values: list[float]) -> dict[str, Optional[float]]:
+    """p50, p95 and p99 of durations in seconds, in milliseconds."""
+    if not values:
+        return {"p50": None, "p95": None, "p99": None}
+    if len(values) == 1:
+        values = values * 2
+    cuts = statistics.quantiles(values, n=100, method="inclusive")
+    return {
+        "p50": round(cuts[49] * 1000, 2),
+        "p95": round(cuts[94] * 1000, 2),
+        "p99": round(cuts[98] * 1000, 2),
+    }
+
+
+async def stream_workflow(client: httpx.AsyncClient, url: str, request: str):
+    """Stream one workflow and time its events."""
+    start = time.perf_counter()
+    times: list[float] = []
+    first_workflow_event = None
+    kind = None
+    try:
+        async with client.stream(
+            "POST",
+            url,
+            json={"messages": [{"role": "user", "content": request}]},
+        ) as response:
+            if response.status_code != 200:
+                await response.aread()
+                raise RuntimeError(f"HTTP {response.status_code}: {response.text}")
+            async for line in response.aiter_lines():
+                if line.startswith("event:"):
+                    kind = line.removeprefix("event:").strip()
+                elif not line and kind is not None:
+                    # The blank line ends an event
+                    times.append(time.perf_counter())
+                    if first_workflow_event is None and kind not in (
+                        "queued",
+                        "queue_position",
+                    ):
+                        first_workflow_event = times[-1] - start
+                    kind = None
+        if not times:
+            raise RuntimeError("No event received")
+    except Exception as e:
+        return StreamTiming(0, 0, [], time.perf_counter() - start, 0, repr(e))
+    return StreamTiming(
+        first_event=times[0] - start,
+        first_workflow_event=first_workflow_event or 0,
+        gaps=[b - a for a, b in zip(times, times[1:])],
+        total=time.perf_counter() - start,
+        events=len(times),
+    )
+
+
+class ResourceMonitor:
+    """Samples the CPU time and the memory of the server process."""
+
+    def __init__(self, pid: Optional[int], interval: float = 0.05):
+        self.process = psutil.Process(pid) if psutil is not None else None
+        self.interval = interval
+        self.peak_rss = 0
+        self._task: Optional[asyncio.Task] = None
+
+    def rss(self) -> int:
+        return self.process.memory_info().rss if self.process else 0
+
+    def cpu_seconds(self) -> float:
+        if self.process is None:
+            return 0.0
+        times = self.process.cpu_times()
+        return times.user + times.system
+
+    async def _sample(self) -> None:
+        while True:
+            self.peak_rss = max(self.peak_rss, self.rss())
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        self.peak_rss = self.rss()
+        self._task = asyncio.create_task(self._sample())
+
+    async def stop(self) -> None:
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+
+
+async def run_level(
+    client: httpx.AsyncClient,
+    url: str,
+    clients: int,
+    requests: int,
+    monitor: ResourceMonitor,
+) -> dict:
+    async def run_client(index: int) -> list[StreamTiming]:
+        return [
+            await stream_workflow(client, url, f"Load test {clients}/{index}/{i}")
+            for i in range(requests)
+        ]
+
+    idle_rss = monitor.rss()
+    cpu_before = monitor.cpu_seconds()
+    start = time.perf_counter()
+    monitor.start()
+    try:
+        results = await asyncio.gather(*(run_client(i) for i in range(clients)))
+    finally:
+        await monitor.stop()
+    elapsed = time.perf_counter() - start
+    cpu = monitor.cpu_seconds() - cpu_before
+
+    timings = [timing for result in results for timing in result]
+    succeeded = [timing for timing in timings if timing.error is None]
+    errors = sorted({timing.error for timing in timings if timing.error})
+    level = {
+        "clients": clients,
+        "workflows": len(timings),
+        "errors": len(timings) - len(succeeded),
+        "workflows_per_second": round(len(succeeded) / elapsed, 2),
+        "events_per_workflow": (
+            round(statistics.mean(t.events for t in succeeded), 1) if succeeded else 0
+        ),
+        "time_to_first_event_ms": percentiles([t.first_event for t in succeeded]),
+        "time_to_first_workflow_event_ms": percentiles(
+            [t.first_workflow_event for t in succeeded]
+        ),
+        "inter_event_ms": percentiles([gap for t in succeeded for gap in t.gaps]),
+        "workflow_ms": percentiles([t.total for t in succeeded]),
+    }
+    if monitor.process is not None:
+        level["server_cpu_percent"] = round(cpu / elapsed * 100, 1)
+        level["server_cpu_ms_per_workflow"] = (
+            round(cpu / len(succeeded) * 1000, 2) if succeeded else None
+        )
+        level["server_peak_rss_mb"] = round(monitor.peak_rss / 2**20, 1)
+        level["server_rss_mb_per_workflow"] = round(
+            max(monitor.peak_rss - idle_rss, 0) / clients / 2**20, 2
+        )
+    if errors:
+        level["error_samples"] = errors[:3]
+    return level
+
+
+def client_levels(max_clients: int) -> list[int]:
+    """1, 2, 4, ... up to `max_clients`."""
+    levels = []
+    clients = 1
+    while clients < max_clients:
+        levels.append(clients)
+        clients *= 2
+    return levels + [max_clients]
+
+
+def scripted_model(latency_ms: float, token_interval_ms: float) -> ScriptedChatModel:
+    return ScriptedChatModel(
+        latency=latency_ms / 1000, token_interval=token_interval_ms / 1000
+    )
+
+
+def serve(port: int, latency_ms: float, token_interval_ms: float) -> None:
+    """Run the API server with the offline backends until it is killed."""
+    import uvicorn
+
+    from src.api.app import app
+
+    logging.disable(logging.INFO)
+    with offline(scripted_model(latency_ms, token_interval_ms)):
+        uvicorn.run(app, host="127.0.0.1", port=port, log_level="warning")
+
+
+async def wait_until_ready(client: httpx.AsyncClient, base_url: str) -> None:
+    deadline = time.monotonic() + 60
+    while True:
+        try:
+            await client.get(f"{base_url}/docs")
+            return
+        except httpx.TransportError:
+            if time.monotonic() > deadline:
+                raise
+            await asyncio.sleep(0.2)
+
+
+@contextlib.asynccontextmanager
+async def in_process_server(
+    port: int, latency_ms: float, token_interval_ms: float
+) -> AsyncIterator[int]:
+    """Run the API server in this event loop, yields the server pid."""
+    import uvicorn
+
+    from src.api.app import app
+
+    with offline(scripted_model(latency_ms, token_interval_ms)):
+        server = uvicorn.Server(
+            uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning")
+        )
+        task = asyncio.create_task(server.serve())
+        try:
+            yield os.getpid()
+        finally:
+            server.should_exit = True
+            await task
+
+
+@contextlib.asynccontextmanager
+async def subprocess_server(
+    port: int, latency_ms: float, token_interval_ms: float
+) -> AsyncIterator[int]:
+    """Run the API server in a subprocess, yields the server pid."""
+    process = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "benchmarks.load_test",
+            "--serve",
+            str(port),
+            "--latency-ms",
+            str(latency_ms),
+            "--token-interval-ms",
+            str(token_interval_ms),
+        ]
+    )
+    try:
+        yield process.pid
+    finally:
+        process.terminate()
+        process.wait()
+
+
+async def sweep(
+    max_clients: int,
+    requests: int = 2,
+    latency_ms: float = 50,
+    token_interval_ms: float = 2,
+    in_process: bool = False,
+) -> dict:
+    """Ramp the clients up to `max_clients` and report every level."""
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    url = f"{base_url}/api/chat/stream"
+    server = in_process_server if in_process else subprocess_server
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+    levels = []
+    async with (
+        server(port, latency_ms, token_interval_ms) as pid,
+        httpx.AsyncClient(timeout=None, limits=limits) as client,
+    ):
+        await wait_until_ready(client, base_url)
+        monitor = ResourceMonitor(pid)
+        # Warm up the server, e.g. the first workflow creates the agents
+        await stream_workflow(client, url, "Warm up")
+        for clients in client_levels(max_clients):
+            level = await run_level(client, url, clients, requests, monitor)
+            levels.append(level)
+            print(json.dumps(level), file=sys.stderr)
+    return {
+        "mode": "in-process" if in_process else "subprocess",
+        "requests_per_client": requests,
+        "latency_ms": latency_ms,
+        "token_interval_ms": token_interval_ms,
+        "levels": levels,
+    }
+
+
+def print_table(report: dict) -> None:
+    columns = [
+        ("clients", lambda level: level["clients"]),
+        ("errors", lambda level: level["errors"]),
+        ("wf/s", lambda level: level["workflows_per_second"]),
+        ("ttfe p50/p95/p99 ms", lambda level: level["time_to_first_event_ms"]),
+        (
+            "started p50/p95/p99 ms",
+            lambda level: level["time_to_first_workflow_event_ms"],
+        ),
+        ("gap p50/p95/p99 ms", lambda level: level["inter_event_ms"]),
+        ("workflow p50/p95/p99 ms", lambda level: level["workflow_ms"]),
+        ("cpu ms/wf", lambda level: level.get("server_cpu_ms_per_workflow")),
+        ("rss MB/wf", lambda level: level.get("server_rss_mb_per_workflow")),
+    ]
+
+    def cell(value) -> str:
+        if isinstance(value, dict):
+            return "/".join(str(v) for v in value.values())
+        return str(value)
+
+    rows = [[name for name, _ in columns]] + [
+        [cell(get(level)) for _, get in columns] for level in report["levels"]
+    ]
+    widths = [max(len(row[i]) for row in rows) for i in range(len(columns))]
+    for row in rows:
+        print("  ".join(value.rjust(width) for value, width in zip(row, widths)))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--max-clients", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=2, help="Per client")
+    parser.add_argument("--latency-ms", type=float, default=50)
+    parser.add_argument("--token-interval-ms", type=float, default=2)
+    parser.add_argument("--in-process", action="store_true")
+    parser.add_argument("--output", help="Write the report as JSON to this file")
+    parser.add_argument("--serve", type=int, metavar="PORT", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.serve, args.latency_ms, args.token_interval_ms)
+        return
+
+    logging.disable(logging.INFO)
+    report = asyncio.run(
+        sweep(
+            args.max_clients,
+            args.requests,
+            args.latency_ms,
+            args.token_interval_ms,
+            args.in_process,
+        )
+    )
+    print_table(report)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Run the benchmark suite and write the results as JSON.
+
+Every benchmark runs offline, see `benchmarks/fakes.py`. The results are
+written to `benchmarks/results/<commit>.json` by default, so that two commits
+can be compared with `--compare`.
+
+Usage:
+    python -m benchmarks.run [--only workflow crawl] [--output results.json]
+        [--compare benchmarks/results/<commit>.json]
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+from datetime import datetime, timezone
+from typing import Any, Optional
+
+from . import (
+    bench_crawl,
+    bench_extract,
+    bench_prompt_template,
+    bench_startup,
+    bench_workflow,
+)
+
+BENCHMARKS = {
+    "startup": bench_startup.run,
+    "prompt_template": bench_prompt_template.run,
+    "workflow": bench_workflow.run,
+    "crawl": bench_crawl.run,
+    "extract": bench_extract.run,
+}
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def flatten(results: dict, prefix: str = "") -> dict[str, Any]:
+    """Flatten nested results into `benchmark.metric` keys."""
+    flat = {}
+    for key, value in results.items():
+        if isinstance(value, dict):
+            flat.update(flatten(value, f"{prefix}{key}."))
+        else:
+            flat[f"{prefix}{key}"] = value
+    return flat
+
+
+def compare(baseline: dict, current: dict) -> list[str]:
+    """Describe the change of every numeric metric found in both results."""
+    before = flatten(baseline["results"])
+    after = flatten(current["results"])
+    lines = []
+    for key, value in after.items():
+        old = before.get(key)
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            continue
+        if not isinstance(old, (int, float)) or not old:
+            continue
+        lines.append(f"{key}: {old} -> {value} ({(value - old) / old:+.1%})")
+    return lines
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--only", nargs="+", choices=BENCHMARKS, default=None)
+    parser.add_argument("--output", help="Defaults to benchmarks/results/<commit>.json")
+    parser.add_argument("--compare", help="Results of an earlier run to compare to")
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    commit = git_commit()
+    report = {
+        "commit": commit,
+        "date": datetime.now(timezone.utc).isoformat(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "results": {},
+    }
+    for name in args.only or BENCHMARKS:
+        print(f"Running {name}...", file=sys.stderr)
+        report["results"][name] = BENCHMARKS[name]()
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{commit or 'results'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(json.dumps(report["results"], indent=2))
+    print(f"Results written to {output}", file=sys.stderr)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        print(f"\nCompared to {baseline.get('commit')}:")
+        for line in compare(baseline, report):
+            print(f"  {line}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,5 @@
+import functools
+
 from langgraph.prebuilt import create_react_agent
 
 from src.prompts import apply_prompt_template
@@ -10,23 +12,29 @@ from src.tools import (
 )
 
 from .llm import get_llm_by_type
-from src.config.agents import AGENT_LLM_MAP
+from src.config.agents import AGENT_LLM_MAP, AGENT_LLM_CACHE
 
-# Create agents using configured LLM types
-research_agent = create_react_agent(
-    get_llm_by_type(AGENT_LLM_MAP["researcher"]),
-    tools=[tavily_tool, crawl_tool],
-    prompt=lambda state: apply_prompt_template("researcher", state),
-)
+# Tools of the agents built on the ReAct pattern
+AGENT_TOOLS = {
+    "researcher": [tavily_tool, crawl_tool],
+    "coder": [python_repl_tool, bash_tool],
+    "browser": [browser_tool],
+}
 
-coder_agent = create_react_agent(
-    get_llm_by_type(AGENT_LLM_MAP["coder"]),
-    tools=[python_repl_tool, bash_tool],
-    prompt=lambda state: apply_prompt_template("coder", state),
-)
 
-browser_agent = create_react_agent(
-    get_llm_by_type(AGENT_LLM_MAP["browser"]),
-    tools=[browser_tool],
-    prompt=lambda state: apply_prompt_template("browser", state),
-)
+@functools.cache
+def get_agent(agent_name: str):
+    """
+    Get the ReAct agent of a team member, created on first use and shared.
+    """
+    if agent_name not in AGENT_TOOLS:
+        raise ValueError(f"Unknown agent: {agent_name}")
+    # Agents do not inherit the workflow checkpointer: a failed agent step is
+    # rerun as a whole on resume, which keeps checkpoints to one per graph node
+    # instead of one per tool call.
+    return create_react_agent(
+        get_llm_by_type(AGENT_LLM_MAP[agent_name], cached=AGENT_LLM_CACHE[agent_name]),
+        tools=AGENT_TOOLS[agent_name],
+        prompt=lambda state: apply_prompt_template(agent_name, state),
+        checkpointer=False,
+    )
@@ -0,0 +1,167 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import closing
+from typing import Any, Optional
+
+from langchain_core.caches import RETURN_VAL_TYPE, BaseCache
+from langchain_core.load import dumps, loads
+
+logger = logging.getLogger(__name__)
+
+# Message fields that differ between replays of the same conversation
+VOLATILE_MESSAGE_FIELDS = ["id", "response_metadata", "usage_metadata"]
+
+# The rendered current time makes every prompt unique, mask it out of the key
+CURRENT_TIME_PATTERN = re.compile(r"CURRENT_TIME: [^\n]*")
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Normalize a serialized message list so that replays of the same
+    conversation produce the same cache key."""
+    try:
+        messages = json.loads(prompt)
+    except json.JSONDecodeError:
+        return CURRENT_TIME_PATTERN.sub("CURRENT_TIME:", prompt)
+    for message in messages if isinstance(messages, list) else []:
+        kwargs = message.get("kwargs") if isinstance(message, dict) else None
+        if isinstance(kwargs, dict):
+            for field in VOLATILE_MESSAGE_FIELDS:
+                kwargs.pop(field, None)
+    normalized = json.dumps(messages, sort_keys=True, ensure_ascii=False)
+    return CURRENT_TIME_PATTERN.sub("CURRENT_TIME:", normalized)
+
+
+def cache_key(prompt: str, llm_string: str) -> str:
+    """Hash the normalized messages together with the model configuration."""
+    return hashlib.sha256(
+        f"{normalize_prompt(prompt)}\n{llm_string}".encode("utf-8")
+    ).hexdigest()
+
+
+class LRUResponseCache(BaseCache):
+    """In-memory LLM response cache bounded to `maxsize` entries."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._entries: OrderedDict[str, RETURN_VAL_TYPE] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        key = cache_key(prompt, llm_string)
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+        return value
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE):
+        key = cache_key(prompt, llm_string)
+        with self._lock:
+            self._entries[key] = return_val
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self, **kwargs: Any) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    # Lookups are cheap, skip the executor used by the default async methods
+    async def alookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        return self.lookup(prompt, llm_string)
+
+    async def aupdate(
+        self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE
+    ) -> None:
+        self.update(prompt, llm_string, return_val)
+
+    async def aclear(self, **kwargs: Any) -> None:
+        self.clear()
+
+
+class SQLiteResponseCache(BaseCache):
+    """LLM response cache stored in SQLite and shared by worker processes.
+
+    The least recently used entries are removed beyond `maxsize` entries.
+    """
+
+    def __init__(self, path: str, maxsize: int):
+        self.path = path
+        self.maxsize = maxsize
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with closing(self._connect()) as conn, conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS llm_responses (
+                    key TEXT PRIMARY KEY,
+                    generations TEXT NOT NULL,
+                    accessed_at REAL NOT NULL
+                )
+                """
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=30)
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        key = cache_key(prompt, llm_string)
+        with closing(self._connect()) as conn, conn:
+            row = conn.execute(
+                "SELECT generations FROM llm_responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                "UPDATE llm_responses SET accessed_at = ? WHERE key = ?",
+                (time.time(), key),
+            )
+        try:
+            return [loads(generation) for generation in json.loads(row[0])]
+        except Exception:
+            logger.warning("Failed to load cached LLM response, ignoring it")
+            return None
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE):
+        generations = json.dumps([dumps(generation) for generation in return_val])
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO llm_responses (key, generations, accessed_at) VALUES (?, ?, ?)",
+                (cache_key(prompt, llm_string), generations, time.time()),
+            )
+            conn.execute(
+                """
+                DELETE FROM llm_responses WHERE key IN (
+                    SELECT key FROM llm_responses
+                    ORDER BY accessed_at DESC LIMIT -1 OFFSET ?
+                )
+                """,
+                (self.maxsize,),
+            )
+
+    def clear(self, **kwargs: Any) -> None:
+        with closing(self._connect()) as conn, conn:
+            conn.execute("DELETE FROM llm_responses")
+
+
+def create_response_cache(
+    backend: Optional[str], path: Optional[str], maxsize: int
+) -> Optional[BaseCache]:
+    """Create the LLM response cache for the configured backend, if any."""
+    if not backend:
+        return None
+    if backend == "memory":
+        return LRUResponseCache(maxsize)
+    if backend == "sqlite":
+        if not path:
+            raise ValueError("LLM_CACHE_PATH is required for the sqlite LLM cache")
+        return SQLiteResponseCache(path, maxsize)
+    raise ValueError(f"Unknown LLM cache backend: {backend}")
@@ -12,8 +12,12 @@ from src.config import (
     VL_MODEL,
     VL_BASE_URL,
     VL_API_KEY,
+    LLM_CACHE_BACKEND,
+    LLM_CACHE_PATH,
 )
-from src.config.agents import LLMType
+from src.config.agents import LLMType, LLM_CACHE_MAX_ENTRIES
+
+from .cache import create_response_cache
 
 
 def create_openai_llm(
@@ -27,7 +31,13 @@ def create_openai_llm(
     Create a ChatOpenAI instance with the specified configuration
     """
     # Only include base_url in the arguments if it's not None or empty
-    llm_kwargs = {"model": model, "temperature": temperature, **kwargs}
+    # Request token usage in streamed responses as well
+    llm_kwargs = {
+        "model": model,
+        "temperature": temperature,
+        "stream_usage": True,
+        **kwargs,
+    }
 
     if base_url:  # This will handle None or empty string
         llm_kwargs["base_url"] = base_url
@@ -63,11 +73,29 @@ def create_deepseek_llm(
 # Cache for LLM instances
 _llm_cache: dict[LLMType, ChatOpenAI | ChatDeepSeek] = {}
 
+# Cache for LLM responses and the LLM instances that use it
+response_cache = create_response_cache(
+    LLM_CACHE_BACKEND, LLM_CACHE_PATH, LLM_CACHE_MAX_ENTRIES
+)
+_response_cached_llms: dict[LLMType, ChatOpenAI | ChatDeepSeek] = {}
+
 
-def get_llm_by_type(llm_type: LLMType) -> ChatOpenAI | ChatDeepSeek:
+def get_llm_by_type(
+    llm_type: LLMType, cached: bool = False
+) -> ChatOpenAI | ChatDeepSeek:
     """
-    Get LLM instance by type. Returns cached instance if available.
+    Get LLM instance by type. The instance is created on first use and cached.
+
+    With `cached`, the returned LLM serves identical requests from the
+    LLM response cache if one is configured.
     """
+    if cached and response_cache is not None:
+        if llm_type not in _response_cached_llms:
+            _response_cached_llms[llm_type] = get_llm_by_type(llm_type).model_copy(
+                update={"cache": response_cache}
+            )
+        return _response_cached_llms[llm_type]
+
     if llm_type in _llm_cache:
         return _llm_cache[llm_type]
 
@@ -96,18 +124,12 @@ def get_llm_by_type(llm_type: LLMType) -> ChatOpenAI | ChatDeepSeek:
     return llm
 
 
-# Initialize LLMs for different purposes - now these will be cached
-reasoning_llm = get_llm_by_type("reasoning")
-basic_llm = get_llm_by_type("basic")
-vl_llm = get_llm_by_type("vision")
-
-
 if __name__ == "__main__":
-    stream = reasoning_llm.stream("what is mcp?")
+    stream = get_llm_by_type("reasoning").stream("what is mcp?")
     full_response = ""
     for chunk in stream:
         full_response += chunk.content
     print(full_response)
 
-    basic_llm.invoke("Hello")
-    vl_llm.invoke("Hello")
+    get_llm_by_type("basic").invoke("Hello")
+    get_llm_by_type("vision").invoke("Hello")
@@ -0,0 +1,236 @@
+import logging
+import time
+from typing import Any, Optional
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import ChatGeneration, LLMResult
+
+logger = logging.getLogger(__name__)
+
+
+def get_token_usage(response: LLMResult) -> dict[str, int]:
+    """Extract token counts from an LLM response.
+
+    Reads the standard `usage_metadata` of the generated message and falls back
+    to the raw provider usage, e.g. DeepSeek's `prompt_cache_hit_tokens`.
+    """
+    usage = {
+        "prompt_tokens": 0,
+        "completion_tokens": 0,
+        "reasoning_tokens": 0,
+        "cached_tokens": 0,
+    }
+    generation = response.generations[0][0] if response.generations else None
+    metadata = (
+        getattr(generation.message, "usage_metadata", None)
+        if isinstance(generation, ChatGeneration)
+        else None
+    )
+    if metadata:
+        usage["prompt_tokens"] = metadata.get("input_tokens") or 0
+        usage["completion_tokens"] = metadata.get("output_tokens") or 0
+        usage["reasoning_tokens"] = (
+            metadata.get("output_token_details", {}).get("reasoning") or 0
+        )
+        usage["cached_tokens"] = (
+            metadata.get("input_token_details", {}).get("cache_read") or 0
+        )
+
+    raw = (response.llm_output or {}).get("token_usage") or {}
+    if not usage["prompt_tokens"]:
+        usage["prompt_tokens"] = raw.get("prompt_tokens") or 0
+        usage["completion_tokens"] = raw.get("completion_tokens") or 0
+    if not usage["cached_tokens"]:
+        usage["cached_tokens"] = (
+            raw.get("prompt_cache_hit_tokens")
+            or (raw.get("prompt_tokens_details") or {}).get("cached_tokens")
+            or 0
+        )
+    return usage
+
+
+def get_node_name(metadata: Optional[dict[str, Any]]) -> str:
+    """Return the top-level graph node a run belongs to.
+
+    Agents run as subgraphs, whose `langgraph_node` is the inner node, e.g.
+    `agent` or `tools`, while `checkpoint_ns` starts with the outer node.
+    """
+    metadata = metadata or {}
+    checkpoint_ns = metadata.get("checkpoint_ns") or ""
+    return checkpoint_ns.split(":")[0] or metadata.get("langgraph_node", "")
+
+
+def _elapsed_ms(start: float, end: Optional[float] = None) -> float:
+    return round(((end or time.perf_counter()) - start) * 1000, 1)
+
+
+class PromptCacheCallbackHandler(BaseCallbackHandler):
+    """Records prompt and cached prompt tokens of every LLM call per graph node."""
+
+    # Run in the event loop instead of a worker thread, the handler is cheap
+    run_inline = True
+
+    def __init__(self):
+        self._nodes: dict[UUID, str] = {}
+        self.usage: dict[str, dict[str, int]] = {}
+
+    def on_chat_model_start(
+        self,
+        serialized: dict[str, Any],
+        messages: list,
+        *,
+        run_id: UUID,
+        metadata: dict[str, Any] | None = None,
+        **kwargs: Any,
+    ) -> None:
+        self._nodes[run_id] = get_node_name(metadata)
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        node = self._nodes.pop(run_id, "")
+        usage = get_token_usage(response)
+        stats = self.usage.setdefault(
+            node, {"calls": 0, "prompt_tokens": 0, "cached_tokens": 0}
+        )
+        stats["calls"] += 1
+        stats["prompt_tokens"] += usage["prompt_tokens"]
+        stats["cached_tokens"] += usage["cached_tokens"]
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any):
+        self._nodes.pop(run_id, None)
+
+    def hit_rates(self) -> dict[str, float]:
+        """Return the share of prompt tokens served from the provider cache."""
+        return {
+            node: (
+                stats["cached_tokens"] / stats["prompt_tokens"]
+                if stats["prompt_tokens"]
+                else 0.0
+            )
+            for node, stats in self.usage.items()
+        }
+
+
+def _empty_stats() -> dict[str, Any]:
+    return {
+        "llm_calls": 0,
+        "prompt_tokens": 0,
+        "completion_tokens": 0,
+        "reasoning_tokens": 0,
+        "cached_tokens": 0,
+        "llm_latency_ms": 0.0,
+        "tool_calls": 0,
+        "tool_latency_ms": 0.0,
+    }
+
+
+class UsageCallbackHandler(PromptCacheCallbackHandler):
+    """Records tokens and timings of every LLM call and tool run per graph node.
+
+    Completed LLM calls are kept until they are taken with `pop_call`, so that
+    they can be reported as they finish, and `summary` aggregates all of them
+    per node.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._llm_runs: dict[UUID, dict[str, Any]] = {}
+        self._tool_runs: dict[UUID, tuple[str, float]] = {}
+        self._calls: dict[str, dict[str, Any]] = {}
+        self.nodes: dict[str, dict[str, Any]] = {}
+
+    def _node_stats(self, node: str) -> dict[str, Any]:
+        return self.nodes.setdefault(node, _empty_stats())
+
+    def on_chat_model_start(
+        self,
+        serialized: dict[str, Any],
+        messages: list,
+        *,
+        run_id: UUID,
+        metadata: dict[str, Any] | None = None,
+        **kwargs: Any,
+    ) -> None:
+        super().on_chat_model_start(
+            serialized, messages, run_id=run_id, metadata=metadata, **kwargs
+        )
+        self._llm_runs[run_id] = {
+            "node": get_node_name(metadata),
+            "model": (metadata or {}).get("ls_model_name", ""),
+            "start": time.perf_counter(),
+            "first_token": None,
+        }
+
+    def on_llm_new_token(self, token: str, *, run_id: UUID, **kwargs: Any) -> None:
+        run = self._llm_runs.get(run_id)
+        if run is not None and run["first_token"] is None:
+            run["first_token"] = time.perf_counter()
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        super().on_llm_end(response, run_id=run_id, **kwargs)
+        run = self._llm_runs.pop(run_id, None)
+        if run is None:
+            return
+        end = time.perf_counter()
+        usage = get_token_usage(response)
+        call = {
+            "agent_name": run["node"],
+            "model": run["model"],
+            **usage,
+            # Responses that were not streamed arrive in one piece
+            "ttft_ms": _elapsed_ms(run["start"], run["first_token"] or end),
+            "latency_ms": _elapsed_ms(run["start"], end),
+        }
+        self._calls[str(run_id)] = call
+
+        stats = self._node_stats(run["node"])
+        stats["llm_calls"] += 1
+        for key in usage:
+            stats[key] += usage[key]
+        stats["llm_latency_ms"] = round(stats["llm_latency_ms"] + call["latency_ms"], 1)
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any):
+        super().on_llm_error(error, run_id=run_id, **kwargs)
+        self._llm_runs.pop(run_id, None)
+
+    def on_tool_start(
+        self,
+        serialized: dict[str, Any],
+        input_str: str,
+        *,
+        run_id: UUID,
+        metadata: dict[str, Any] | None = None,
+        **kwargs: Any,
+    ) -> None:
+        self._tool_runs[run_id] = (get_node_name(metadata), time.perf_counter())
+
+    def on_tool_end(self, output: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        self._finish_tool(run_id)
+
+    def on_tool_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any):
+        self._finish_tool(run_id)
+
+    def _finish_tool(self, run_id: UUID) -> None:
+        run = self._tool_runs.pop(run_id, None)
+        if run is None:
+            return
+        node, start = run
+        stats = self._node_stats(node)
+        stats["tool_calls"] += 1
+        stats["tool_latency_ms"] = round(
+            stats["tool_latency_ms"] + _elapsed_ms(start), 1
+        )
+
+    def pop_call(self, run_id: UUID | str) -> Optional[dict[str, Any]]:
+        """Take the record of a completed LLM call."""
+        return self._calls.pop(str(run_id), None)
+
+    def summary(self) -> dict[str, Any]:
+        """Return the usage per node and the total of the workflow."""
+        total = _empty_stats()
+        for stats in self.nodes.values():
+            for key, value in stats.items():
+                total[key] += value
+        total["llm_latency_ms"] = round(total["llm_latency_ms"], 1)
+        total["tool_latency_ms"] = round(total["tool_latency_ms"], 1)
+        return {"nodes": self.nodes, "total": total}
@@ -6,16 +6,29 @@ import json
 import logging
 from typing import Dict, List, Any, Optional, Union
 
-from fastapi import FastAPI, HTTPException, Request
+from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel, Field
 from sse_starlette.sse import EventSourceResponse
+import anyio
 import asyncio
 from typing import AsyncGenerator, Dict, List, Any
 
-from src.graph import build_graph
-from src.config import TEAM_MEMBERS
-from src.service.workflow_service import run_agent_workflow
+from src.config import TEAM_MEMBERS, MAX_CONCURRENT_WORKFLOWS, MAX_QUEUED_WORKFLOWS
+from src.service.admission import (
+    Admission,
+    Priority,
+    QueueFullError,
+    WorkflowScheduler,
+)
+from src.service.event_stream import coalesce_message_deltas
+from src.tools.crawl import crawler
+from src.service.workflow_service import (
+    cancel_workflow,
+    list_workflow_checkpoints,
+    resume_agent_workflow,
+    run_agent_workflow,
+)
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -36,8 +49,8 @@ app.add_middleware(
     allow_headers=["*"],  # Allows all headers
 )
 
-# Create the graph
-graph = build_graph()
+# Limit the number of workflows competing for the LLM rate limits
+workflow_scheduler = WorkflowScheduler(MAX_CONCURRENT_WORKFLOWS, MAX_QUEUED_WORKFLOWS)
 
 
 class ContentItem(BaseModel):
@@ -67,16 +80,118 @@ class ChatRequest(BaseModel):
     search_before_planning: Optional[bool] = Field(
         False, description="Whether to search before planning"
     )
+    parallel_execution: Optional[bool] = Field(
+        False, description="Whether to run independent plan steps in parallel"
+    )
+    follow_plan: Optional[bool] = Field(
+        False, description="Whether to follow the plan without supervisor LLM calls"
+    )
+    thread_id: Optional[str] = Field(
+        None, description="The thread to checkpoint the workflow under, for resuming"
+    )
+    tenant_id: Optional[str] = Field(
+        None, description="The tenant, queued workflows of tenants take turns"
+    )
+    priority: Priority = Field(
+        "normal", description="The priority class of the workflow when queued"
+    )
+    coalesce_window_ms: Optional[int] = Field(
+        None,
+        ge=0,
+        description="Merge the message deltas of the stream within this many milliseconds",
+    )
+
+
+class ResumeRequest(BaseModel):
+    checkpoint_id: Optional[str] = Field(
+        None, description="The checkpoint to retry from, defaults to the latest one"
+    )
+    debug: Optional[bool] = Field(False, description="Whether to enable debug logging")
+    tenant_id: Optional[str] = Field(
+        None, description="The tenant, queued workflows of tenants take turns"
+    )
+    priority: Priority = Field(
+        "normal", description="The priority class of the workflow when queued"
+    )
+    coalesce_window_ms: Optional[int] = Field(
+        None,
+        ge=0,
+        description="Merge the message deltas of the stream within this many milliseconds",
+    )
+
+
+def admit_workflow(tenant_id: Optional[str], priority: Priority) -> Admission:
+    """Reserve a slot for a workflow, or reject it quickly when the queue is full."""
+    try:
+        return workflow_scheduler.submit(tenant_id, priority)
+    except QueueFullError as e:
+        logger.warning(str(e))
+        raise HTTPException(status_code=429, detail=str(e))
+
+
+async def stream_workflow_events(
+    admission: Admission,
+    events: AsyncGenerator[dict, None],
+    coalesce_window_ms: Optional[int] = None,
+) -> EventSourceResponse:
+    """Stream workflow events to the client as server-sent events.
+
+    The first event is awaited before responding, so that invalid requests,
+    e.g. an unknown thread, fail with an HTTP error instead of a broken stream.
+    With `coalesce_window_ms`, consecutive message deltas are merged to send
+    fewer events. The `X-Workflow-Id` header has the id to cancel the workflow
+    with, from the start.
+    """
+    events = admission.stream(events)
+    if coalesce_window_ms:
+        events = coalesce_message_deltas(events, coalesce_window_ms / 1000)
+    try:
+        first_event = await anext(events)
+    except StopAsyncIteration:
+        first_event = None
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    async def event_generator():
+        try:
+            if first_event is None:
+                return
+            yield {
+                "event": first_event["event"],
+                "data": json.dumps(first_event["data"], ensure_ascii=False),
+            }
+            # A client disconnect cancels this generator, see EventSourceResponse
+            async for event in events:
+                yield {
+                    "event": event["event"],
+                    "data": json.dumps(event["data"], ensure_ascii=False),
+                }
+        except asyncio.CancelledError:
+            logger.info("Client disconnected, stopping workflow")
+            raise
+        finally:
+            # Stop the workflow and free its scheduler slot right away, shielded
+            # as the cancellation of a disconnect would interrupt the cleanup
+            with anyio.CancelScope(shield=True):
+                await events.aclose()
+
+    return EventSourceResponse(
+        event_generator(),
+        headers={"X-Workflow-Id": admission.workflow_id},
+        media_type="text/event-stream",
+        sep="\n",
+    )
 
 
 @app.post("/api/chat/stream")
-async def chat_endpoint(request: ChatRequest, req: Request):
+async def chat_endpoint(request: ChatRequest):
     """
     Chat endpoint for LangGraph invoke.
 
     Args:
         request: The chat request
-        req: The FastAPI request object for connection state checking
 
     Returns:
         The streamed response
@@ -105,31 +220,104 @@ async def chat_endpoint(request: ChatRequest, req: Request):
 
             messages.append(message_dict)
 
-        async def event_generator():
-            try:
-                async for event in run_agent_workflow(
-                    messages,
-                    request.debug,
-                    request.deep_thinking_mode,
-                    request.search_before_planning,
-                ):
-                    # Check if client is still connected
-                    if await req.is_disconnected():
-                        logger.info("Client disconnected, stopping workflow")
-                        break
-                    yield {
-                        "event": event["event"],
-                        "data": json.dumps(event["data"], ensure_ascii=False),
-                    }
-            except asyncio.CancelledError:
-                logger.info("Stream processing cancelled")
-                raise
-
-        return EventSourceResponse(
-            event_generator(),
-            media_type="text/event-stream",
-            sep="\n",
+        admission = admit_workflow(request.tenant_id, request.priority)
+        return await stream_workflow_events(
+            admission,
+            run_agent_workflow(
+                messages,
+                request.debug,
+                request.deep_thinking_mode,
+                request.search_before_planning,
+                request.parallel_execution,
+                request.follow_plan,
+                request.thread_id,
+                admission.workflow_id,
+            ),
+            request.coalesce_window_ms,
         )
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error in chat endpoint: {e}")
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/api/chat/{thread_id}/resume")
+async def resume_endpoint(thread_id: str, request: ResumeRequest):
+    """
+    Resume a checkpointed workflow from its last successful node.
+
+    Args:
+        thread_id: The thread the workflow was checkpointed under
+        request: The resume request
+
+    Returns:
+        The streamed response
+    """
+    try:
+        admission = admit_workflow(request.tenant_id, request.priority)
+        return await stream_workflow_events(
+            admission,
+            resume_agent_workflow(
+                thread_id, request.checkpoint_id, request.debug, admission.workflow_id
+            ),
+            request.coalesce_window_ms,
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error in resume endpoint: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/api/chat/{workflow_id}/cancel")
+async def cancel_endpoint(workflow_id: str):
+    """
+    Cancel a queued or running workflow, its stream ends with a
+    `workflow_cancelled` event.
+
+    Args:
+        workflow_id: The workflow id sent in the `X-Workflow-Id` header
+
+    Returns:
+        The cancelled workflow id
+    """
+    if not (workflow_scheduler.cancel(workflow_id) or cancel_workflow(workflow_id)):
+        raise HTTPException(
+            status_code=404, detail=f"No queued or running workflow {workflow_id}"
+        )
+    return {"workflow_id": workflow_id, "cancelled": True}
+
+
+@app.get("/api/chat/{thread_id}/checkpoints")
+async def checkpoints_endpoint(thread_id: str):
+    """
+    List the checkpoints of a workflow, to pick one to retry from.
+
+    Args:
+        thread_id: The thread the workflow was checkpointed under
+
+    Returns:
+        The checkpoints from the newest to the oldest
+    """
+    try:
+        checkpoints = await list_workflow_checkpoints(thread_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not checkpoints:
+        raise HTTPException(status_code=404, detail=f"Unknown thread {thread_id}")
+    return checkpoints
+
+
+@app.get("/api/cache/stats")
+async def cache_stats_endpoint():
+    """
+    Hit, miss, expiry and eviction counters of the crawl cache of this process,
+    to tune its TTL and size.
+
+    Returns:
+        The crawl cache stats, null when the crawl cache is disabled
+    """
+    if crawler.cache is None:
+        return {"crawl": None}
+    return {"crawl": await asyncio.to_thread(crawler.cache.stats)}
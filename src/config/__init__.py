@@ -13,6 +13,18 @@ from .env import (
     VL_API_KEY,
     # Other configurations
     CHROME_INSTANCE_PATH,
+    CRAWLER_CACHE_PATH,
+    CRAWLER_EXTRACTOR,
+    TAVILY_CACHE_PATH,
+    PROMPT_HOT_RELOAD,
+    STABLE_PROMPT_PREFIX,
+    LLM_CACHE_BACKEND,
+    LLM_CACHE_PATH,
+    CHECKPOINT_PATH,
+    CHECKPOINT_MAX_THREADS,
+    CHECKPOINT_MIN_AGE_HOURS,
+    MAX_CONCURRENT_WORKFLOWS,
+    MAX_QUEUED_WORKFLOWS,
 )
 from .tools import TAVILY_MAX_RESULTS
 
@@ -36,4 +48,16 @@ __all__ = [
     "TEAM_MEMBERS",
     "TAVILY_MAX_RESULTS",
     "CHROME_INSTANCE_PATH",
+    "CRAWLER_CACHE_PATH",
+    "CRAWLER_EXTRACTOR",
+    "TAVILY_CACHE_PATH",
+    "PROMPT_HOT_RELOAD",
+    "STABLE_PROMPT_PREFIX",
+    "LLM_CACHE_BACKEND",
+    "LLM_CACHE_PATH",
+    "CHECKPOINT_PATH",
+    "CHECKPOINT_MAX_THREADS",
+    "CHECKPOINT_MIN_AGE_HOURS",
+    "MAX_CONCURRENT_WORKFLOWS",
+    "MAX_QUEUED_WORKFLOWS",
 ]
@@ -1,4 +1,4 @@
-from typing import Literal
+from typing import Literal, Optional
 
 # Define available LLM types
 LLMType = Literal["basic", "reasoning", "vision"]
@@ -13,3 +13,38 @@ AGENT_LLM_MAP: dict[str, LLMType] = {
     "browser": "vision",  # 浏览器操作使用vision llm
     "reporter": "basic",  # 编写报告使用basic llm
 }
+
+# Define which agents may serve identical LLM requests from the response cache.
+# Only takes effect when LLM_CACHE_BACKEND is set. The planner streams its
+# response, which bypasses the cache.
+AGENT_LLM_CACHE: dict[str, bool] = {
+    "coordinator": True,
+    "planner": False,
+    "supervisor": True,
+    "researcher": False,
+    "coder": False,
+    "browser": False,
+    "reporter": False,
+}
+
+# Maximum number of cached LLM responses
+LLM_CACHE_MAX_ENTRIES = 4096
+
+# Define the token budget of the messages sent by each agent, older agent
+# responses are compacted beyond it. The reporter always sees the full
+# transcript.
+AGENT_CONTEXT_BUDGET: dict[str, Optional[int]] = {
+    "coordinator": 8000,
+    "planner": 16000,
+    "supervisor": 8000,
+    "researcher": 16000,
+    "coder": 16000,
+    "browser": 8000,
+    "reporter": None,
+}
+
+# Number of most recent messages that are never compacted
+CONTEXT_KEEP_RECENT_MESSAGES = 3
+
+# Maximum number of tokens kept from a compacted agent response
+CONTEXT_EXCERPT_TOKENS = 300
@@ -21,3 +21,39 @@ VL_API_KEY = os.getenv("VL_API_KEY")
 
 # Chrome Instance configuration
 CHROME_INSTANCE_PATH = os.getenv("CHROME_INSTANCE_PATH")
+
+# Crawl cache configuration (SQLite file shared by worker processes)
+CRAWLER_CACHE_PATH = os.getenv("CRAWLER_CACHE_PATH")
+
+# Extraction of articles from crawled pages: "worker" runs Readability.js in a
+# pool of long-lived Node processes, "node" in a new Node process for every
+# page and "python" uses the pure Python extractor of readabilipy. Without Node or the
+# Readability.js modules, the pure Python extractor is used
+CRAWLER_EXTRACTOR = os.getenv("CRAWLER_EXTRACTOR", "worker")
+
+# Search cache configuration (optional SQLite file shared by worker processes)
+TAVILY_CACHE_PATH = os.getenv("TAVILY_CACHE_PATH")
+
+# Reload prompt files when they change on disk, useful while editing prompts
+PROMPT_HOT_RELOAD = os.getenv("PROMPT_HOT_RELOAD", "False").lower() == "true"
+
+# Keep system prompts byte-stable across calls to benefit from provider-side
+# prompt caching, volatile values such as the current time are sent last
+STABLE_PROMPT_PREFIX = os.getenv("STABLE_PROMPT_PREFIX", "False").lower() == "true"
+
+# LLM response cache backend for deterministic agents: "memory" or "sqlite"
+LLM_CACHE_BACKEND = os.getenv("LLM_CACHE_BACKEND")
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH")
+
+# Checkpoint workflows in this SQLite file to resume them after a failure
+CHECKPOINT_PATH = os.getenv("CHECKPOINT_PATH")
+# Keep the checkpoints of this many most recently updated threads, the older
+# threads are deleted when the server starts and every few workflows. Threads
+# updated in the last CHECKPOINT_MIN_AGE_HOURS are kept anyway, to be resumed
+CHECKPOINT_MAX_THREADS = int(os.getenv("CHECKPOINT_MAX_THREADS", "1000"))
+CHECKPOINT_MIN_AGE_HOURS = float(os.getenv("CHECKPOINT_MIN_AGE_HOURS", "24"))
+
+# Admission control of the chat API: workflows over the concurrency limit wait
+# in a queue, requests beyond the queue size are rejected with 429
+MAX_CONCURRENT_WORKFLOWS = int(os.getenv("MAX_CONCURRENT_WORKFLOWS", "10"))
+MAX_QUEUED_WORKFLOWS = int(os.getenv("MAX_QUEUED_WORKFLOWS", "100"))
@@ -1,2 +1,51 @@
 # Tool configuration
 TAVILY_MAX_RESULTS = 5
+TAVILY_CACHE_TTL = 60 * 60  # seconds
+TAVILY_CACHE_MAX_ENTRIES = 1024
+TAVILY_INFLIGHT_TIMEOUT = 30.0  # seconds of waiting for the same search in flight
+
+# Crawler configuration
+CRAWLER_TIMEOUT = 30.0  # seconds
+CRAWLER_MAX_CONNECTIONS = 20
+CRAWLER_MAX_CONNECTIONS_PER_HOST = 4
+CRAWLER_HTTP2 = False
+CRAWLER_EXTRACT_TIMEOUT = 30.0  # seconds of Readability.js work per page
+CRAWLER_EXTRACT_WORKERS = 4  # Readability.js worker processes, i.e. parallel pages
+CRAWLER_MAX_BYTES = 5 * 1024 * 1024  # pages are cut after this many bytes
+CRAWLER_TEXT_BLOCK_CHARS = 16_000  # characters per text block of a crawl message
+
+# Crawl cache configuration, enabled by setting CRAWLER_CACHE_PATH
+CRAWLER_CACHE_TTL = 24 * 60 * 60  # seconds
+CRAWLER_CACHE_MAX_BYTES = 512 * 1024 * 1024
+
+# Passage selection of crawled pages, pages longer than CRAWL_MAX_TOKENS are
+# cut to the CRAWL_TOP_K passages most relevant to the research step
+CRAWL_MAX_TOKENS = 2000
+CRAWL_TOP_K = 10
+CRAWL_PASSAGE_TOKENS = 200  # tokens per passage
+
+# Python REPL worker pool configuration
+REPL_POOL_SIZE = 2
+REPL_TIMEOUT = 120.0  # seconds of wall time per execution
+REPL_CPU_LIMIT = 60  # seconds of CPU time per execution
+REPL_MEMORY_LIMIT = 2 * 1024 * 1024 * 1024  # bytes of address space per worker
+REPL_MAX_TASKS_PER_WORKER = 100
+REPL_SESSION_TTL = 30 * 60  # seconds
+REPL_OUTPUT_HEAD_CHARS = 10_000  # kept from the start of the output
+REPL_OUTPUT_TAIL_CHARS = 10_000  # kept from the end of the output
+REPL_PRELOAD_MODULES = ["numpy", "pandas", "yfinance"]
+
+# Bash tool configuration
+BASH_TIMEOUT = 120.0  # seconds
+BASH_OUTPUT_DRAIN_TIMEOUT = 0.5  # seconds reading the output after the command exits
+BASH_OUTPUT_HEAD_CHARS = 10_000  # kept from the start of each output
+BASH_OUTPUT_TAIL_CHARS = 10_000  # kept from the end of each output
+BASH_PROGRESS_INTERVAL = 0.2  # seconds between two progress events
+BASH_PROGRESS_MAX_CHARS = 200_000  # output streamed to the client per command
+
+# Browser pool configuration
+BROWSER_POOL_MAX_SIZE = 2
+BROWSER_POOL_MIN_IDLE = 1  # browsers launched ahead and kept warm
+BROWSER_POOL_IDLE_TIMEOUT = 5 * 60  # seconds
+BROWSER_POOL_LEASE_TIMEOUT = 2 * 60  # seconds of waiting for a free browser
+BROWSER_POOL_MAX_LEASES = 50  # tasks after which a browser is replaced
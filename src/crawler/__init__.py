@@ -1,7 +1,11 @@
 from .article import Article
+from .cache import CrawlCache
 from .crawler import Crawler
+from .passages import select_passages
 
 __all__ = [
     "Article",
+    "CrawlCache",
     "Crawler",
+    "select_passages",
 ]
@@ -1,7 +1,66 @@
 import re
+from collections.abc import Iterable, Iterator
+from typing import Optional
 from urllib.parse import urljoin
 
-from markdownify import markdownify as md
+from bs4 import BeautifulSoup, Comment, Declaration, Doctype, NavigableString, Tag
+from markdownify import (
+    MarkdownConverter,
+    should_remove_whitespace_inside,
+    should_remove_whitespace_outside,
+)
+
+from src.config.tools import CRAWLER_TEXT_BLOCK_CHARS
+
+from .passages import select_passages
+
+IMAGE_PATTERN = re.compile(r"!\[.*?\]\((.*?)\)")
+
+# Elements that only wrap the blocks of an article, as Readability.js does
+WRAPPERS = {"[document]", "html", "body", "div", "article", "section", "main"}
+
+# Wrappers whose markdown markdownify strips of all surrounding whitespace,
+# the others only lose their surrounding newlines
+_STRIPPED_WRAPPERS = {"div", "article", "section"}
+
+_NEWLINES = re.compile(r"^(\n*)((?:.*[^\n])?)(\n*)$", flags=re.DOTALL)
+
+
+def _is_ignored(node, parent: Tag) -> bool:
+    """Whether markdownify skips a child node, see `MarkdownConverter.process_tag`."""
+    if isinstance(node, Tag):
+        return False
+    if isinstance(node, (Comment, Declaration, Doctype)):
+        return True
+    if node.strip():
+        return False
+    # Whitespace at the edges of a block element or next to a block element
+    if should_remove_whitespace_inside(parent) and (
+        not node.previous_sibling or not node.next_sibling
+    ):
+        return True
+    return bool(
+        should_remove_whitespace_outside(node.previous_sibling)
+        or should_remove_whitespace_outside(node.next_sibling)
+    )
+
+
+def _strip_chunks(chunks: Iterable[str], chars: Optional[str]) -> Iterator[str]:
+    """Strip the text made of the chunks, holding back trailing whitespace."""
+    last: Optional[str] = None
+    blank = ""
+    for chunk in chunks:
+        if last is None:
+            chunk = chunk.lstrip(chars)
+        if not chunk.strip(chars):
+            if last is not None:
+                blank += chunk
+            continue
+        if last is not None:
+            yield last + blank
+        last, blank = chunk, ""
+    if last is not None:
+        yield last.rstrip(chars)
 
 
 class Article:
@@ -11,24 +70,98 @@ class Article:
         self.title = title
         self.html_content = html_content
 
-    def to_markdown(self, including_title: bool = True) -> str:
-        markdown = ""
+    def iter_markdown(self, including_title: bool = True) -> Iterator[str]:
+        """Convert the article to markdown one top level block at a time.
+
+        Joined, the chunks are the markdown markdownify makes of the whole
+        article, but only one block is converted and held at a time.
+        """
         if including_title:
-            markdown += f"# {self.title}\n\n"
-        markdown += md(self.html_content)
-        return markdown
+            yield f"# {self.title}\n\n"
+
+        # Descend into the elements wrapping the blocks of the article
+        container = BeautifulSoup(self.html_content or "", "html.parser")
+        parent_tags = set()
+        while True:
+            children = [
+                child
+                for child in container.children
+                if not _is_ignored(child, container)
+                and not (isinstance(child, NavigableString) and not child.strip())
+            ]
+            if not (
+                len(children) == 1
+                and isinstance(children[0], Tag)
+                and container.name in WRAPPERS
+                and children[0].name in WRAPPERS
+            ):
+                break
+            parent_tags.add(container.name)
+            container = children[0]
+        parent_tags.add(container.name)
+
+        strip_chars = None if parent_tags & _STRIPPED_WRAPPERS else "\n"
+        yield from _strip_chunks(self._iter_blocks(container, parent_tags), strip_chars)
+
+    @staticmethod
+    def _iter_blocks(container: Tag, parent_tags: set) -> Iterator[str]:
+        # Collapses the newlines between blocks like `MarkdownConverter.process_tag`
+        converter = MarkdownConverter()
+        pending_newlines = ""
+        for child in list(container.children):
+            if _is_ignored(child, container):
+                continue
+            markdown = converter.process_element(child, parent_tags=parent_tags)
+            if not markdown:
+                continue
+            leading, text, trailing = _NEWLINES.match(markdown).groups()
+            if pending_newlines and leading:
+                leading = "\n" * min(2, max(len(pending_newlines), len(leading)))
+                pending_newlines = ""
+            yield pending_newlines + leading + text
+            pending_newlines = trailing
+        yield pending_newlines
+
+    def to_markdown(self, including_title: bool = True) -> str:
+        return "".join(self.iter_markdown(including_title))
+
+    def iter_message(self, query: Optional[str] = None) -> Iterator[dict]:
+        """Convert the article to message content blocks, one at a time.
+
+        The text is split into blocks of about `CRAWLER_TEXT_BLOCK_CHARS`
+        characters, on markdown block boundaries, and around every image,
+        which is sent as an image url. With a query, long articles are cut to
+        their passages most relevant to it, see `select_passages`.
+        """
+        chunks: Iterable[str] = self.iter_markdown()
+        if query:
+            chunks = [select_passages(chunks, query)]
 
-    def to_message(self) -> list[dict]:
-        image_pattern = r"!\[.*?\]\((.*?)\)"
+        text: list[str] = []
+        size = 0
 
-        content: list[dict[str, str]] = []
-        parts = re.split(image_pattern, self.to_markdown())
+        def text_block() -> Iterator[dict]:
+            nonlocal size
+            block = "".join(text).strip()
+            text.clear()
+            size = 0
+            if block:
+                yield {"type": "text", "text": block}
 
-        for i, part in enumerate(parts):
-            if i % 2 == 1:
-                image_url = urljoin(self.url, part.strip())
-                content.append({"type": "image_url", "image_url": {"url": image_url}})
-            else:
-                content.append({"type": "text", "text": part.strip()})
+        for chunk in chunks:
+            parts = IMAGE_PATTERN.split(chunk)
+            for i, part in enumerate(parts):
+                if i % 2 == 1:
+                    yield from text_block()
+                    image_url = urljoin(self.url, part.strip())
+                    yield {"type": "image_url", "image_url": {"url": image_url}}
+                else:
+                    text.append(part)
+                    size += len(part)
+            if size >= CRAWLER_TEXT_BLOCK_CHARS:
+                yield from text_block()
+        yield from text_block()
 
-        return content
+    def to_message(self, query: Optional[str] = None) -> list[dict]:
+        """Convert the article to message content, with the images as image urls."""
+        return list(self.iter_message(query))
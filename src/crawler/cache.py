@@ -0,0 +1,192 @@
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from contextlib import closing
+from typing import Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from src.config.tools import CRAWLER_CACHE_MAX_BYTES, CRAWLER_CACHE_TTL
+
+from .article import Article
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def normalize_url(url: str) -> str:
+    """Normalize a url so that equivalent urls share one cache entry.
+
+    The scheme and host are lowercased, default ports and fragments are dropped,
+    query parameters are sorted and a trailing slash is removed from the path.
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if parts.port and parts.port != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+    path = parts.path.rstrip("/") or "/"
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((scheme, host, path, query, ""))
+
+
+def hash_content(html: str) -> str:
+    return hashlib.sha256(html.encode("utf-8")).hexdigest()
+
+
+class CrawlCache:
+    """SQLite backed cache of crawled pages and their extracted articles.
+
+    Entries are keyed by normalized url and expire after `ttl` seconds. When
+    the stored pages exceed `max_bytes`, the least recently used entries are
+    evicted. The database runs in WAL mode so that several worker processes
+    can share the same file.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        ttl: float = CRAWLER_CACHE_TTL,
+        max_bytes: int = CRAWLER_CACHE_MAX_BYTES,
+    ):
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "expired": 0, "evictions": 0}
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with closing(self._connect()) as conn, conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS pages (
+                    url TEXT PRIMARY KEY,
+                    content_hash TEXT NOT NULL,
+                    html TEXT NOT NULL,
+                    title TEXT,
+                    article_html TEXT,
+                    size INTEGER NOT NULL,
+                    fetched_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                )
+                """
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS pages_content_hash ON pages (content_hash)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS pages_accessed_at ON pages (accessed_at)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        # A connection per operation keeps the cache safe to use across threads
+        return sqlite3.connect(self.path, timeout=30)
+
+    def _count(self, name: str, value: int = 1) -> None:
+        with self._lock:
+            self._stats[name] += value
+
+    def get(self, url: str) -> Optional[Article]:
+        """Return the cached article for the url, or None on miss or expiry."""
+        key = normalize_url(url)
+        now = time.time()
+        with closing(self._connect()) as conn, conn:
+            row = conn.execute(
+                "SELECT title, article_html, fetched_at FROM pages WHERE url = ?",
+                (key,),
+            ).fetchone()
+            if row is None:
+                self._count("misses")
+                return None
+            title, article_html, fetched_at = row
+            if now - fetched_at > self.ttl:
+                conn.execute("DELETE FROM pages WHERE url = ?", (key,))
+                self._count("expired")
+                self._count("misses")
+                return None
+            conn.execute("UPDATE pages SET accessed_at = ? WHERE url = ?", (now, key))
+        self._count("hits")
+        article = Article(title=title, html_content=article_html)
+        article.url = url
+        return article
+
+    def get_by_content(self, html: str) -> Optional[Article]:
+        """Return a previously extracted article for identical html, if any.
+
+        Expired pages are skipped, like in `get`.
+        """
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                """
+                SELECT title, article_html FROM pages
+                WHERE content_hash = ? AND fetched_at >= ? LIMIT 1
+                """,
+                (hash_content(html), time.time() - self.ttl),
+            ).fetchone()
+        if row is None:
+            return None
+        return Article(title=row[0], html_content=row[1])
+
+    def put(self, url: str, html: str, article: Article) -> None:
+        """Store the raw html and the extracted article for the url."""
+        now = time.time()
+        size = len(html.encode("utf-8")) + len(
+            (article.html_content or "").encode("utf-8")
+        )
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                """
+                INSERT OR REPLACE INTO pages
+                    (url, content_hash, html, title, article_html, size, fetched_at, accessed_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    normalize_url(url),
+                    hash_content(html),
+                    html,
+                    article.title,
+                    article.html_content,
+                    size,
+                    now,
+                    now,
+                ),
+            )
+            self._evict(conn)
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM pages").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        evicted = 0
+        for url, size in conn.execute(
+            "SELECT url, size FROM pages ORDER BY accessed_at ASC"
+        ).fetchall():
+            if total <= self.max_bytes:
+                break
+            conn.execute("DELETE FROM pages WHERE url = ?", (url,))
+            total -= size
+            evicted += 1
+        self._count("evictions", evicted)
+        logger.debug(f"Evicted {evicted} pages from crawl cache")
+
+    def clear(self) -> None:
+        with closing(self._connect()) as conn, conn:
+            conn.execute("DELETE FROM pages")
+
+    def stats(self) -> dict:
+        """Return hit/miss counters of this process and the size of the store."""
+        with closing(self._connect()) as conn:
+            entries, total = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM pages"
+            ).fetchone()
+        with self._lock:
+            stats = dict(self._stats)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        stats["entries"] = entries
+        stats["bytes"] = total
+        return stats
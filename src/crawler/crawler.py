@@ -1,11 +1,25 @@
+import asyncio
 import sys
+from typing import Optional
 
 from .article import Article
+from .cache import CrawlCache
 from .jina_client import JinaClient
 from .readability_extractor import ReadabilityExtractor
 
 
 class Crawler:
+    def __init__(
+        self,
+        jina_client: Optional[JinaClient] = None,
+        cache: Optional[CrawlCache] = None,
+        extractor: Optional[ReadabilityExtractor] = None,
+    ):
+        # Reuse one client so connections are pooled across crawls
+        self.jina_client = jina_client or JinaClient()
+        self.cache = cache
+        self.extractor = extractor or ReadabilityExtractor()
+
     def crawl(self, url: str) -> Article:
         # To help LLMs better understand content, we extract clean
         # articles from HTML, convert them to markdown, and split
@@ -17,11 +31,32 @@ class Crawler:
         #
         # Instead of using Jina's own markdown converter, we'll use
         # our own solution to get better readability results.
-        jina_client = JinaClient()
-        html = jina_client.crawl(url, return_format="html")
-        extractor = ReadabilityExtractor()
-        article = extractor.extract_article(html)
+        if self.cache is not None:
+            article = self.cache.get(url)
+            if article is not None:
+                return article
+        html = self.jina_client.crawl(url, return_format="html")
+        return self._extract(url, html)
+
+    async def acrawl(self, url: str) -> Article:
+        if self.cache is not None:
+            article = await asyncio.to_thread(self.cache.get, url)
+            if article is not None:
+                return article
+        html = await self.jina_client.acrawl(url, return_format="html")
+        # Readability extraction is CPU bound, keep it off the event loop
+        return await asyncio.to_thread(self._extract, url, html)
+
+    def _extract(self, url: str, html: str) -> Article:
+        article = None
+        if self.cache is not None:
+            # Identical pages under another url skip readability extraction
+            article = self.cache.get_by_content(html)
+        if article is None:
+            article = self.extractor.extract_article(html)
         article.url = url
+        if self.cache is not None:
+            self.cache.put(url, html, article)
         return article
 
 
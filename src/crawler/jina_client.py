@@ -1,13 +1,109 @@
+import asyncio
+import codecs
+import importlib.util
 import logging
 import os
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+from urllib.parse import urlparse
 
-import requests
+import httpx
+
+from src.config.tools import (
+    CRAWLER_HTTP2,
+    CRAWLER_MAX_CONNECTIONS,
+    CRAWLER_MAX_BYTES,
+    CRAWLER_MAX_CONNECTIONS_PER_HOST,
+    CRAWLER_TIMEOUT,
+)
 
 logger = logging.getLogger(__name__)
 
+JINA_READER_URL = "https://r.jina.ai/"
+
+
+class _BodyReader:
+    """Decodes a streamed response body as it arrives, up to `max_bytes`."""
+
+    def __init__(self, response: httpx.Response, url: str, max_bytes: int):
+        self.url = url
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.truncated = False
+        self._decoder = codecs.getincrementaldecoder(response.encoding or "utf-8")(
+            errors="replace"
+        )
+        self._parts: list[str] = []
+
+    def feed(self, chunk: bytes) -> bool:
+        """Add a chunk of the body, returns False once the page is cut."""
+        if self.size + len(chunk) > self.max_bytes:
+            chunk = chunk[: self.max_bytes - self.size]
+            self.truncated = True
+        self.size += len(chunk)
+        self._parts.append(self._decoder.decode(chunk))
+        return not self.truncated
+
+    def text(self) -> str:
+        if self.truncated:
+            logger.warning(
+                f"Page {self.url} is larger than {self.max_bytes} bytes, it was cut"
+            )
+        else:
+            self._parts.append(self._decoder.decode(b"", final=True))
+        return "".join(self._parts)
+
 
 class JinaClient:
-    def crawl(self, url: str, return_format: str = "html") -> str:
+    """Client for the Jina reader API backed by long-lived, pooled HTTP clients.
+
+    Connections are kept alive between crawls. Concurrent async crawls are
+    limited both globally and per crawled host, so a burst of URLs from the
+    same site does not hammer it.
+    """
+
+    def __init__(
+        self,
+        timeout: float = CRAWLER_TIMEOUT,
+        max_connections: int = CRAWLER_MAX_CONNECTIONS,
+        max_connections_per_host: int = CRAWLER_MAX_CONNECTIONS_PER_HOST,
+        http2: bool = CRAWLER_HTTP2,
+        base_url: str = JINA_READER_URL,
+        max_bytes: int = CRAWLER_MAX_BYTES,
+        transport: Optional[httpx.BaseTransport] = None,
+        async_transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        if http2 and importlib.util.find_spec("h2") is None:
+            logger.warning(
+                "HTTP/2 is enabled but the `h2` package is not installed, falling back to HTTP/1.1"
+            )
+            http2 = False
+
+        self.base_url = base_url
+        self.max_bytes = max_bytes
+        self.max_connections = max_connections
+        self.max_connections_per_host = max_connections_per_host
+        self._client_kwargs = {
+            "timeout": httpx.Timeout(timeout),
+            "limits": httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+            ),
+            "http2": http2,
+        }
+        self._transport = transport
+        self._async_transport = async_transport
+        self._client: Optional[httpx.Client] = None
+
+        # Async clients and semaphores are bound to the event loop they run on
+        self._async_client: Optional[httpx.AsyncClient] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._global_semaphore: Optional[asyncio.Semaphore] = None
+        self._host_semaphores: dict[str, asyncio.Semaphore] = {}
+        # Crawls holding or waiting for each host semaphore
+        self._host_users: dict[str, int] = {}
+
+    def _build_request(self, url: str, return_format: str) -> dict:
         headers = {
             "Content-Type": "application/json",
             "X-Return-Format": return_format,
@@ -18,6 +114,96 @@ class JinaClient:
             logger.warning(
                 "Jina API key is not set. Provide your own key to access a higher rate limit. See https://jina.ai/reader for more information."
             )
-        data = {"url": url}
-        response = requests.post("https://r.jina.ai/", headers=headers, json=data)
-        return response.text
+        return {"url": self.base_url, "headers": headers, "json": {"url": url}}
+
+    def _get_client(self) -> httpx.Client:
+        if self._client is None:
+            self._client = httpx.Client(
+                transport=self._transport, **self._client_kwargs
+            )
+        return self._client
+
+    def _get_async_client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        if self._async_client is None or self._loop is not loop:
+            if self._async_client is not None:
+                self._discard_async_client(self._async_client, self._loop)
+            self._async_client = httpx.AsyncClient(
+                transport=self._async_transport, **self._client_kwargs
+            )
+            self._loop = loop
+            self._global_semaphore = asyncio.Semaphore(self.max_connections)
+            self._host_semaphores = {}
+            self._host_users = {}
+        return self._async_client
+
+    @staticmethod
+    def _discard_async_client(
+        client: httpx.AsyncClient, loop: asyncio.AbstractEventLoop
+    ) -> None:
+        """Close the client of a previous event loop, e.g. of an earlier run."""
+        if loop.is_running():
+            # Closed on its own loop, the one its connections belong to
+            asyncio.run_coroutine_threadsafe(client.aclose(), loop)
+        else:
+            # The connections can not be closed without their loop, they are
+            # dropped with the client
+            logger.debug(
+                "Dropping the HTTP client of a stopped event loop with its connections"
+            )
+
+    @asynccontextmanager
+    async def _host_slot(self, url: str) -> AsyncIterator[None]:
+        """Hold one of the connections allowed to the host of `url`."""
+        host = urlparse(url).netloc.lower()
+        if host not in self._host_semaphores:
+            self._host_semaphores[host] = asyncio.Semaphore(
+                self.max_connections_per_host
+            )
+        semaphore = self._host_semaphores[host]
+        self._host_users[host] = self._host_users.get(host, 0) + 1
+        try:
+            async with semaphore:
+                yield
+        finally:
+            # Skipped when the semaphores were replaced for another event loop
+            if self._host_semaphores.get(host) is semaphore:
+                self._host_users[host] -= 1
+                # Hosts are mostly crawled once, forget them once unused
+                if not self._host_users[host]:
+                    del self._host_users[host]
+                    del self._host_semaphores[host]
+
+    def crawl(self, url: str, return_format: str = "html") -> str:
+        # Streamed, so that the download of a page over `max_bytes` stops there
+        request = self._build_request(url, return_format)
+        with self._get_client().stream("POST", **request) as response:
+            response.raise_for_status()
+            body = _BodyReader(response, url, self.max_bytes)
+            for chunk in response.iter_bytes():
+                if not body.feed(chunk):
+                    break
+        return body.text()
+
+    async def acrawl(self, url: str, return_format: str = "html") -> str:
+        client = self._get_async_client()
+        request = self._build_request(url, return_format)
+        async with self._global_semaphore, self._host_slot(url):
+            async with client.stream("POST", **request) as response:
+                response.raise_for_status()
+                body = _BodyReader(response, url, self.max_bytes)
+                async for chunk in response.aiter_bytes():
+                    if not body.feed(chunk):
+                        break
+        return body.text()
+
+    def close(self) -> None:
+        if self._client is not None:
+            self._client.close()
+            self._client = None
+
+    async def aclose(self) -> None:
+        if self._async_client is not None:
+            await self._async_client.aclose()
+            self._async_client = None
+            self._loop = None
@@ -0,0 +1,191 @@
+import re
+from collections import Counter
+from typing import Iterable, Iterator, NamedTuple, Optional, Union
+
+import numpy as np
+
+from src.config.tools import (
+    CRAWL_MAX_TOKENS,
+    CRAWL_PASSAGE_TOKENS,
+    CRAWL_TOP_K,
+)
+from src.prompts.context import estimate_tokens
+
+# Chinese, Japanese and Korean characters are indexed one by one, as their
+# words are not separated by spaces
+_CJK = r"[぀-ヿ㐀-䶿一-鿿가-힯]"
+_TOKEN_PATTERN = re.compile(rf"{_CJK}|(?:(?!{_CJK})[^\W_])+")
+_HEADING_PATTERN = re.compile(r"^#{1,6}\s")
+_BLOCK_SEPARATOR = re.compile(r"\n\s*\n")
+_SENTENCE_END = re.compile(r"(?<=[.!?。！？])\s*")
+
+# BM25 parameters
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+OMITTED = "[...]"
+
+
+class Passage(NamedTuple):
+    # The heading of the section the passage belongs to, if any
+    heading: Optional[str]
+    text: str
+    tokens: int
+
+
+def tokenize(text: str) -> list[str]:
+    """Split a text into lowercase words, and CJK text into characters."""
+    return _TOKEN_PATTERN.findall(text.lower())
+
+
+def _split_block(block: str, max_tokens: int) -> list[str]:
+    """Split a block of text that is too long on lines, then on sentences."""
+    if estimate_tokens(block) <= max_tokens:
+        return [block]
+    for pattern in ("\n", _SENTENCE_END):
+        parts = [part for part in re.split(pattern, block) if part.strip()]
+        if len(parts) > 1:
+            return _merge(
+                [piece for part in parts for piece in _split_block(part, max_tokens)],
+                max_tokens,
+                "\n" if pattern == "\n" else " ",
+            )
+    # A single sentence longer than a passage
+    size = max_tokens * 4
+    return [block[i : i + size] for i in range(0, len(block), size)]
+
+
+def _merge(parts: list[str], max_tokens: int, separator: str) -> list[str]:
+    merged: list[str] = []
+    size = 0
+    for part in parts:
+        tokens = estimate_tokens(part)
+        if merged and size + tokens <= max_tokens:
+            merged[-1] += separator + part
+            size += tokens
+        else:
+            merged.append(part)
+            size = tokens
+    return merged
+
+
+def _iter_blocks(chunks: Iterable[str]) -> Iterator[str]:
+    """Split markdown chunks on blank lines, including those across chunks."""
+    pending = ""
+    for chunk in chunks:
+        *blocks, pending = _BLOCK_SEPARATOR.split(pending + chunk)
+        yield from blocks
+    yield pending
+
+
+def split_passages(
+    markdown: Union[str, Iterable[str]], passage_tokens: int = CRAWL_PASSAGE_TOKENS
+) -> list[Passage]:
+    """Split markdown into passages of about `passage_tokens` tokens.
+
+    The markdown is a string or an iterable of chunks, e.g. from
+    `Article.iter_markdown`. Passages are made of whole paragraphs where
+    possible, and never span two sections, so that each one can be read on
+    its own under its heading.
+    """
+    passages: list[Passage] = []
+    heading: Optional[str] = None
+    section: list[str] = []
+
+    def flush() -> None:
+        for text in _merge(section, passage_tokens, "\n\n"):
+            passages.append(Passage(heading, text, estimate_tokens(text)))
+        section.clear()
+
+    chunks = [markdown] if isinstance(markdown, str) else markdown
+    for block in _iter_blocks(chunks):
+        block = block.strip()
+        if not block:
+            continue
+        if _HEADING_PATTERN.match(block):
+            flush()
+            heading = block.split("\n", 1)[0]
+        section.extend(_split_block(block, passage_tokens))
+    flush()
+    return passages
+
+
+def bm25_scores(passages: list[Passage], query: str) -> np.ndarray:
+    """Score the passages against the query with BM25.
+
+    The heading of a passage counts as part of it, only the terms of the
+    query are counted.
+    """
+    terms = list(dict.fromkeys(tokenize(query)))
+    if not passages or not terms:
+        return np.zeros(len(passages))
+    term_index = {term: i for i, term in enumerate(terms)}
+    tf = np.zeros((len(passages), len(terms)))
+    lengths = np.zeros(len(passages))
+    for row, passage in enumerate(passages):
+        tokens = tokenize(f"{passage.heading or ''}\n{passage.text}")
+        lengths[row] = len(tokens)
+        for term, count in Counter(tokens).items():
+            column = term_index.get(term)
+            if column is not None:
+                tf[row, column] = count
+
+    df = np.count_nonzero(tf, axis=0)
+    idf = np.log(1 + (len(passages) - df + 0.5) / (df + 0.5))
+    norm = BM25_K1 * (1 - BM25_B + BM25_B * lengths / max(lengths.mean(), 1))
+    return (idf * tf * (BM25_K1 + 1) / (tf + norm[:, None])).sum(axis=1)
+
+
+def select_passages(
+    markdown: Union[str, Iterable[str]],
+    query: str,
+    max_tokens: int = CRAWL_MAX_TOKENS,
+    top_k: int = CRAWL_TOP_K,
+    passage_tokens: int = CRAWL_PASSAGE_TOKENS,
+) -> str:
+    """Keep the passages of a page that are the most relevant to a query.
+
+    Takes up to `top_k` passages by BM25 score within `max_tokens` tokens and
+    returns them in the order of the page, with their section headings. Pages
+    within the budget are returned whole, and the beginning of the page is
+    returned when no passage matches the query. The markdown is a string or
+    an iterable of chunks, as for `split_passages`.
+    """
+    chunks = [markdown] if isinstance(markdown, str) else list(markdown)
+    if sum(estimate_tokens(chunk) for chunk in chunks) <= max_tokens:
+        return "".join(chunks)
+    passages = split_passages(chunks, passage_tokens)
+    scores = bm25_scores(passages, query)
+    if scores.any():
+        # Stable, so passages with the same score keep the order of the page
+        ranking = [i for i in np.argsort(-scores, kind="stable") if scores[i] > 0]
+    else:
+        ranking = list(range(len(passages)))
+
+    selected: list[int] = []
+    budget = max_tokens
+    for i in ranking:
+        if len(selected) == top_k:
+            break
+        if passages[i].tokens <= budget:
+            selected.append(i)
+            budget -= passages[i].tokens
+    selected.sort()
+
+    parts = [
+        f"*{len(selected)} of {len(passages)} passages of the page, selected for: "
+        f"{query}*"
+    ]
+    previous: Optional[int] = None
+    for i in selected:
+        passage = passages[i]
+        if previous is None or i != previous + 1:
+            if previous is not None or i > 0:
+                parts.append(OMITTED)
+            if passage.heading and not passage.text.startswith(passage.heading):
+                parts.append(passage.heading)
+        parts.append(passage.text)
+        previous = i
+    if previous is not None and previous < len(passages) - 1:
+        parts.append(OMITTED)
+    return "\n\n".join(parts)
@@ -1,12 +1,206 @@
+import atexit
+import contextlib
+import json
+import logging
+import os
+import queue
+import shutil
+import subprocess
+import threading
+from typing import Optional
+
+import readabilipy
 from readabilipy import simple_json_from_html_string
 
+from src.config import CRAWLER_EXTRACTOR
+from src.config.tools import CRAWLER_EXTRACT_TIMEOUT, CRAWLER_EXTRACT_WORKERS
+
 from .article import Article
 
+logger = logging.getLogger(__name__)
+
+# Extraction backends:
+# - "python": readabilipy's pure Python extraction, in process
+# - "node": Readability.js in a new Node process for every page
+# - "worker": Readability.js in long-lived Node processes, see ReadabilityWorkerPool
+EXTRACTORS = ["python", "node", "worker"]
+
+READABILIPY_NODE_MODULES = os.path.join(
+    os.path.dirname(readabilipy.__file__), "javascript", "node_modules"
+)
+WORKER_SCRIPT = os.path.join(os.path.dirname(__file__), "readability_worker.js")
+
+
+def have_readability_js(node_modules: str = READABILIPY_NODE_MODULES) -> bool:
+    """Whether Node and the Readability.js modules of readabilipy are installed.
+
+    Unlike readabilipy, never tries to install the modules with npm, which
+    takes minutes and hangs without network.
+    """
+    return shutil.which("node") is not None and os.path.isdir(node_modules)
+
+
+class ReadabilityWorker:
+    """Runs Readability.js in one long-lived Node process, fed over a pipe.
+
+    Saves starting Node, loading jsdom and writing temporary files for every
+    page. Pages are extracted one at a time, the process is restarted when it
+    dies and killed when a page takes longer than `timeout` seconds.
+    """
+
+    def __init__(
+        self,
+        timeout: float = CRAWLER_EXTRACT_TIMEOUT,
+        node_modules: str = READABILIPY_NODE_MODULES,
+    ):
+        self.timeout = timeout
+        self.node_modules = node_modules
+        self._process: Optional[subprocess.Popen] = None
+        self._lock = threading.Lock()
+
+    def _start(self) -> subprocess.Popen:
+        if self._process is None or self._process.poll() is not None:
+            self._process = subprocess.Popen(
+                ["node", WORKER_SCRIPT],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                text=True,
+                encoding="utf-8",
+                env={**os.environ, "NODE_PATH": self.node_modules},
+            )
+        return self._process
+
+    def extract(self, html: str) -> dict:
+        """The output of Readability.parse(), or an empty dict without article."""
+        with self._lock:
+            process = self._start()
+            timed_out = threading.Event()
+
+            def kill() -> None:
+                timed_out.set()
+                process.kill()
+
+            timer = threading.Timer(self.timeout, kill)
+            timer.start()
+            try:
+                process.stdin.write(json.dumps({"html": html}) + "\n")
+                process.stdin.flush()
+                line = process.stdout.readline()
+            except OSError:
+                line = ""
+            finally:
+                timer.cancel()
+            if not line:
+                self._stop()
+                if timed_out.is_set():
+                    raise TimeoutError(
+                        f"Readability worker timed out after {self.timeout}s"
+                    )
+                raise RuntimeError("Readability worker exited")
+        response = json.loads(line)
+        if "error" in response:
+            raise RuntimeError(f"Readability.js failed: {response['error']}")
+        return response["article"] or {}
+
+    def _stop(self) -> None:
+        if self._process is not None:
+            self._process.kill()
+            self._process.wait()
+            for pipe in (self._process.stdin, self._process.stdout):
+                pipe.close()
+            self._process = None
+
+    def close(self) -> None:
+        with self._lock:
+            self._stop()
+
+
+class ReadabilityWorkerPool:
+    """Leases long-lived Readability.js workers, one page per worker at a time.
+
+    Workers are started on demand up to `size`, so up to `size` pages are
+    extracted in parallel and a slow page only holds up its own worker. Other
+    pages wait for a free worker.
+    """
+
+    def __init__(
+        self,
+        size: int = CRAWLER_EXTRACT_WORKERS,
+        timeout: float = CRAWLER_EXTRACT_TIMEOUT,
+        node_modules: str = READABILIPY_NODE_MODULES,
+    ):
+        self.size = size
+        self.timeout = timeout
+        self.node_modules = node_modules
+        self._workers: list[ReadabilityWorker] = []
+        # Last in, first out, so the most recently used workers stay warm
+        self._idle: queue.LifoQueue[ReadabilityWorker] = queue.LifoQueue()
+        self._lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def lease(self):
+        try:
+            worker = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                worker = None
+                if len(self._workers) < self.size:
+                    worker = ReadabilityWorker(self.timeout, self.node_modules)
+                    self._workers.append(worker)
+            if worker is None:
+                worker = self._idle.get()
+        try:
+            yield worker
+        finally:
+            self._idle.put(worker)
+
+    def extract(self, html: str) -> dict:
+        with self.lease() as worker:
+            return worker.extract(html)
+
+    def close(self) -> None:
+        with self._lock:
+            for worker in self._workers:
+                worker.close()
+
+
+_worker_pool: Optional[ReadabilityWorkerPool] = None
+_worker_pool_lock = threading.Lock()
+
+
+def get_worker_pool() -> ReadabilityWorkerPool:
+    """The worker pool shared by all extractors of the process."""
+    global _worker_pool
+    with _worker_pool_lock:
+        if _worker_pool is None:
+            _worker_pool = ReadabilityWorkerPool()
+            atexit.register(_worker_pool.close)
+        return _worker_pool
+
 
 class ReadabilityExtractor:
+    def __init__(self, backend: Optional[str] = None):
+        backend = backend or CRAWLER_EXTRACTOR
+        if backend not in EXTRACTORS:
+            raise ValueError(
+                f"Unknown extractor {backend}, expected one of {', '.join(EXTRACTORS)}"
+            )
+        if backend != "python" and not have_readability_js():
+            logger.warning(
+                "Node.js or the Readability.js modules of readabilipy are not "
+                "installed, falling back to the pure Python extractor"
+            )
+            backend = "python"
+        self.backend = backend
+
     def extract_article(self, html: str) -> Article:
-        article = simple_json_from_html_string(html, use_readability=True)
+        if self.backend == "worker":
+            article = get_worker_pool().extract(html)
+        else:
+            article = simple_json_from_html_string(
+                html, use_readability=self.backend == "node"
+            )
         return Article(
-            title=article.get("title"),
+            title=article.get("title") or None,
             html_content=article.get("content"),
         )
@@ -0,0 +1,35 @@
+/*
+ * Long-lived Readability.js worker, see `ReadabilityWorker` in
+ * readability_extractor.py.
+ *
+ * Reads one JSON request `{"html": "..."}` per line on stdin and writes one
+ * JSON response per line on stdout, `{"article": {...}}` with the output of
+ * Readability.parse(), or `{"error": "..."}`. The modules are resolved from
+ * NODE_PATH, i.e. the ones installed by readabilipy.
+ */
+
+const readline = require('readline');
+const { Readability } = require('@mozilla/readability');
+const { JSDOM } = require('jsdom');
+
+function extract(html) {
+	// Trimmed like readabilipy does before running Readability.js
+	const dom = new JSDOM(html.trim());
+	try {
+		return new Readability(dom.window.document).parse();
+	} finally {
+		dom.window.close();
+	}
+}
+
+const lines = readline.createInterface({ input: process.stdin, crlfDelay: Infinity });
+
+lines.on('line', (line) => {
+	let response;
+	try {
+		response = { article: extract(JSON.parse(line).html) };
+	} catch (error) {
+		response = { error: String((error && error.stack) || error) };
+	}
+	process.stdout.write(JSON.stringify(response) + '\n');
+});
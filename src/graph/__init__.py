@@ -1,5 +1,7 @@
 from .builder import build_graph
+from .checkpoint import SQLiteCheckpointSaver
 
 __all__ = [
     "build_graph",
+    "SQLiteCheckpointSaver",
 ]
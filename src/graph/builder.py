@@ -1,3 +1,6 @@
+from typing import Optional
+
+from langgraph.checkpoint.base import BaseCheckpointSaver
 from langgraph.graph import StateGraph, START
 
 from .types import State
@@ -9,18 +12,25 @@ from .nodes import (
     browser_node,
     reporter_node,
     planner_node,
+    scheduler_node,
 )
 
 
-def build_graph():
-    """Build and return the agent workflow graph."""
+def build_graph(checkpointer: Optional[BaseCheckpointSaver] = None):
+    """Build and return the agent workflow graph.
+
+    Args:
+        checkpointer: Saves a checkpoint after every node, which allows to
+            resume a workflow that failed from its last successful node
+    """
     builder = StateGraph(State)
     builder.add_edge(START, "coordinator")
     builder.add_node("coordinator", coordinator_node)
     builder.add_node("planner", planner_node)
     builder.add_node("supervisor", supervisor_node)
+    builder.add_node("scheduler", scheduler_node)
     builder.add_node("researcher", research_node)
     builder.add_node("coder", code_node)
     builder.add_node("browser", browser_node)
     builder.add_node("reporter", reporter_node)
-    return builder.compile()
+    return builder.compile(checkpointer=checkpointer)
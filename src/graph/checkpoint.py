@@ -0,0 +1,419 @@
+import asyncio
+import os
+import random
+import sqlite3
+import time
+from collections.abc import AsyncIterator, Iterator, Sequence
+from contextlib import closing
+from typing import Any, Optional
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    SerializerProtocol,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+)
+from langgraph.checkpoint.serde.types import TASKS, ChannelProtocol
+
+
+class SQLiteCheckpointSaver(BaseCheckpointSaver[str]):
+    """Checkpoint saver storing workflow checkpoints in a SQLite file.
+
+    Channel values are stored once per channel version in `checkpoint_blobs`,
+    so a checkpoint only writes the channels that changed since the previous
+    one, while the checkpoint row itself only holds the channel versions.
+
+    These are not deltas of the state: a changed channel is written in full,
+    e.g. all the messages at every step that adds one, so the writes of a long
+    workflow still grow with the square of its number of steps.
+
+    With `max_threads`, only the checkpoints of the most recently updated
+    threads are kept, except that threads updated in the last `min_age`
+    seconds are never deleted, see `prune`.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        *,
+        max_threads: Optional[int] = None,
+        min_age: float = 0,
+        serde: Optional[SerializerProtocol] = None,
+    ):
+        super().__init__(serde=serde)
+        self.path = path
+        self.max_threads = max_threads
+        self.min_age = min_age
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with closing(self._connect()) as conn, conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS checkpoints (
+                    thread_id TEXT NOT NULL,
+                    checkpoint_ns TEXT NOT NULL,
+                    checkpoint_id TEXT NOT NULL,
+                    parent_checkpoint_id TEXT,
+                    type TEXT NOT NULL,
+                    checkpoint BLOB NOT NULL,
+                    metadata_type TEXT NOT NULL,
+                    metadata BLOB NOT NULL,
+                    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id)
+                );
+                CREATE TABLE IF NOT EXISTS checkpoint_blobs (
+                    thread_id TEXT NOT NULL,
+                    checkpoint_ns TEXT NOT NULL,
+                    channel TEXT NOT NULL,
+                    version TEXT NOT NULL,
+                    type TEXT NOT NULL,
+                    blob BLOB,
+                    PRIMARY KEY (thread_id, checkpoint_ns, channel, version)
+                );
+                CREATE TABLE IF NOT EXISTS checkpoint_writes (
+                    thread_id TEXT NOT NULL,
+                    checkpoint_ns TEXT NOT NULL,
+                    checkpoint_id TEXT NOT NULL,
+                    task_id TEXT NOT NULL,
+                    idx INTEGER NOT NULL,
+                    channel TEXT NOT NULL,
+                    type TEXT NOT NULL,
+                    blob BLOB,
+                    task_path TEXT NOT NULL,
+                    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+                );
+                CREATE INDEX IF NOT EXISTS checkpoints_thread_id
+                    ON checkpoints (thread_id, checkpoint_id);
+                CREATE TABLE IF NOT EXISTS threads (
+                    thread_id TEXT PRIMARY KEY,
+                    updated_at REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS threads_updated_at
+                    ON threads (updated_at);
+                """
+            )
+            # Threads checkpointed before the threads table existed
+            conn.execute(
+                """
+                INSERT OR IGNORE INTO threads
+                SELECT DISTINCT thread_id, ? FROM checkpoints
+                """,
+                (time.time(),),
+            )
+        self.prune()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30)
+        # WAL keeps readers consistent, losing the last checkpoint on power
+        # loss is acceptable in exchange for not syncing on every commit
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _load_tuple(self, conn: sqlite3.Connection, row: tuple) -> CheckpointTuple:
+        thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id = row[:4]
+        checkpoint = self.serde.loads_typed((row[4], row[5]))
+
+        channel_values = {}
+        for channel, version in checkpoint["channel_versions"].items():
+            blob = conn.execute(
+                """
+                SELECT type, blob FROM checkpoint_blobs
+                WHERE thread_id = ? AND checkpoint_ns = ? AND channel = ? AND version = ?
+                """,
+                (thread_id, checkpoint_ns, channel, str(version)),
+            ).fetchone()
+            if blob is not None and blob[0] != "empty":
+                channel_values[channel] = self.serde.loads_typed(blob)
+
+        pending_sends = []
+        if parent_checkpoint_id:
+            pending_sends = [
+                self.serde.loads_typed((type_, blob))
+                for type_, blob in conn.execute(
+                    """
+                    SELECT type, blob FROM checkpoint_writes
+                    WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?
+                    AND channel = ?
+                    ORDER BY task_path, task_id, idx
+                    """,
+                    (thread_id, checkpoint_ns, parent_checkpoint_id, TASKS),
+                )
+            ]
+
+        pending_writes = [
+            (task_id, channel, self.serde.loads_typed((type_, blob)))
+            for task_id, channel, type_, blob in conn.execute(
+                """
+                SELECT task_id, channel, type, blob FROM checkpoint_writes
+                WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?
+                ORDER BY task_id, idx
+                """,
+                (thread_id, checkpoint_ns, checkpoint_id),
+            )
+        ]
+
+        return CheckpointTuple(
+            config={
+                "configurable": {
+                    "thread_id": thread_id,
+                    "checkpoint_ns": checkpoint_ns,
+                    "checkpoint_id": checkpoint_id,
+                }
+            },
+            checkpoint={
+                **checkpoint,
+                "channel_values": channel_values,
+                "pending_sends": pending_sends,
+            },
+            metadata=self.serde.loads_typed((row[6], row[7])),
+            parent_config=(
+                {
+                    "configurable": {
+                        "thread_id": thread_id,
+                        "checkpoint_ns": checkpoint_ns,
+                        "checkpoint_id": parent_checkpoint_id,
+                    }
+                }
+                if parent_checkpoint_id
+                else None
+            ),
+            pending_writes=pending_writes,
+        )
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        """Get the checkpoint of the config, or the latest one of the thread."""
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        query = "SELECT * FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ?"
+        params: tuple = (thread_id, checkpoint_ns)
+        if checkpoint_id := get_checkpoint_id(config):
+            query += " AND checkpoint_id = ?"
+            params += (checkpoint_id,)
+        else:
+            query += " ORDER BY checkpoint_id DESC LIMIT 1"
+        with closing(self._connect()) as conn:
+            row = conn.execute(query, params).fetchone()
+            return self._load_tuple(conn, row) if row else None
+
+    def list(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[CheckpointTuple]:
+        """List checkpoints from the newest to the oldest."""
+        clauses, params = [], []
+        if config:
+            clauses.append("thread_id = ?")
+            params.append(config["configurable"]["thread_id"])
+            if (
+                checkpoint_ns := config["configurable"].get("checkpoint_ns")
+            ) is not None:
+                clauses.append("checkpoint_ns = ?")
+                params.append(checkpoint_ns)
+            if checkpoint_id := get_checkpoint_id(config):
+                clauses.append("checkpoint_id = ?")
+                params.append(checkpoint_id)
+        if before and (before_checkpoint_id := get_checkpoint_id(before)):
+            clauses.append("checkpoint_id < ?")
+            params.append(before_checkpoint_id)
+        query = "SELECT * FROM checkpoints"
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        query += " ORDER BY checkpoint_id DESC"
+
+        with closing(self._connect()) as conn:
+            rows = conn.execute(query, params).fetchall()
+            for row in rows:
+                if limit is not None and limit <= 0:
+                    break
+                if filter:
+                    metadata = self.serde.loads_typed((row[6], row[7]))
+                    if not all(metadata.get(k) == v for k, v in filter.items()):
+                        continue
+                if limit is not None:
+                    limit -= 1
+                yield self._load_tuple(conn, row)
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        """Save a checkpoint together with the channels changed since its parent."""
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"]["checkpoint_ns"]
+        checkpoint = checkpoint.copy()
+        channel_values = checkpoint.pop("channel_values")
+        checkpoint.pop("pending_sends", None)
+
+        blobs = []
+        for channel, version in new_versions.items():
+            type_, blob = (
+                self.serde.dumps_typed(channel_values[channel])
+                if channel in channel_values
+                else ("empty", None)
+            )
+            blobs.append((thread_id, checkpoint_ns, channel, str(version), type_, blob))
+        checkpoint_type, checkpoint_blob = self.serde.dumps_typed(checkpoint)
+        metadata_type, metadata_blob = self.serde.dumps_typed(
+            get_checkpoint_metadata(config, metadata)
+        )
+
+        with closing(self._connect()) as conn, conn:
+            conn.executemany(
+                "INSERT OR IGNORE INTO checkpoint_blobs VALUES (?, ?, ?, ?, ?, ?)",
+                blobs,
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    thread_id,
+                    checkpoint_ns,
+                    checkpoint["id"],
+                    config["configurable"].get("checkpoint_id"),
+                    checkpoint_type,
+                    checkpoint_blob,
+                    metadata_type,
+                    metadata_blob,
+                ),
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO threads VALUES (?, ?)",
+                (thread_id, time.time()),
+            )
+        return {
+            "configurable": {
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": checkpoint["id"],
+            }
+        }
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        """Save the writes of a task, e.g. a plan step that completed."""
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+        # Special writes such as errors replace previous ones, regular writes
+        # of a task are only recorded once
+        query = (
+            "INSERT OR REPLACE"
+            if all(channel in WRITES_IDX_MAP for channel, _ in writes)
+            else "INSERT OR IGNORE"
+        )
+        rows = [
+            (
+                thread_id,
+                checkpoint_ns,
+                checkpoint_id,
+                task_id,
+                WRITES_IDX_MAP.get(channel, idx),
+                channel,
+                *self.serde.dumps_typed(value),
+                task_path,
+            )
+            for idx, (channel, value) in enumerate(writes)
+        ]
+        with closing(self._connect()) as conn, conn:
+            conn.executemany(
+                f"{query} INTO checkpoint_writes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+
+    def prune(self) -> int:
+        """Delete the threads beyond the `max_threads` most recently updated ones.
+
+        Threads updated in the last `min_age` seconds are kept anyway, so that
+        a burst of workflows does not delete a failed one before it is resumed.
+
+        Returns:
+            The number of deleted threads
+        """
+        if self.max_threads is None:
+            return 0
+        with closing(self._connect()) as conn, conn:
+            threads = conn.execute(
+                """
+                SELECT thread_id FROM (
+                    SELECT thread_id, updated_at FROM threads
+                    ORDER BY updated_at DESC LIMIT -1 OFFSET ?
+                ) WHERE updated_at < ?
+                """,
+                (self.max_threads, time.time() - self.min_age),
+            ).fetchall()
+            for table in (
+                "checkpoints",
+                "checkpoint_blobs",
+                "checkpoint_writes",
+                "threads",
+            ):
+                conn.executemany(f"DELETE FROM {table} WHERE thread_id = ?", threads)
+        return len(threads)
+
+    async def aprune(self) -> int:
+        return await asyncio.to_thread(self.prune)
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        checkpoints = await asyncio.to_thread(
+            lambda: list(self.list(config, filter=filter, before=before, limit=limit))
+        )
+        for checkpoint in checkpoints:
+            yield checkpoint
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        return await asyncio.to_thread(
+            self.put, config, checkpoint, metadata, new_versions
+        )
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    def get_next_version(self, current: Optional[str], channel: ChannelProtocol) -> str:
+        # Versions are part of the blob key, the random suffix keeps the
+        # versions written by forks of the same checkpoint apart
+        if current is None:
+            current_v = 0
+        elif isinstance(current, int):
+            current_v = current
+        else:
+            current_v = int(current.split(".")[0])
+        return f"{current_v + 1:032}.{random.random():016}"
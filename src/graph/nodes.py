@@ -2,16 +2,17 @@ import logging
 import json
 from copy import deepcopy
 from typing import Literal
-from langchain_core.messages import HumanMessage
-from langgraph.types import Command
+from langchain_core.messages import BaseMessage, HumanMessage, ToolMessage
+from langgraph.types import Command, Send
 from langgraph.graph import END
 
-from src.agents import research_agent, coder_agent, browser_agent
+from src.agents import get_agent
 from src.agents.llm import get_llm_by_type
 from src.config import TEAM_MEMBERS
-from src.config.agents import AGENT_LLM_MAP
+from src.config.agents import AGENT_LLM_MAP, AGENT_LLM_CACHE
 from src.prompts.template import apply_prompt_template
 from src.tools.search import tavily_tool
+from .scheduler import parse_plan, ready_steps, format_step_instruction
 from .types import State, Router
 
 logger = logging.getLogger(__name__)
@@ -19,77 +20,95 @@ logger = logging.getLogger(__name__)
 RESPONSE_FORMAT = "Response from {}:\n\n<response>\n{}\n</response>\n\n*Please execute the next step.*"
 
 
-def research_node(state: State) -> Command[Literal["supervisor"]]:
-    """Node for the researcher agent that performs research tasks."""
-    logger.info("Research agent starting task")
-    result = research_agent.invoke(state)
-    logger.info("Research agent completed task")
-    logger.debug(f"Research agent response: {result['messages'][-1].content}")
+def _step_failed(messages: list[BaseMessage]) -> bool:
+    """Whether an agent run failed: it gave no answer or its last tool call errored."""
+    if not messages or not messages[-1].content:
+        return True
+    tool_messages = [m for m in messages if isinstance(m, ToolMessage)]
+    return bool(tool_messages) and tool_messages[-1].status == "error"
+
+
+def _agent_command(
+    state: State, agent_name: str, content: str, failed: bool = False
+) -> Command[Literal["supervisor", "scheduler"]]:
+    """Hand the agent response back to the supervisor, or to the scheduler if the
+    agent was dispatched as a plan step."""
+    if "step_index" in state:
+        return Command(
+            update={"step_results": {state["step_index"]: content}},
+            goto="scheduler",
+        )
     return Command(
         update={
             "messages": [
                 HumanMessage(
-                    content=RESPONSE_FORMAT.format(
-                        "researcher", result["messages"][-1].content
-                    ),
-                    name="researcher",
+                    content=RESPONSE_FORMAT.format(agent_name, content),
+                    name=agent_name,
                 )
-            ]
+            ],
+            "last_step_failed": failed,
         },
         goto="supervisor",
     )
 
 
-def code_node(state: State) -> Command[Literal["supervisor"]]:
+async def research_node(state: State) -> Command[Literal["supervisor", "scheduler"]]:
+    """Node for the researcher agent that performs research tasks."""
+    logger.info("Research agent starting task")
+    result = await get_agent("researcher").ainvoke(state)
+    logger.info("Research agent completed task")
+    logger.debug(f"Research agent response: {result['messages'][-1].content}")
+    return _agent_command(
+        state,
+        "researcher",
+        result["messages"][-1].content,
+        failed=_step_failed(result["messages"]),
+    )
+
+
+async def code_node(state: State) -> Command[Literal["supervisor", "scheduler"]]:
     """Node for the coder agent that executes Python code."""
     logger.info("Code agent starting task")
-    result = coder_agent.invoke(state)
+    result = await get_agent("coder").ainvoke(state)
     logger.info("Code agent completed task")
     logger.debug(f"Code agent response: {result['messages'][-1].content}")
-    return Command(
-        update={
-            "messages": [
-                HumanMessage(
-                    content=RESPONSE_FORMAT.format(
-                        "coder", result["messages"][-1].content
-                    ),
-                    name="coder",
-                )
-            ]
-        },
-        goto="supervisor",
+    return _agent_command(
+        state,
+        "coder",
+        result["messages"][-1].content,
+        failed=_step_failed(result["messages"]),
     )
 
 
-def browser_node(state: State) -> Command[Literal["supervisor"]]:
+async def browser_node(state: State) -> Command[Literal["supervisor", "scheduler"]]:
     """Node for the browser agent that performs web browsing tasks."""
     logger.info("Browser agent starting task")
-    result = browser_agent.invoke(state)
+    result = await get_agent("browser").ainvoke(state)
     logger.info("Browser agent completed task")
     logger.debug(f"Browser agent response: {result['messages'][-1].content}")
-    return Command(
-        update={
-            "messages": [
-                HumanMessage(
-                    content=RESPONSE_FORMAT.format(
-                        "browser", result["messages"][-1].content
-                    ),
-                    name="browser",
-                )
-            ]
-        },
-        goto="supervisor",
+    return _agent_command(
+        state,
+        "browser",
+        result["messages"][-1].content,
+        failed=_step_failed(result["messages"]),
     )
 
 
-def supervisor_node(state: State) -> Command[Literal[*TEAM_MEMBERS, "__end__"]]:
+async def supervisor_node(state: State) -> Command[Literal[*TEAM_MEMBERS, "__end__"]]:
     """Supervisor node that decides which agent should act next."""
     logger.info("Supervisor evaluating next action")
+    if state.get("follow_plan"):
+        command = _follow_plan(state)
+        if command is not None:
+            return command
+
     messages = apply_prompt_template("supervisor", state)
-    response = (
-        get_llm_by_type(AGENT_LLM_MAP["supervisor"])
+    response = await (
+        get_llm_by_type(
+            AGENT_LLM_MAP["supervisor"], cached=AGENT_LLM_CACHE["supervisor"]
+        )
         .with_structured_output(Router)
-        .invoke(messages)
+        .ainvoke(messages)
     )
     goto = response["next"]
     logger.debug(f"Current state messages: {state['messages']}")
@@ -101,26 +120,110 @@ def supervisor_node(state: State) -> Command[Literal[*TEAM_MEMBERS, "__end__"]]:
     else:
         logger.info(f"Supervisor delegating to: {goto}")
 
-    return Command(goto=goto, update={"next": goto})
+    # Once the supervisor took over, it keeps routing for the rest of the workflow
+    return Command(goto=goto, update={"next": goto, "follow_plan": False})
+
+
+def _follow_plan(state: State) -> Command | None:
+    """Route to the agent of the next plan step without asking the LLM.
+
+    Returns None when the previous step failed, the plan can not be parsed or
+    every step has been dispatched, so that the supervisor LLM decides instead.
+    """
+    if state.get("last_step_failed"):
+        logger.info("Previous step failed, supervisor LLM takes over")
+        return None
+    steps = state.get("plan_steps") or parse_plan(state.get("full_plan", ""))
+    cursor = state.get("plan_cursor", 0)
+    if cursor >= len(steps):
+        logger.info("Plan exhausted, supervisor LLM takes over")
+        return None
+
+    goto = steps[cursor]["agent_name"]
+    logger.info(f"Supervisor following plan step {cursor}, delegating to: {goto}")
+    return Command(
+        goto=goto,
+        update={"next": goto, "plan_steps": steps, "plan_cursor": cursor + 1},
+    )
+
+
+async def scheduler_node(
+    state: State,
+) -> Command[
+    Literal["researcher", "coder", "browser", "reporter", "supervisor", "__end__"]
+]:
+    """Scheduler node that runs independent plan steps in parallel."""
+    steps = state.get("plan_steps") or parse_plan(state["full_plan"])
+    if not steps:
+        logger.warning("No schedulable steps in plan, falling back to supervisor")
+        return Command(goto="supervisor")
+
+    # Merge the results of the previous wave back into messages in plan order
+    results = state.get("step_results") or {}
+    agent_names = {step["index"]: step["agent_name"] for step in steps}
+    new_messages = [
+        HumanMessage(
+            content=RESPONSE_FORMAT.format(agent_names[index], results[index]),
+            name=agent_names[index],
+        )
+        for index in sorted(state.get("running_steps") or [])
+        if index in results
+    ]
+
+    ready = ready_steps(steps, set(results))
+    update = {
+        "plan_steps": steps,
+        "running_steps": [step["index"] for step in ready],
+        "messages": new_messages,
+    }
+    if not ready:
+        logger.info("Workflow completed")
+        return Command(goto="__end__", update=update)
+
+    logger.info(
+        f"Scheduler dispatching steps: {[(step['index'], step['agent_name']) for step in ready]}"
+    )
+    messages = state["messages"] + new_messages
+    return Command(
+        goto=[
+            Send(
+                step["agent_name"],
+                {
+                    **state,
+                    "messages": messages
+                    + [
+                        HumanMessage(
+                            content=format_step_instruction(step), name="scheduler"
+                        )
+                    ],
+                    "step_index": step["index"],
+                },
+            )
+            for step in ready
+        ],
+        update=update,
+    )
 
 
-def planner_node(state: State) -> Command[Literal["supervisor", "__end__"]]:
+async def planner_node(
+    state: State,
+) -> Command[Literal["supervisor", "scheduler", "__end__"]]:
     """Planner node that generate the full plan."""
     logger.info("Planner generating full plan")
-    messages = apply_prompt_template("planner", state)
     # whether to enable deep thinking mode
     llm = get_llm_by_type("basic")
     if state.get("deep_thinking_mode"):
         llm = get_llm_by_type("reasoning")
     if state.get("search_before_planning"):
-        searched_content = tavily_tool.invoke({"query": state["messages"][-1].content})
-        messages = deepcopy(messages)
-        messages[
-            -1
-        ].content += f"\n\n# Relative Search Results\n\n{json.dumps([{'titile': elem['title'], 'content': elem['content']} for elem in searched_content], ensure_ascii=False)}"
-    stream = llm.stream(messages)
+        request = state["messages"][-1]
+        searched_content = await tavily_tool.ainvoke({"query": request.content})
+        request = deepcopy(request)
+        request.content += f"\n\n# Relative Search Results\n\n{json.dumps([{'titile': elem['title'], 'content': elem['content']} for elem in searched_content], ensure_ascii=False)}"
+        state = {**state, "messages": state["messages"][:-1] + [request]}
+    messages = apply_prompt_template("planner", state)
+    stream = llm.astream(messages)
     full_response = ""
-    for chunk in stream:
+    async for chunk in stream:
         full_response += chunk.content
     logger.debug(f"Current state messages: {state['messages']}")
     logger.debug(f"Planner response: {full_response}")
@@ -131,7 +234,7 @@ def planner_node(state: State) -> Command[Literal["supervisor", "__end__"]]:
     if full_response.endswith("```"):
         full_response = full_response.removesuffix("```")
 
-    goto = "supervisor"
+    goto = "scheduler" if state.get("parallel_execution") else "supervisor"
     try:
         json.loads(full_response)
     except json.JSONDecodeError:
@@ -147,11 +250,13 @@ def planner_node(state: State) -> Command[Literal["supervisor", "__end__"]]:
     )
 
 
-def coordinator_node(state: State) -> Command[Literal["planner", "__end__"]]:
+async def coordinator_node(state: State) -> Command[Literal["planner", "__end__"]]:
     """Coordinator node that communicate with customers."""
     logger.info("Coordinator talking.")
     messages = apply_prompt_template("coordinator", state)
-    response = get_llm_by_type(AGENT_LLM_MAP["coordinator"]).invoke(messages)
+    response = await get_llm_by_type(
+        AGENT_LLM_MAP["coordinator"], cached=AGENT_LLM_CACHE["coordinator"]
+    ).ainvoke(messages)
     logger.debug(f"Current state messages: {state['messages']}")
     logger.debug(f"reporter response: {response}")
 
@@ -164,22 +269,16 @@ def coordinator_node(state: State) -> Command[Literal["planner", "__end__"]]:
     )
 
 
-def reporter_node(state: State) -> Command[Literal["supervisor"]]:
+async def reporter_node(state: State) -> Command[Literal["supervisor", "scheduler"]]:
     """Reporter node that write a final report."""
     logger.info("Reporter write final report")
     messages = apply_prompt_template("reporter", state)
-    response = get_llm_by_type(AGENT_LLM_MAP["reporter"]).invoke(messages)
+    response = await get_llm_by_type(
+        AGENT_LLM_MAP["reporter"], cached=AGENT_LLM_CACHE["reporter"]
+    ).ainvoke(messages)
     logger.debug(f"Current state messages: {state['messages']}")
     logger.debug(f"reporter response: {response}")
 
-    return Command(
-        update={
-            "messages": [
-                HumanMessage(
-                    content=RESPONSE_FORMAT.format("reporter", response.content),
-                    name="reporter",
-                )
-            ]
-        },
-        goto="supervisor",
+    return _agent_command(
+        state, "reporter", response.content, failed=not response.content
     )
@@ -0,0 +1,100 @@
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Agents whose steps can be dispatched by the plan scheduler
+SCHEDULABLE_AGENTS = ["researcher", "coder", "browser", "reporter"]
+
+
+def parse_plan(full_plan: str) -> list[dict]:
+    """Parse the planner output into a list of steps with resolved dependencies.
+
+    Each returned step has the keys `index`, `agent_name`, `title`, `description`,
+    `note` and `depends_on`. When a step does not declare `depends_on`, the
+    dependencies are inferred conservatively:
+
+    - `researcher` steps only wait for the preceding non-researcher steps, since
+      gathering information does not depend on other searches.
+    - `coder` and `browser` steps wait for every preceding step.
+    - `reporter` steps always wait for every preceding step.
+
+    Args:
+        full_plan: The raw JSON plan produced by the planner
+
+    Returns:
+        The list of steps, or an empty list if the plan can not be parsed
+    """
+    try:
+        plan = json.loads(full_plan)
+    except json.JSONDecodeError:
+        logger.warning("Plan is not a valid JSON, can not schedule steps")
+        return []
+
+    raw_steps = plan.get("steps") if isinstance(plan, dict) else None
+    if not isinstance(raw_steps, list):
+        return []
+
+    steps = []
+    for index, raw_step in enumerate(raw_steps):
+        if not isinstance(raw_step, dict):
+            continue
+        agent_name = raw_step.get("agent_name")
+        if agent_name not in SCHEDULABLE_AGENTS:
+            logger.warning(f"Skipping plan step with unknown agent: {agent_name}")
+            continue
+
+        previous = [step["index"] for step in steps]
+        depends_on = raw_step.get("depends_on")
+        if agent_name == "reporter":
+            depends_on = previous
+        elif isinstance(depends_on, list):
+            # Only keep references to earlier, known steps to avoid cycles
+            depends_on = [i for i in depends_on if isinstance(i, int) and i in previous]
+        elif agent_name == "researcher":
+            depends_on = [
+                step["index"] for step in steps if step["agent_name"] != "researcher"
+            ]
+        else:
+            depends_on = previous
+
+        steps.append(
+            {
+                "index": index,
+                "agent_name": agent_name,
+                "title": raw_step.get("title", ""),
+                "description": raw_step.get("description", ""),
+                "note": raw_step.get("note", ""),
+                "depends_on": sorted(set(depends_on)),
+            }
+        )
+    return steps
+
+
+def ready_steps(steps: list[dict], completed: set[int]) -> list[dict]:
+    """Return the pending steps whose dependencies are all completed.
+
+    Steps are returned in plan order so that fan-out and merge are deterministic.
+    A `reporter` step is only released once every other step has completed, and
+    never together with other steps.
+    """
+    pending = [step for step in steps if step["index"] not in completed]
+    ready = [
+        step
+        for step in pending
+        if all(dependency in completed for dependency in step["depends_on"])
+    ]
+    workers = [step for step in ready if step["agent_name"] != "reporter"]
+    if workers:
+        return workers
+    if len(pending) == len(ready):
+        return ready[:1]
+    return []
+
+
+def format_step_instruction(step: dict) -> str:
+    """Build the instruction message handed to the agent executing a step."""
+    instruction = f"# Current Step\n\n## {step['title']}\n\n{step['description']}"
+    if step.get("note"):
+        instruction += f"\n\nNote: {step['note']}"
+    return instruction
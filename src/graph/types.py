@@ -1,4 +1,4 @@
-from typing import Literal
+from typing import Annotated, Literal
 from typing_extensions import TypedDict
 from langgraph.graph import MessagesState
 
@@ -14,6 +14,11 @@ class Router(TypedDict):
     next: Literal[*OPTIONS]
 
 
+def merge_step_results(left: dict[int, str], right: dict[int, str]) -> dict[int, str]:
+    """Merge results written by plan steps that ran in parallel."""
+    return {**(left or {}), **(right or {})}
+
+
 class State(MessagesState):
     """State for the agent system, extends MessagesState with next field."""
 
@@ -25,3 +30,14 @@ class State(MessagesState):
     full_plan: str
     deep_thinking_mode: bool
     search_before_planning: bool
+    parallel_execution: bool
+    follow_plan: bool
+
+    # Plan following supervisor
+    plan_cursor: int
+    last_step_failed: bool
+
+    # Plan scheduler
+    plan_steps: list[dict]
+    running_steps: list[int]
+    step_results: Annotated[dict[int, str], merge_step_results]
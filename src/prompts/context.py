@@ -0,0 +1,103 @@
+import logging
+from typing import Optional
+
+from langchain_core.messages import BaseMessage
+
+from src.config import TEAM_MEMBERS
+from src.config.agents import CONTEXT_EXCERPT_TOKENS, CONTEXT_KEEP_RECENT_MESSAGES
+
+logger = logging.getLogger(__name__)
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheaply estimate the number of tokens of a text.
+
+    Counts about four ASCII characters per token and one token per other
+    character, which over-estimates rather than under-estimates CJK text.
+    """
+    non_ascii = len(text) - len(text.encode("ascii", "ignore"))
+    return (len(text) - non_ascii) // 4 + non_ascii + 1
+
+
+def _message_text(message) -> str:
+    content = (
+        message.get("content", "")
+        if isinstance(message, dict)
+        else getattr(message, "content", "")
+    )
+    if isinstance(content, str):
+        return content
+    return " ".join(
+        item.get("text", "")
+        for item in content
+        if isinstance(item, dict) and item.get("type") == "text"
+    )
+
+
+def _excerpt(text: str, max_tokens: int) -> str:
+    """Keep the head of a text within about `max_tokens` tokens."""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    end = len(text)
+    while end > 0 and estimate_tokens(text[:end]) > max_tokens:
+        end = end * 3 // 4
+    return f"{text[:end].rstrip()}\n\n[... truncated, {len(text) - end} characters omitted]"
+
+
+def _is_agent_response(message) -> bool:
+    return isinstance(message, BaseMessage) and message.name in TEAM_MEMBERS
+
+
+def compact_messages(
+    messages: list,
+    budget: Optional[int],
+    keep_recent: int = CONTEXT_KEEP_RECENT_MESSAGES,
+    excerpt_tokens: int = CONTEXT_EXCERPT_TOKENS,
+) -> list:
+    """Fit the messages into a token budget by compacting old agent responses.
+
+    The last `keep_recent` messages, user messages and the plan are always kept
+    verbatim. When the messages exceed the budget, every older agent response
+    is cut to an excerpt, which keeps the compacted history identical from one
+    call to the next. If that is still not enough, the oldest excerpts are
+    replaced by a short note.
+
+    Args:
+        messages: The state messages, they are not modified
+        budget: Maximum number of tokens, None disables compaction
+
+    Returns:
+        The messages to send to the LLM
+    """
+    if budget is None:
+        return messages
+    sizes = [estimate_tokens(_message_text(message)) for message in messages]
+    total = sum(sizes)
+    if total <= budget:
+        return messages
+
+    compacted = list(messages)
+    older = [
+        i
+        for i in range(max(len(messages) - keep_recent, 0))
+        if _is_agent_response(messages[i])
+    ]
+    for i in older:
+        text = _message_text(messages[i])
+        excerpt = _excerpt(text, excerpt_tokens)
+        if excerpt != text:
+            compacted[i] = messages[i].model_copy(update={"content": excerpt})
+            total += estimate_tokens(excerpt) - sizes[i]
+            sizes[i] = estimate_tokens(excerpt)
+
+    for i in older:
+        if total <= budget:
+            break
+        note = f"[Earlier response from {messages[i].name} omitted]"
+        compacted[i] = messages[i].model_copy(update={"content": note})
+        total += estimate_tokens(note) - sizes[i]
+
+    logger.debug(
+        f"Compacted {len(older)} agent responses, about {total} tokens for a budget of {budget}"
+    )
+    return compacted
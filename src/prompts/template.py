@@ -2,22 +2,130 @@ import os
 import re
 from datetime import datetime
 
-from langchain_core.prompts import PromptTemplate
 from langgraph.prebuilt.chat_agent_executor import AgentState
 
+from src.config import PROMPT_HOT_RELOAD, STABLE_PROMPT_PREFIX
+from src.config.agents import AGENT_CONTEXT_BUDGET
+
+from .context import compact_messages, estimate_tokens
+
+PROMPTS_DIR = os.path.dirname(__file__)
+
+# Matches `<<VAR>>` placeholders in prompt files
+VARIABLE_PATTERN = re.compile(r"<<([^>>]+)>>")
+
+# Variables whose value changes between LLM calls of the same workflow
+VOLATILE_VARIABLES = ["CURRENT_TIME"]
+
+
+class CompiledPrompt:
+    """A prompt split into literal text and variable names for fast rendering."""
+
+    def __init__(self, text: str, mtime: float):
+        self.text = text
+        self.mtime = mtime
+        # re.split puts the captured variable names at the odd positions
+        self.parts = VARIABLE_PATTERN.split(text)
+        self.variables = set(self.parts[1::2])
+
+    def render(self, variables: dict) -> str:
+        parts = self.parts.copy()
+        for i in range(1, len(parts), 2):
+            parts[i] = str(variables[parts[i]])
+        return "".join(parts)
+
+
+class PromptRegistry:
+    """Loads and compiles every prompt in a directory once.
+
+    With `hot_reload` enabled, prompts are reloaded when their file changes,
+    which is convenient while editing prompts in development.
+    """
+
+    def __init__(self, prompts_dir: str = PROMPTS_DIR, hot_reload: bool = False):
+        self.prompts_dir = prompts_dir
+        self.hot_reload = hot_reload
+        self._prompts: dict[str, CompiledPrompt] = {}
+        for file_name in sorted(os.listdir(prompts_dir)):
+            if file_name.endswith(".md"):
+                self._load(file_name.removesuffix(".md"))
+
+    def _path(self, prompt_name: str) -> str:
+        return os.path.join(self.prompts_dir, f"{prompt_name}.md")
+
+    def _load(self, prompt_name: str) -> CompiledPrompt:
+        path = self._path(prompt_name)
+        with open(path) as f:
+            prompt = CompiledPrompt(f.read(), os.path.getmtime(path))
+        self._prompts[prompt_name] = prompt
+        return prompt
+
+    def get(self, prompt_name: str) -> CompiledPrompt:
+        prompt = self._prompts.get(prompt_name)
+        if prompt is None:
+            return self._load(prompt_name)
+        if (
+            self.hot_reload
+            and os.path.getmtime(self._path(prompt_name)) != prompt.mtime
+        ):
+            return self._load(prompt_name)
+        return prompt
+
+    def render(self, prompt_name: str, variables: dict) -> str:
+        return self.get(prompt_name).render(variables)
+
+
+prompt_registry = PromptRegistry(hot_reload=PROMPT_HOT_RELOAD)
+
 
 def get_prompt_template(prompt_name: str) -> str:
-    template = open(os.path.join(os.path.dirname(__file__), f"{prompt_name}.md")).read()
+    template = prompt_registry.get(prompt_name).text
     # Escape curly braces using backslash
     template = template.replace("{", "{{").replace("}", "}}")
     # Replace `<<VAR>>` with `{VAR}`
-    template = re.sub(r"<<([^>>]+)>>", r"{\1}", template)
+    template = VARIABLE_PATTERN.sub(r"{\1}", template)
     return template
 
 
-def apply_prompt_template(prompt_name: str, state: AgentState) -> list:
-    system_prompt = PromptTemplate(
-        input_variables=["CURRENT_TIME"],
-        template=get_prompt_template(prompt_name),
-    ).format(CURRENT_TIME=datetime.now().strftime("%a %b %d %Y %H:%M:%S %z"), **state)
-    return [{"role": "system", "content": system_prompt}] + state["messages"]
+def _compact(prompt_name: str, system_prompt: str, messages: list) -> list:
+    budget = AGENT_CONTEXT_BUDGET.get(prompt_name)
+    if budget is None:
+        return messages
+    return compact_messages(messages, budget - estimate_tokens(system_prompt))
+
+
+def apply_prompt_template(
+    prompt_name: str, state: AgentState, stable_prefix: bool = STABLE_PROMPT_PREFIX
+) -> list:
+    """Render the system prompt and prepend it to the state messages.
+
+    With `stable_prefix`, volatile variables are moved out of the system prompt
+    into a user message after the conversation, so the system prompt and the
+    message history stay an append-only prefix across calls and can hit
+    provider-side prompt caching. It is a user message, as several providers
+    reject a trailing system message.
+
+    Older agent responses are compacted to fit the token budget of the agent
+    configured in `AGENT_CONTEXT_BUDGET`.
+    """
+    volatile = {
+        "CURRENT_TIME": datetime.now().strftime("%a %b %d %Y %H:%M:%S %z"),
+    }
+    if not stable_prefix:
+        system_prompt = prompt_registry.render(prompt_name, {**state, **volatile})
+        return [{"role": "system", "content": system_prompt}] + _compact(
+            prompt_name, system_prompt, state["messages"]
+        )
+
+    prompt = prompt_registry.get(prompt_name)
+    used = [name for name in VOLATILE_VARIABLES if name in prompt.variables]
+    system_prompt = prompt.render(
+        {**state, **{name: f"see `{name}` in the last message" for name in used}}
+    )
+    messages = [{"role": "system", "content": system_prompt}] + _compact(
+        prompt_name, system_prompt, state["messages"]
+    )
+    if used:
+        context = "\n".join(f"{name}: {volatile[name]}" for name in used)
+        messages.append({"role": "user", "content": context})
+    return messages
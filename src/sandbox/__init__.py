@@ -0,0 +1,3 @@
+from .pool import ExecutionResult, PythonWorkerPool
+
+__all__ = ["ExecutionResult", "PythonWorkerPool"]
@@ -0,0 +1,33 @@
+import io
+
+
+class CappedOutput(io.TextIOBase):
+    """Keeps the head and the tail of an output, the middle is dropped."""
+
+    def __init__(self, head_chars: int, tail_chars: int):
+        self.head_chars = head_chars
+        self.tail_chars = tail_chars
+        self.head = ""
+        self.tail = ""
+        self.omitted = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, text: str) -> int:
+        written = len(text)
+        if len(self.head) < self.head_chars:
+            room = self.head_chars - len(self.head)
+            self.head += text[:room]
+            text = text[room:]
+        if text:
+            self.tail += text
+            if len(self.tail) > self.tail_chars:
+                self.omitted += len(self.tail) - self.tail_chars
+                self.tail = self.tail[len(self.tail) - self.tail_chars :]
+        return written
+
+    def getvalue(self) -> str:
+        if not self.omitted:
+            return self.head + self.tail
+        return f"{self.head}\n[... {self.omitted} characters omitted ...]\n{self.tail}"
@@ -0,0 +1,268 @@
+import atexit
+import logging
+import multiprocessing
+import signal
+import threading
+import time
+from typing import NamedTuple, Optional
+
+from .worker import run_worker
+
+logger = logging.getLogger(__name__)
+
+SESSION_LOST = "The Python session was restarted, variables defined before are lost."
+
+
+class ExecutionResult(NamedTuple):
+    stdout: str
+    error: Optional[str] = None
+
+
+class _Worker:
+    def __init__(self, context, preload_modules: list[str], memory_limit, output_chars):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(
+            target=run_worker,
+            args=(child_conn, preload_modules, memory_limit, output_chars),
+            name="python-repl-worker",
+            daemon=True,
+        )
+        self.process.start()
+        child_conn.close()
+        # Held while an execution is in flight, a worker runs one at a time
+        self.lock = threading.Lock()
+        self.tasks = 0
+        self.sessions: set[str] = set()
+        # Sessions to forget before the next execution
+        self.dropped: list[str] = []
+        # The session whose code is running
+        self.running: Optional[str] = None
+        self.interrupted = False
+        self.killed = False
+
+    def kill(self) -> None:
+        if self.killed:
+            return
+        self.killed = True
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join()
+        self.conn.close()
+
+
+class PythonWorkerPool:
+    """Runs Python code in a pool of warm worker processes.
+
+    Every session, e.g. a workflow, has its own namespace that lives in one
+    worker, so variables persist from one execution to the next. Workers are
+    forked from a server that already imported the preloaded modules, which
+    makes starting and replacing them cheap.
+
+    Limits are enforced per execution: wall time by the pool, CPU time and
+    memory by the kernel. A worker that exceeds them is killed and replaced,
+    and its sessions start over. Workers are also recycled after
+    `max_tasks_per_worker` executions, once their sessions are gone. The code
+    is not isolated from the filesystem or the network, see `worker`.
+
+    Args:
+        size: Number of workers
+        timeout: Wall time limit of an execution, in seconds
+        cpu_limit: CPU time limit of an execution, in seconds
+        memory_limit: Address space limit of a worker, in bytes
+        max_tasks_per_worker: Executions after which a worker is recycled
+        session_ttl: Idle time after which the namespace of a session is dropped
+        preload_modules: Modules imported by the workers before any execution
+        output_head_chars: Characters kept from the start of the stdout
+        output_tail_chars: Characters kept from the end of the stdout
+    """
+
+    def __init__(
+        self,
+        size: int,
+        timeout: float,
+        cpu_limit: Optional[int] = None,
+        memory_limit: Optional[int] = None,
+        max_tasks_per_worker: int = 100,
+        session_ttl: float = 30 * 60,
+        preload_modules: Optional[list[str]] = None,
+        output_head_chars: int = 10_000,
+        output_tail_chars: int = 10_000,
+    ):
+        self.size = size
+        self.timeout = timeout
+        self.cpu_limit = cpu_limit
+        self.memory_limit = memory_limit
+        self.max_tasks_per_worker = max_tasks_per_worker
+        self.session_ttl = session_ttl
+        self.preload_modules = list(preload_modules or [])
+        self.output_chars = (output_head_chars, output_tail_chars)
+
+        self._context = None
+        self._lock = threading.Lock()
+        self._workers: list[_Worker] = []
+        # Workers past max_tasks_per_worker, still serving their sessions
+        self._retired: list[_Worker] = []
+        self._sessions: dict[str, _Worker] = {}
+        self._last_used: dict[str, float] = {}
+
+    def start(self) -> None:
+        """Start the workers, otherwise done on the first execution."""
+        with self._lock:
+            self._start()
+
+    def run(self, session_id: str, code: str) -> ExecutionResult:
+        """Execute code in the namespace of a session and capture its stdout."""
+        while True:
+            worker = self._acquire(session_id)
+            with worker.lock:
+                # The worker may have been replaced while we waited for it
+                if not worker.killed:
+                    return self._execute(worker, session_id, code)
+
+    def interrupt(self, session_id: str) -> None:
+        """Stop the code of a session that is running, if any.
+
+        Its worker is killed and replaced, so the session starts over.
+        """
+        with self._lock:
+            worker = self._sessions.get(session_id)
+            if worker is not None and worker.running == session_id:
+                logger.info(f"Interrupting the Python code of session {session_id}")
+                worker.interrupted = True
+                worker.process.kill()
+
+    def drop_session(self, session_id: str) -> None:
+        """Forget the namespace of a session."""
+        with self._lock:
+            self._drop_session(session_id)
+
+    def close(self) -> None:
+        """Kill all the workers."""
+        with self._lock:
+            for worker in [*self._workers, *self._retired]:
+                worker.kill()
+            self._workers.clear()
+            self._retired.clear()
+            self._sessions.clear()
+            self._last_used.clear()
+
+    def _get_context(self):
+        if "forkserver" in multiprocessing.get_all_start_methods():
+            context = multiprocessing.get_context("forkserver")
+            # Keep the default preload of the main module, where supported
+            # the workers then don't import it again
+            context.set_forkserver_preload(
+                ["__main__", __name__, *self.preload_modules]
+            )
+            return context
+        return multiprocessing.get_context("spawn")
+
+    def _spawn(self) -> _Worker:
+        return _Worker(
+            self._context, self.preload_modules, self.memory_limit, self.output_chars
+        )
+
+    def _start(self) -> None:
+        if self._context is None:
+            self._context = self._get_context()
+            atexit.register(self.close)
+        while len(self._workers) < self.size:
+            self._workers.append(self._spawn())
+
+    def _acquire(self, session_id: str) -> _Worker:
+        with self._lock:
+            self._start()
+            now = time.monotonic()
+            for expired in [
+                session
+                for session, last_used in self._last_used.items()
+                if now - last_used > self.session_ttl
+            ]:
+                self._drop_session(expired)
+
+            worker = self._sessions.get(session_id)
+            if worker is None:
+                # Spread the sessions over the workers
+                worker = min(self._workers, key=lambda worker: len(worker.sessions))
+                worker.sessions.add(session_id)
+                self._sessions[session_id] = worker
+            self._last_used[session_id] = now
+            return worker
+
+    def _drop_session(self, session_id: str) -> None:
+        worker = self._sessions.pop(session_id, None)
+        self._last_used.pop(session_id, None)
+        if worker is None:
+            return
+        worker.sessions.discard(session_id)
+        worker.dropped.append(session_id)
+        if worker in self._retired and not worker.sessions:
+            self._retired.remove(worker)
+            worker.kill()
+
+    def _replace(self, worker: _Worker) -> None:
+        with self._lock:
+            worker.kill()
+            for session_id in worker.sessions:
+                self._sessions.pop(session_id, None)
+                self._last_used.pop(session_id, None)
+            worker.sessions.clear()
+            if worker in self._retired:
+                self._retired.remove(worker)
+            elif worker in self._workers:
+                self._workers.remove(worker)
+                self._workers.append(self._spawn())
+
+    def _retire(self, worker: _Worker) -> None:
+        with self._lock:
+            if worker not in self._workers:
+                return
+            logger.debug(f"Recycling Python worker after {worker.tasks} executions")
+            self._workers.remove(worker)
+            self._workers.append(self._spawn())
+            if worker.sessions:
+                self._retired.append(worker)
+            else:
+                worker.kill()
+
+    def _exit_reason(self, exitcode: Optional[int]) -> str:
+        if exitcode == -signal.SIGKILL:
+            return "The Python worker was killed, probably out of memory."
+        if hasattr(signal, "SIGXCPU") and exitcode == -signal.SIGXCPU:
+            return f"CPU time limit of {self.cpu_limit} seconds exceeded."
+        return f"The Python worker exited unexpectedly with code {exitcode}."
+
+    def _execute(self, worker: _Worker, session_id: str, code: str) -> ExecutionResult:
+        with self._lock:
+            dropped, worker.dropped = worker.dropped, []
+        try:
+            for dropped_session in dropped:
+                worker.conn.send(("drop", dropped_session, None))
+            worker.running = session_id
+            worker.conn.send(("run", session_id, (code, self.cpu_limit)))
+            if not worker.conn.poll(self.timeout):
+                logger.warning(
+                    f"Python execution timed out after {self.timeout} seconds"
+                )
+                self._replace(worker)
+                return ExecutionResult(
+                    "",
+                    f"Execution timed out after {self.timeout} seconds. {SESSION_LOST}",
+                )
+            stdout, error = worker.conn.recv()
+            worker.running = None
+        except (EOFError, OSError):
+            worker.process.join(timeout=1)
+            if worker.interrupted:
+                reason = "The Python code was interrupted."
+                logger.info(reason)
+            else:
+                reason = self._exit_reason(worker.process.exitcode)
+                logger.warning(reason)
+            self._replace(worker)
+            return ExecutionResult("", f"{reason} {SESSION_LOST}")
+
+        worker.tasks += 1
+        if worker.tasks >= self.max_tasks_per_worker:
+            self._retire(worker)
+        return ExecutionResult(stdout, error)
@@ -0,0 +1,94 @@
+"""The worker processes of `PythonWorkerPool`.
+
+The workers only limit the time and memory of the code they run. They are
+not a sandbox: the code runs as the user of the server, with access to its
+filesystem, network and environment variables, so only run trusted code or
+run the whole server in a container.
+"""
+
+import contextlib
+import os
+from multiprocessing.connection import Connection
+from typing import Optional
+
+from .output import CappedOutput
+
+try:
+    import resource
+except ImportError:  # Not available on Windows, the limits are not enforced there
+    resource = None
+
+
+def preload(modules: list[str]) -> None:
+    """Import the modules that the executed code is expected to use."""
+    for module in modules:
+        try:
+            __import__(module)
+        except ImportError:
+            pass
+
+
+def _set_memory_limit(max_bytes: Optional[int]) -> None:
+    if resource is None or not max_bytes:
+        return
+    _, hard = resource.getrlimit(resource.RLIMIT_AS)
+    if hard != resource.RLIM_INFINITY:
+        max_bytes = min(max_bytes, hard)
+    resource.setrlimit(resource.RLIMIT_AS, (max_bytes, hard))
+
+
+def _set_cpu_limit(seconds: Optional[int]) -> None:
+    """Allow the next execution `seconds` of CPU time, the kernel kills the
+    worker with SIGXCPU beyond that."""
+    if resource is None or not seconds:
+        return
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    used = int(usage.ru_utime + usage.ru_stime) + 1
+    _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+    soft = used + seconds
+    if hard != resource.RLIM_INFINITY:
+        soft = min(soft, hard)
+    resource.setrlimit(resource.RLIMIT_CPU, (soft, hard))
+
+
+def run_worker(
+    conn: Connection,
+    preload_modules: list[str],
+    memory_limit: Optional[int],
+    output_chars: tuple[int, int],
+) -> None:
+    """Main loop of a worker process.
+
+    Messages are `("run", session_id, (code, cpu_limit))`, answered with
+    `(stdout, error)`, and `("drop", session_id, None)` to forget the
+    namespace of a session, which is not answered. Only the head and the
+    tail of the stdout, `output_chars` characters each, are sent back.
+    """
+    # One worker runs one execution at a time, don't let numerical libraries
+    # start a thread per core in every worker
+    for variable in ["OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS"]:
+        os.environ.setdefault(variable, "1")
+    preload(preload_modules)
+    _set_memory_limit(memory_limit)
+
+    namespaces: dict[str, dict] = {}
+    while True:
+        try:
+            command, session_id, payload = conn.recv()
+        except (EOFError, KeyboardInterrupt):
+            break
+        if command == "drop":
+            namespaces.pop(session_id, None)
+            continue
+
+        code, cpu_limit = payload
+        namespace = namespaces.setdefault(session_id, {"__name__": "__main__"})
+        stdout = CappedOutput(*output_chars)
+        _set_cpu_limit(cpu_limit)
+        try:
+            with contextlib.redirect_stdout(stdout):
+                exec(code, namespace)
+            error = None
+        except BaseException as e:
+            error = repr(e)
+        conn.send((stdout.getvalue(), error))
@@ -0,0 +1,234 @@
+import asyncio
+import logging
+import uuid
+from collections import OrderedDict, deque
+from collections.abc import AsyncGenerator
+from contextlib import aclosing
+from typing import Literal, Optional
+
+logger = logging.getLogger(__name__)
+
+# Priority classes, from the first to be admitted to the last
+PRIORITIES = ["high", "normal", "low"]
+Priority = Literal["high", "normal", "low"]
+
+DEFAULT_TENANT = "default"
+
+
+class QueueFullError(Exception):
+    """Raised when the wait queue is full, the request should be retried later."""
+
+
+class Admission:
+    """The place of one workflow in the scheduler, queued or running."""
+
+    def __init__(
+        self,
+        scheduler: "WorkflowScheduler",
+        tenant: str,
+        priority: str,
+        workflow_id: str,
+    ):
+        self.scheduler = scheduler
+        self.tenant = tenant
+        self.priority = priority
+        self.workflow_id = workflow_id
+        self.state: Literal["queued", "running", "released"] = "queued"
+        # Whether the workflow events are streamed, or the workflow was
+        # cancelled before, see `WorkflowScheduler.cancel`
+        self.started = False
+        self.cancelled = False
+        self._changed = asyncio.Event()
+
+    async def stream(self, events: AsyncGenerator[dict, None]):
+        """Wait for a free slot, then stream the workflow events.
+
+        While queued, a `queued` event with the workflow id and then a
+        `queue_position` event on every change of position are sent. The slot
+        is released when the workflow completes or the client goes away. A
+        workflow cancelled before it started only sends `workflow_cancelled`.
+        """
+        try:
+            if self.state == "queued":
+                position = self.scheduler.position(self)
+                yield {
+                    "event": "queued",
+                    "data": {
+                        "workflow_id": self.workflow_id,
+                        "position": position,
+                        "priority": self.priority,
+                    },
+                }
+                while self.state == "queued":
+                    self._changed.clear()
+                    await self._changed.wait()
+                    if self.state != "queued":
+                        break
+                    if (new_position := self.scheduler.position(self)) != position:
+                        position = new_position
+                        yield {
+                            "event": "queue_position",
+                            "data": {"position": position},
+                        }
+            async with aclosing(events):
+                if self.cancelled:
+                    logger.info(f"Workflow {self.workflow_id} cancelled before start")
+                    yield {
+                        "event": "workflow_cancelled",
+                        "data": {"workflow_id": self.workflow_id},
+                    }
+                    return
+                self.started = True
+                async for event in events:
+                    yield event
+        finally:
+            self.scheduler.release(self)
+
+
+class WorkflowScheduler:
+    """Limits the number of concurrently running workflows.
+
+    Workflows over the limit wait in a bounded queue. Higher priority classes
+    are always admitted first, and within a class the tenants take turns, so
+    that a burst from one tenant does not starve the others.
+
+    Args:
+        max_concurrent: Maximum number of running workflows
+        max_queued: Maximum number of waiting workflows, beyond which new
+            workflows are rejected
+    """
+
+    def __init__(self, max_concurrent: int, max_queued: int):
+        self.max_concurrent = max_concurrent
+        self.max_queued = max_queued
+        self.running = 0
+        self.queued = 0
+        # The admissions not released yet, by workflow id
+        self._admissions: dict[str, Admission] = {}
+        # Priority -> tenant -> waiting admissions, tenants in round-robin order
+        self._queues: dict[str, OrderedDict[str, deque[Admission]]] = {
+            priority: OrderedDict() for priority in PRIORITIES
+        }
+
+    def submit(
+        self,
+        tenant: Optional[str] = None,
+        priority: Priority = "normal",
+        workflow_id: Optional[str] = None,
+    ) -> Admission:
+        """Admit a workflow or queue it.
+
+        Args:
+            tenant: The tenant of the workflow, tenants take turns
+            priority: The priority class of the workflow
+            workflow_id: The id of the workflow, a new one by default
+
+        Raises:
+            QueueFullError: If the workflow can not run now and the queue is full
+        """
+        if priority not in PRIORITIES:
+            raise ValueError(f"Unknown priority: {priority}")
+        admission = Admission(
+            self,
+            tenant or DEFAULT_TENANT,
+            priority,
+            workflow_id or str(uuid.uuid4()),
+        )
+        if self.running < self.max_concurrent and not self.queued:
+            admission.state = "running"
+            self.running += 1
+            self._admissions[admission.workflow_id] = admission
+            return admission
+        if self.queued >= self.max_queued:
+            raise QueueFullError(
+                f"Too many workflows, {self.running} running and {self.queued} queued"
+            )
+        self._admissions[admission.workflow_id] = admission
+        self._queues[priority].setdefault(admission.tenant, deque()).append(admission)
+        self.queued += 1
+        logger.info(
+            f"Workflow of tenant {admission.tenant} queued with priority {priority}"
+        )
+        self._notify()
+        return admission
+
+    def release(self, admission: Admission) -> None:
+        """Free the slot or the queue entry of a workflow, and admit the next ones."""
+        if admission.state == "running":
+            self.running -= 1
+        elif admission.state == "queued":
+            tenants = self._queues[admission.priority]
+            tenants[admission.tenant].remove(admission)
+            if not tenants[admission.tenant]:
+                del tenants[admission.tenant]
+            self.queued -= 1
+        admission.state = "released"
+        self._admissions.pop(admission.workflow_id, None)
+        self._dispatch()
+        self._notify()
+
+    def cancel(self, workflow_id: str) -> bool:
+        """Cancel a workflow that is queued, or admitted but not started yet.
+
+        Its stream ends with a `workflow_cancelled` event and its queue entry
+        or slot is freed right away.
+
+        Returns:
+            False if no such workflow is waiting to start, started workflows
+            are cancelled through their graph, see `cancel_workflow`
+        """
+        admission = self._admissions.get(workflow_id)
+        if admission is None or admission.started:
+            return False
+        admission.cancelled = True
+        self.release(admission)
+        admission._changed.set()
+        return True
+
+    def position(self, admission: Admission) -> int:
+        """Return the 1-based position at which a queued workflow will be admitted."""
+        position = 1
+        for priority in PRIORITIES:
+            tenants = self._queues[priority]
+            if priority != admission.priority:
+                position += sum(len(queue) for queue in tenants.values())
+                continue
+            # Tenants take turns: the k-th workflow of a tenant runs after
+            # the first k workflows of every tenant
+            index = tenants[admission.tenant].index(admission)
+            position += sum(min(len(queue), index) for queue in tenants.values())
+            for tenant, queue in tenants.items():
+                if tenant == admission.tenant:
+                    break
+                if len(queue) > index:
+                    position += 1
+            return position
+        return position
+
+    def _pop_next(self) -> Admission:
+        for priority in PRIORITIES:
+            tenants = self._queues[priority]
+            if tenants:
+                tenant, queue = next(iter(tenants.items()))
+                admission = queue.popleft()
+                # Move the tenant to the end of the round robin
+                if queue:
+                    tenants.move_to_end(tenant)
+                else:
+                    del tenants[tenant]
+                self.queued -= 1
+                return admission
+        raise LookupError("No queued workflow")
+
+    def _dispatch(self) -> None:
+        while self.running < self.max_concurrent and self.queued:
+            admission = self._pop_next()
+            admission.state = "running"
+            self.running += 1
+            admission._changed.set()
+
+    def _notify(self) -> None:
+        for tenants in self._queues.values():
+            for queue in tenants.values():
+                for admission in queue:
+                    admission._changed.set()
@@ -0,0 +1,372 @@
+import asyncio
+import logging
+from collections.abc import AsyncGenerator, Iterator
+from typing import Any, Optional
+
+from langchain_community.adapters.openai import convert_message_to_dict
+from langchain_core.messages import BaseMessage
+
+from src.agents.usage import UsageCallbackHandler
+from src.config import TEAM_MEMBERS
+
+logger = logging.getLogger(__name__)
+
+# Agents whose LLM output is streamed to the client
+STREAMING_LLM_AGENTS = [*TEAM_MEMBERS, "planner", "coordinator"]
+
+# Number of coordinator chunks buffered to detect a handoff to the planner
+MAX_CACHE_SIZE = 2
+
+# Maximum number of characters merged into one message event when coalescing
+COALESCE_MAX_CHARS = 4096
+
+
+def tool_call_input(tool_input: Any) -> Any:
+    """The input of a tool call as the LLM wrote it.
+
+    Drops the messages of the agent that LangGraph injects into tools like the
+    crawl tool, they are not part of the call and not JSON serializable.
+    """
+    if not isinstance(tool_input, dict):
+        return tool_input
+    return {
+        key: value
+        for key, value in tool_input.items()
+        if not (
+            isinstance(value, list)
+            and value
+            and all(isinstance(item, BaseMessage) for item in value)
+        )
+    }
+
+
+class WorkflowEventStream:
+    """Translates the LangGraph events of one workflow run into the event
+    stream protocol, see `docs/event-stream-protocol`.
+
+    Holds all the state of a single run, e.g. the coordinator buffer used to
+    hide the handoff to the planner, so concurrent runs never share state.
+    """
+
+    def __init__(
+        self,
+        workflow_id: str,
+        user_input_messages: list,
+        thread_id: Optional[str] = None,
+        resumed: bool = False,
+    ):
+        self.workflow_id = workflow_id
+        self.thread_id = thread_id
+        self.user_input_messages = user_input_messages
+        self.resumed = resumed
+
+        self.coordinator_cache: list[str] = []
+        # A resumed workflow got past the coordinator, or reports its result anyway
+        self.is_handoff_case = resumed
+        self.workflow_started = False
+        # LLM runs that streamed chunks, responses served from the LLM response
+        # cache arrive in one piece and are only seen in on_chat_model_end
+        self.streamed_runs: set[str] = set()
+        self.final_state: Optional[dict] = None
+
+        # Record tokens, latencies and tool time per node and per LLM call
+        self.usage_handler = UsageCallbackHandler()
+
+    def _start_of_workflow(self) -> dict:
+        self.workflow_started = True
+        return {
+            "event": "start_of_workflow",
+            "data": {
+                "workflow_id": self.workflow_id,
+                "thread_id": self.thread_id,
+                "input": self.user_input_messages,
+            },
+        }
+
+    def start(self) -> Iterator[dict]:
+        """Events sent before the graph runs."""
+        if self.resumed:
+            yield self._start_of_workflow()
+
+    def translate(self, event: dict[str, Any]) -> Iterator[dict]:
+        """Translate one LangGraph event into zero or more protocol events."""
+        kind = event.get("event")
+        data = event.get("data")
+        name = event.get("name")
+        metadata = event.get("metadata")
+        node = (
+            ""
+            if (metadata.get("checkpoint_ns") is None)
+            else metadata.get("checkpoint_ns").split(":")[0]
+        )
+        langgraph_step = (
+            ""
+            if (metadata.get("langgraph_step") is None)
+            else str(metadata["langgraph_step"])
+        )
+        run_id = "" if (event.get("run_id") is None) else str(event["run_id"])
+        agent_id = f"{self.workflow_id}_{name}_{langgraph_step}"
+        step_input = data.get("input")
+        if isinstance(step_input, dict) and "step_index" in step_input:
+            # Plan steps running in parallel share the same langgraph step
+            agent_id += f"_{step_input['step_index']}"
+
+        if kind == "on_chain_end" and not event.get("parent_ids"):
+            # The root graph finished
+            self.final_state = data.get("output")
+            return
+
+        if kind == "on_chain_start" and name in STREAMING_LLM_AGENTS:
+            if name == "planner" and not self.workflow_started:
+                yield self._start_of_workflow()
+            yield {
+                "event": "start_of_agent",
+                "data": {
+                    "agent_name": name,
+                    "agent_id": agent_id,
+                },
+            }
+        elif kind == "on_chain_end" and name in STREAMING_LLM_AGENTS:
+            yield {
+                "event": "end_of_agent",
+                "data": {
+                    "agent_name": name,
+                    "agent_id": agent_id,
+                },
+            }
+        elif kind == "on_chat_model_start" and node in STREAMING_LLM_AGENTS:
+            yield {
+                "event": "start_of_llm",
+                "data": {"agent_name": node},
+            }
+        elif kind == "on_chat_model_end":
+            if node in STREAMING_LLM_AGENTS:
+                content = getattr(data.get("output"), "content", None)
+                if (
+                    run_id not in self.streamed_runs
+                    and isinstance(content, str)
+                    and content
+                ):
+                    if node == "coordinator" and content.startswith("handoff"):
+                        self.is_handoff_case = True
+                    else:
+                        yield {
+                            "event": "message",
+                            "data": {
+                                "message_id": data["output"].id,
+                                "delta": {"content": content},
+                            },
+                        }
+                self.streamed_runs.discard(run_id)
+                yield {
+                    "event": "end_of_llm",
+                    "data": {"agent_name": node},
+                }
+            # Also reported for nodes that do not stream, e.g. the supervisor
+            call = self.usage_handler.pop_call(run_id)
+            if call is not None:
+                yield {"event": "llm_usage", "data": {"run_id": run_id, **call}}
+        elif kind == "on_chat_model_stream" and node in STREAMING_LLM_AGENTS:
+            self.streamed_runs.add(run_id)
+            yield from self._translate_chunk(node, data["chunk"])
+        elif kind == "on_tool_start" and node in TEAM_MEMBERS:
+            yield {
+                "event": "tool_call",
+                "data": {
+                    "tool_call_id": f"{self.workflow_id}_{node}_{name}_{run_id}",
+                    "tool_name": name,
+                    "tool_input": tool_call_input(data.get("input")),
+                },
+            }
+        elif (
+            kind == "on_custom_event"
+            and name == "tool_call_progress"
+            and node in TEAM_MEMBERS
+        ):
+            # Dispatched by the tool run, so run_id is the one of the tool call
+            yield {
+                "event": "tool_call_progress",
+                "data": {
+                    "tool_call_id": f"{self.workflow_id}_{node}_{data['tool_name']}_{run_id}",
+                    "tool_name": data["tool_name"],
+                    "stream": data["stream"],
+                    "content": data["content"],
+                },
+            }
+        elif kind == "on_tool_end" and node in TEAM_MEMBERS:
+            yield {
+                "event": "tool_call_result",
+                "data": {
+                    "tool_call_id": f"{self.workflow_id}_{node}_{name}_{run_id}",
+                    "tool_name": name,
+                    "tool_result": data["output"].content if data.get("output") else "",
+                },
+            }
+
+    def _translate_chunk(self, node: str, chunk) -> Iterator[dict]:
+        content = chunk.content
+        if content is None or content == "":
+            if not chunk.additional_kwargs.get("reasoning_content"):
+                # Skip empty messages
+                return
+            yield {
+                "event": "message",
+                "data": {
+                    "message_id": chunk.id,
+                    "delta": {
+                        "reasoning_content": (
+                            chunk.additional_kwargs["reasoning_content"]
+                        )
+                    },
+                },
+            }
+            return
+
+        # Check if the message is from the coordinator
+        if node == "coordinator":
+            if len(self.coordinator_cache) < MAX_CACHE_SIZE:
+                self.coordinator_cache.append(content)
+                cached_content = "".join(self.coordinator_cache)
+                if cached_content.startswith("handoff"):
+                    self.is_handoff_case = True
+                    return
+                if len(self.coordinator_cache) < MAX_CACHE_SIZE:
+                    return
+                # Send the cached message
+                content = cached_content
+            elif self.is_handoff_case:
+                return
+
+        yield {
+            "event": "message",
+            "data": {
+                "message_id": chunk.id,
+                "delta": {"content": content},
+            },
+        }
+
+    def finish(self) -> Iterator[dict]:
+        """Events sent after the graph completed."""
+        usage = self.usage_handler.summary()
+        logger.info(
+            f"Workflow usage: {usage['total']}, prompt cache hit rates: {self.usage_handler.hit_rates()}"
+        )
+        # Sent for every workflow, including the ones the coordinator answered
+        yield {
+            "event": "workflow_usage",
+            "data": {"workflow_id": self.workflow_id, "usage": usage},
+        }
+        if self.is_handoff_case:
+            yield {
+                "event": "end_of_workflow",
+                "data": {
+                    "workflow_id": self.workflow_id,
+                    "messages": [
+                        convert_message_to_dict(msg)
+                        for msg in (self.final_state or {}).get("messages", [])
+                    ],
+                },
+            }
+
+
+def _delta_key(event: dict) -> Optional[tuple[str, str]]:
+    """The message and the kind of text of a message event that can be merged."""
+    if event["event"] != "message":
+        return None
+    data = event["data"]
+    delta = data.get("delta")
+    if len(data) != 2 or not isinstance(delta, dict) or len(delta) != 1:
+        return None
+    ((kind, text),) = delta.items()
+    if not isinstance(text, str):
+        return None
+    return data["message_id"], kind
+
+
+async def coalesce_message_deltas(
+    events: AsyncGenerator[dict, None],
+    window: float,
+    max_chars: int = COALESCE_MAX_CHARS,
+) -> AsyncGenerator[dict, None]:
+    """Merge consecutive deltas of the same message into fewer message events.
+
+    Deltas are held for at most `window` seconds or `max_chars` characters.
+    Any other event sends the held deltas first, so the order of the events
+    does not change.
+
+    Args:
+        events: The events of a workflow
+        window: Maximum time a delta is held, in seconds
+        max_chars: Maximum number of characters merged into one event
+    """
+    loop = asyncio.get_running_loop()
+    # The held message event, its parts and when it has to be sent
+    held: Optional[tuple[str, str]] = None
+    parts: list[str] = []
+    size = 0
+    deadline = 0.0
+    # The next event, awaited in a task while deltas are held
+    pending: Optional[asyncio.Future] = None
+
+    def flush() -> dict:
+        nonlocal held, parts, size
+        message_id, kind = held
+        event = {
+            "event": "message",
+            "data": {"message_id": message_id, "delta": {kind: "".join(parts)}},
+        }
+        held, parts, size = None, [], 0
+        return event
+
+    try:
+        while True:
+            try:
+                if held is None and pending is None:
+                    event = await anext(events)
+                else:
+                    if pending is None:
+                        pending = asyncio.ensure_future(anext(events))
+                    if held is not None:
+                        timeout = max(deadline - loop.time(), 0)
+                        done, _ = await asyncio.wait({pending}, timeout=timeout)
+                        if not done:
+                            yield flush()
+                            continue
+                    task, pending = pending, None
+                    event = await task
+            except StopAsyncIteration:
+                break
+
+            key = _delta_key(event)
+            if key is not None:
+                text = next(iter(event["data"]["delta"].values()))
+                if key == held and size + len(text) <= max_chars:
+                    parts.append(text)
+                    size += len(text)
+                    continue
+                if held is not None:
+                    yield flush()
+                held, parts, size = key, [text], len(text)
+                deadline = loop.time() + window
+                continue
+            if held is not None:
+                yield flush()
+            yield event
+        if held is not None:
+            yield flush()
+    finally:
+        try:
+            if pending is not None:
+                pending.cancel()
+                try:
+                    await pending
+                except asyncio.CancelledError:
+                    # Raised by the cancelled read, unless this task is being
+                    # cancelled as well
+                    if asyncio.current_task().cancelling():
+                        raise
+                except Exception:
+                    # The error of the workflow, which is not read anymore
+                    pass
+        finally:
+            await events.aclose()
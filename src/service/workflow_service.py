@@ -1,7 +1,16 @@
+import asyncio
+import contextlib
 import logging
+from typing import Optional
 
-from src.config import TEAM_MEMBERS
-from src.graph import build_graph
+from src.config import (
+    TEAM_MEMBERS,
+    CHECKPOINT_PATH,
+    CHECKPOINT_MAX_THREADS,
+    CHECKPOINT_MIN_AGE_HOURS,
+)
+from src.graph import SQLiteCheckpointSaver, build_graph
+from src.service.event_stream import WorkflowEventStream
 from langchain_community.adapters.openai import convert_message_to_dict
 import uuid
 
@@ -19,12 +28,28 @@ def enable_debug_logging():
 
 logger = logging.getLogger(__name__)
 
-# Create the graph
-graph = build_graph()
+# Create the graph, checkpointed when a checkpoint database is configured
+checkpointer = (
+    SQLiteCheckpointSaver(
+        CHECKPOINT_PATH,
+        max_threads=CHECKPOINT_MAX_THREADS,
+        min_age=CHECKPOINT_MIN_AGE_HOURS * 3600,
+    )
+    if CHECKPOINT_PATH
+    else None
+)
+graph = build_graph(checkpointer=checkpointer)
+
+# The graph tasks of the workflows running in this process, by workflow id
+running_workflows: dict[str, asyncio.Task] = {}
 
-# Cache for coordinator messages
-coordinator_cache = []
-MAX_CACHE_SIZE = 2
+# Events buffered between the graph and the client, the graph waits for a slow
+# client once the buffer is full
+EVENT_BUFFER_SIZE = 64
+
+# Old checkpoint threads are deleted once every this many completed workflows
+CHECKPOINT_PRUNE_INTERVAL = 100
+_completed_workflows = 0
 
 
 async def run_agent_workflow(
@@ -32,12 +57,22 @@ async def run_agent_workflow(
     debug: bool = False,
     deep_thinking_mode: bool = False,
     search_before_planning: bool = False,
+    parallel_execution: bool = False,
+    follow_plan: bool = False,
+    thread_id: Optional[str] = None,
+    workflow_id: Optional[str] = None,
 ):
     """Run the agent workflow with the given user input.
 
     Args:
         user_input_messages: The user request messages
         debug: If True, enables debug level logging
+        parallel_execution: If True, independent plan steps run in parallel
+        follow_plan: If True, the supervisor routes plan steps in order without
+            an LLM call and only asks the LLM when a step failed or the plan is done
+        thread_id: Checkpoint the workflow under this id, defaults to the
+            workflow id when checkpointing is enabled
+        workflow_id: The id to cancel the workflow with, a new one by default
 
     Returns:
         The final state after the workflow completes
@@ -50,18 +85,18 @@ async def run_agent_workflow(
 
     logger.info(f"Starting workflow with user input: {user_input_messages}")
 
-    workflow_id = str(uuid.uuid4())
-
-    streaming_llm_agents = [*TEAM_MEMBERS, "planner", "coordinator"]
-
-    # Reset coordinator cache at the start of each workflow
-    global coordinator_cache
-    coordinator_cache = []
-    global is_handoff_case
-    is_handoff_case = False
+    workflow_id = workflow_id or str(uuid.uuid4())
+    config = {}
+    if thread_id and checkpointer is None:
+        raise ValueError(
+            "Checkpointing is disabled, set CHECKPOINT_PATH to use threads"
+        )
+    if checkpointer is not None:
+        config = {"configurable": {"thread_id": thread_id or workflow_id}}
+        if thread_id and (await graph.aget_state(config)).values:
+            raise ValueError(f"Thread {thread_id} already exists, resume it instead")
 
-    # TODO: extract message content from object, specifically for on_chat_model_stream
-    async for event in graph.astream_events(
+    async for event in _stream_workflow(
         {
             # Constants
             "TEAM_MEMBERS": TEAM_MEMBERS,
@@ -69,140 +104,171 @@ async def run_agent_workflow(
             "messages": user_input_messages,
             "deep_thinking_mode": deep_thinking_mode,
             "search_before_planning": search_before_planning,
+            "parallel_execution": parallel_execution,
+            "follow_plan": follow_plan,
         },
-        version="v2",
+        config,
+        workflow_id,
+        user_input_messages,
     ):
-        kind = event.get("event")
-        data = event.get("data")
-        name = event.get("name")
-        metadata = event.get("metadata")
-        node = (
-            ""
-            if (metadata.get("checkpoint_ns") is None)
-            else metadata.get("checkpoint_ns").split(":")[0]
+        yield event
+
+
+async def resume_agent_workflow(
+    thread_id: str,
+    checkpoint_id: Optional[str] = None,
+    debug: bool = False,
+    workflow_id: Optional[str] = None,
+):
+    """Resume a checkpointed workflow that failed or was interrupted.
+
+    The nodes that were running at the checkpoint are run again, the nodes that
+    completed before, including parallel plan steps, are not.
+
+    Args:
+        thread_id: The thread the workflow was checkpointed under
+        checkpoint_id: Retry from this checkpoint instead of the latest one
+        debug: If True, enables debug level logging
+        workflow_id: The id to cancel the workflow with, a new one by default
+    """
+    if checkpointer is None:
+        raise ValueError("Checkpointing is disabled, set CHECKPOINT_PATH to resume")
+
+    if debug:
+        enable_debug_logging()
+
+    configurable = {"thread_id": thread_id}
+    if checkpoint_id:
+        configurable["checkpoint_id"] = checkpoint_id
+    state = await graph.aget_state({"configurable": configurable})
+    if not state.values:
+        raise LookupError(f"No checkpoint found for thread {thread_id}")
+    if not state.next:
+        raise ValueError(f"Workflow of thread {thread_id} already completed")
+
+    logger.info(f"Resuming workflow of thread {thread_id} at {list(state.next)}")
+    user_input_messages = [
+        convert_message_to_dict(msg)
+        for msg in state.values.get("messages", [])
+        if not msg.name
+    ]
+    async for event in _stream_workflow(
+        None,
+        {"configurable": configurable},
+        workflow_id or str(uuid.uuid4()),
+        user_input_messages,
+        resumed=True,
+    ):
+        yield event
+
+
+def cancel_workflow(workflow_id: str) -> bool:
+    """Cancel a running workflow, its stream ends with a `workflow_cancelled` event.
+
+    Returns:
+        False if no such workflow is running in this process
+    """
+    task = running_workflows.get(workflow_id)
+    if task is None or task.done():
+        return False
+    task.cancel()
+    return True
+
+
+async def list_workflow_checkpoints(thread_id: str) -> list[dict]:
+    """List the checkpoints of a thread from the newest to the oldest."""
+    if checkpointer is None:
+        raise ValueError(
+            "Checkpointing is disabled, set CHECKPOINT_PATH to use threads"
         )
-        langgraph_step = (
-            ""
-            if (metadata.get("langgraph_step") is None)
-            else str(metadata["langgraph_step"])
+    return [
+        {
+            "checkpoint_id": state.config["configurable"]["checkpoint_id"],
+            "step": state.metadata.get("step"),
+            "completed": list(state.metadata.get("writes") or {}),
+            "next": list(state.next),
+            "created_at": state.created_at,
+        }
+        async for state in graph.aget_state_history(
+            {"configurable": {"thread_id": thread_id}}
         )
-        run_id = "" if (event.get("run_id") is None) else str(event["run_id"])
-
-        if kind == "on_chain_start" and name in streaming_llm_agents:
-            if name == "planner":
-                yield {
-                    "event": "start_of_workflow",
-                    "data": {"workflow_id": workflow_id, "input": user_input_messages},
-                }
-            ydata = {
-                "event": "start_of_agent",
-                "data": {
-                    "agent_name": name,
-                    "agent_id": f"{workflow_id}_{name}_{langgraph_step}",
-                },
-            }
-        elif kind == "on_chain_end" and name in streaming_llm_agents:
-            ydata = {
-                "event": "end_of_agent",
-                "data": {
-                    "agent_name": name,
-                    "agent_id": f"{workflow_id}_{name}_{langgraph_step}",
-                },
-            }
-        elif kind == "on_chat_model_start" and node in streaming_llm_agents:
-            ydata = {
-                "event": "start_of_llm",
-                "data": {"agent_name": node},
-            }
-        elif kind == "on_chat_model_end" and node in streaming_llm_agents:
-            ydata = {
-                "event": "end_of_llm",
-                "data": {"agent_name": node},
-            }
-        elif kind == "on_chat_model_stream" and node in streaming_llm_agents:
-            content = data["chunk"].content
-            if content is None or content == "":
-                if not data["chunk"].additional_kwargs.get("reasoning_content"):
-                    # Skip empty messages
-                    continue
-                ydata = {
-                    "event": "message",
-                    "data": {
-                        "message_id": data["chunk"].id,
-                        "delta": {
-                            "reasoning_content": (
-                                data["chunk"].additional_kwargs["reasoning_content"]
-                            )
-                        },
-                    },
-                }
-            else:
-                # Check if the message is from the coordinator
-                if node == "coordinator":
-                    if len(coordinator_cache) < MAX_CACHE_SIZE:
-                        coordinator_cache.append(content)
-                        cached_content = "".join(coordinator_cache)
-                        if cached_content.startswith("handoff"):
-                            is_handoff_case = True
-                            continue
-                        if len(coordinator_cache) < MAX_CACHE_SIZE:
-                            continue
-                        # Send the cached message
-                        ydata = {
-                            "event": "message",
-                            "data": {
-                                "message_id": data["chunk"].id,
-                                "delta": {"content": cached_content},
-                            },
-                        }
-                    elif not is_handoff_case:
-                        # For other agents, send the message directly
-                        ydata = {
-                            "event": "message",
-                            "data": {
-                                "message_id": data["chunk"].id,
-                                "delta": {"content": content},
-                            },
-                        }
-                else:
-                    # For other agents, send the message directly
-                    ydata = {
-                        "event": "message",
-                        "data": {
-                            "message_id": data["chunk"].id,
-                            "delta": {"content": content},
-                        },
-                    }
-        elif kind == "on_tool_start" and node in TEAM_MEMBERS:
-            ydata = {
-                "event": "tool_call",
-                "data": {
-                    "tool_call_id": f"{workflow_id}_{node}_{name}_{run_id}",
-                    "tool_name": name,
-                    "tool_input": data.get("input"),
-                },
-            }
-        elif kind == "on_tool_end" and node in TEAM_MEMBERS:
-            ydata = {
-                "event": "tool_call_result",
-                "data": {
-                    "tool_call_id": f"{workflow_id}_{node}_{name}_{run_id}",
-                    "tool_name": name,
-                    "tool_result": data["output"].content if data.get("output") else "",
+    ]
+
+
+async def _prune_checkpoints() -> None:
+    global _completed_workflows
+    _completed_workflows += 1
+    if checkpointer is None or _completed_workflows % CHECKPOINT_PRUNE_INTERVAL:
+        return
+    if pruned := await checkpointer.aprune():
+        logger.info(f"Deleted the checkpoints of {pruned} old threads")
+
+
+async def _stream_workflow(
+    graph_input: Optional[dict],
+    config: dict,
+    workflow_id: str,
+    user_input_messages: list,
+    resumed: bool = False,
+):
+    """Run the graph and convert its events to the event stream protocol."""
+    stream = WorkflowEventStream(
+        workflow_id,
+        user_input_messages,
+        thread_id=config.get("configurable", {}).get("thread_id"),
+        resumed=resumed,
+    )
+    start_events = list(stream.start())
+
+    # The graph runs in its own task, so that it can be cancelled from another
+    # request and is cancelled as soon as the client goes away
+    events: asyncio.Queue = asyncio.Queue(maxsize=EVENT_BUFFER_SIZE)
+
+    async def run_graph():
+        try:
+            async for event in graph.astream_events(
+                graph_input,
+                config={
+                    **config,
+                    "callbacks": [stream.usage_handler],
+                    "metadata": {"workflow_id": workflow_id},
                 },
-            }
-        else:
-            continue
-        yield ydata
+                version="v2",
+            ):
+                for ydata in stream.translate(event):
+                    await events.put(ydata)
+        finally:
+            # Marks the end of the events, the queue has room for it when the
+            # client went away, see below
+            await events.put(None)
 
-    if is_handoff_case:
-        yield {
-            "event": "end_of_workflow",
-            "data": {
-                "workflow_id": workflow_id,
-                "messages": [
-                    convert_message_to_dict(msg)
-                    for msg in data["output"].get("messages", [])
-                ],
-            },
-        }
+    # Registered before the start events are sent, so that the workflow can be
+    # cancelled as soon as its client knows its id
+    task = asyncio.create_task(run_graph())
+    running_workflows[workflow_id] = task
+    try:
+        for ydata in start_events:
+            yield ydata
+        while (ydata := await events.get()) is not None:
+            yield ydata
+        if task.cancelled():
+            logger.info(f"Workflow {workflow_id} cancelled")
+            yield {"event": "workflow_cancelled", "data": {"workflow_id": workflow_id}}
+            return
+        # Raise the error of the graph, if any
+        task.result()
+        await _prune_checkpoints()
+    finally:
+        running_workflows.pop(workflow_id, None)
+        if not task.done():
+            # The client went away, stop the LLM calls and tools in flight
+            logger.info(f"Stopping workflow {workflow_id}")
+            task.cancel()
+            # Make room for the end of the events, nobody reads them anymore
+            while not events.empty():
+                events.get_nowait()
+            with contextlib.suppress(asyncio.CancelledError):
+                await task
+
+    for ydata in stream.finish():
+        yield ydata
@@ -1,32 +1,212 @@
+import asyncio
+import codecs
 import logging
-import subprocess
-from typing import Annotated
-from langchain_core.tools import tool
+import os
+import signal
+import time
+from typing import Annotated, Awaitable, Callable, Optional
+from langchain_core.callbacks.manager import adispatch_custom_event
+from langchain_core.tools import StructuredTool
+from src.config.tools import (
+    BASH_OUTPUT_DRAIN_TIMEOUT,
+    BASH_OUTPUT_HEAD_CHARS,
+    BASH_OUTPUT_TAIL_CHARS,
+    BASH_PROGRESS_INTERVAL,
+    BASH_PROGRESS_MAX_CHARS,
+    BASH_TIMEOUT,
+)
+from src.sandbox.output import CappedOutput
 from .decorators import log_io
 
 # Initialize logger
 logger = logging.getLogger(__name__)
 
+OutputCallback = Callable[[str, str], Awaitable[None]]
+
+
+def _kill_process_group(process: asyncio.subprocess.Process) -> None:
+    try:
+        if hasattr(os, "killpg"):
+            os.killpg(process.pid, signal.SIGKILL)
+        else:
+            process.kill()
+    except ProcessLookupError:
+        pass
+
+
+async def _open_pipe() -> tuple[asyncio.StreamReader, asyncio.BaseTransport, int]:
+    """Open a pipe for an output of a command, and return its reader, the
+    transport to close it, and the file descriptor to write to.
+
+    `Process.wait` waits for the pipes opened by the subprocess functions to be
+    closed, and processes left in the background hold them open.
+    """
+    loop = asyncio.get_running_loop()
+    read_fd, write_fd = os.pipe()
+    reader = asyncio.StreamReader(loop=loop)
+    try:
+        transport, _ = await loop.connect_read_pipe(
+            lambda: asyncio.StreamReaderProtocol(reader, loop=loop),
+            os.fdopen(read_fd, "rb", 0),
+        )
+    except BaseException:
+        os.close(write_fd)
+        raise
+    return reader, transport, write_fd
+
+
+async def _read_stream(
+    stream: asyncio.StreamReader,
+    name: str,
+    output: CappedOutput,
+    on_output: Optional[OutputCallback],
+) -> None:
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    # Output is forwarded at most every BASH_PROGRESS_INTERVAL seconds
+    pending = ""
+    last_flush = 0.0
+    while True:
+        wait = None
+        if pending:
+            wait = max(last_flush + BASH_PROGRESS_INTERVAL - time.monotonic(), 0)
+        try:
+            data = await asyncio.wait_for(stream.read(4096), wait)
+        except asyncio.TimeoutError:
+            data = None
+        if data is not None:
+            text = decoder.decode(data, final=not data)
+            output.write(text)
+            if on_output is not None:
+                pending += text
+        if pending and (
+            not data or time.monotonic() - last_flush >= BASH_PROGRESS_INTERVAL
+        ):
+            await on_output(name, pending)
+            pending = ""
+            last_flush = time.monotonic()
+        if data == b"":
+            return
+
+
+async def run_command(
+    cmd: str,
+    timeout: float = BASH_TIMEOUT,
+    on_output: Optional[OutputCallback] = None,
+) -> str:
+    """Run a shell command and return its output, or a description of its failure.
+
+    The command runs in its own process group, which is killed as a whole when
+    the command times out or the caller is cancelled. The command is done when
+    the shell exits, processes it left in the background, e.g. `server &`, keep
+    running. Only the head and the tail of long outputs are kept.
+
+    Args:
+        cmd: The shell command
+        timeout: Wall time limit, in seconds
+        on_output: Called with the stream name and new text as the output comes
+    """
+    stdout = CappedOutput(BASH_OUTPUT_HEAD_CHARS, BASH_OUTPUT_TAIL_CHARS)
+    stderr = CappedOutput(BASH_OUTPUT_HEAD_CHARS, BASH_OUTPUT_TAIL_CHARS)
+    pipes: list[tuple[asyncio.StreamReader, asyncio.BaseTransport, int]] = []
+    try:
+        for _ in range(2):
+            pipes.append(await _open_pipe())
+        process = await asyncio.create_subprocess_shell(
+            cmd,
+            stdin=asyncio.subprocess.DEVNULL,
+            stdout=pipes[0][2],
+            stderr=pipes[1][2],
+            start_new_session=True,
+        )
+    except BaseException:
+        for _, transport, _ in pipes:
+            transport.close()
+        raise
+    finally:
+        # The command has its own copies of the write ends
+        for _, _, write_fd in pipes:
+            os.close(write_fd)
+    (stdout_reader, stdout_pipe, _), (stderr_reader, stderr_pipe, _) = pipes
+
+    readers = [
+        asyncio.create_task(_read_stream(stdout_reader, "stdout", stdout, on_output)),
+        asyncio.create_task(_read_stream(stderr_reader, "stderr", stderr, on_output)),
+    ]
+    try:
+        try:
+            await asyncio.wait_for(process.wait(), timeout)
+        except asyncio.TimeoutError:
+            _kill_process_group(process)
+            await process.wait()
+            await asyncio.wait(readers, timeout=BASH_OUTPUT_DRAIN_TIMEOUT)
+            error_message = f"Command timed out after {timeout} seconds and was killed.\nStdout: {stdout.getvalue()}\nStderr: {stderr.getvalue()}"
+            logger.error(error_message)
+            return error_message
+        # Background processes keep the pipes open, so their end of file can
+        # not be waited for
+        await asyncio.wait(readers, timeout=BASH_OUTPUT_DRAIN_TIMEOUT)
+    except BaseException:
+        # Don't leave the command running when the workflow is cancelled
+        _kill_process_group(process)
+        raise
+    finally:
+        for reader in readers:
+            reader.cancel()
+        await asyncio.gather(*readers, return_exceptions=True)
+        stdout_pipe.close()
+        stderr_pipe.close()
+
+    if process.returncode != 0:
+        error_message = f"Command failed with exit code {process.returncode}.\nStdout: {stdout.getvalue()}\nStderr: {stderr.getvalue()}"
+        logger.error(error_message)
+        return error_message
+    # Return stdout as the result
+    return stdout.getvalue()
+
+
+class _ProgressForwarder:
+    """Sends the output of a command as `tool_call_progress` events, up to
+    `BASH_PROGRESS_MAX_CHARS` characters."""
+
+    def __init__(self):
+        self.sent = 0
+
+    async def __call__(self, stream: str, text: str) -> None:
+        if self.sent >= BASH_PROGRESS_MAX_CHARS:
+            return
+        text = text[: BASH_PROGRESS_MAX_CHARS - self.sent]
+        self.sent += len(text)
+        if self.sent >= BASH_PROGRESS_MAX_CHARS:
+            text += "\n[... further output is not streamed]\n"
+        await adispatch_custom_event(
+            "tool_call_progress",
+            {"tool_name": "bash_tool", "stream": stream, "content": text},
+        )
+
 
-@tool
 @log_io
-def bash_tool(
+async def abash(
     cmd: Annotated[str, "The bash command to be executed."],
-):
+) -> str:
     """Use this to execute bash command and do necessary operations."""
     logger.info(f"Executing Bash Command: {cmd}")
     try:
-        # Execute the command and capture output
-        result = subprocess.run(
-            cmd, shell=True, check=True, text=True, capture_output=True
-        )
-        # Return stdout as the result
-        return result.stdout
-    except subprocess.CalledProcessError as e:
-        # If command fails, return error information
-        error_message = f"Command failed with exit code {e.returncode}.\nStdout: {e.stdout}\nStderr: {e.stderr}"
+        return await run_command(cmd, on_output=_ProgressForwarder())
+    except Exception as e:
+        # Catch any other exceptions
+        error_message = f"Error executing command: {str(e)}"
         logger.error(error_message)
         return error_message
+
+
+@log_io
+def bash(
+    cmd: Annotated[str, "The bash command to be executed."],
+) -> str:
+    """Use this to execute bash command and do necessary operations."""
+    logger.info(f"Executing Bash Command: {cmd}")
+    try:
+        return asyncio.run(run_command(cmd))
     except Exception as e:
         # Catch any other exceptions
         error_message = f"Error executing command: {str(e)}"
@@ -34,5 +214,8 @@ def bash_tool(
         return error_message
 
 
+bash_tool = StructuredTool.from_function(func=bash, coroutine=abash, name="bash_tool")
+
+
 if __name__ == "__main__":
     print(bash_tool.invoke("ls -all"))
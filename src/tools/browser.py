@@ -1,21 +1,44 @@
-import asyncio
+import functools
 
+from langchain_core.language_models import BaseChatModel
 from pydantic import BaseModel, Field
-from typing import Optional, ClassVar, Type
+from typing import TYPE_CHECKING, Optional, ClassVar, Type
 from langchain.tools import BaseTool
-from browser_use import AgentHistoryList, Browser, BrowserConfig
-from browser_use import Agent as BrowserAgent
-from src.agents.llm import vl_llm
+from src.tools.browser_pool import BrowserPool
 from src.tools.decorators import create_logged_tool
-from src.config import CHROME_INSTANCE_PATH
+from src.config import CHROME_INSTANCE_PATH, VL_API_KEY, VL_BASE_URL, VL_MODEL
+from src.config.tools import (
+    BROWSER_POOL_IDLE_TIMEOUT,
+    BROWSER_POOL_LEASE_TIMEOUT,
+    BROWSER_POOL_MAX_LEASES,
+    BROWSER_POOL_MAX_SIZE,
+    BROWSER_POOL_MIN_IDLE,
+)
 
-expected_browser = None
+if TYPE_CHECKING:
+    from browser_use import Browser
+    from browser_use.browser.context import BrowserContext
+
+
+def create_browser() -> "Browser":
+    # browser_use takes seconds to import, so it is only imported on first use
+    from browser_use import Browser, BrowserConfig
+
+    # Use Chrome instance if specified
+    if CHROME_INSTANCE_PATH:
+        return Browser(config=BrowserConfig(chrome_instance_path=CHROME_INSTANCE_PATH))
+    return Browser()
 
-# Use Chrome instance if specified
-if CHROME_INSTANCE_PATH:
-    expected_browser = Browser(
-        config=BrowserConfig(chrome_instance_path=CHROME_INSTANCE_PATH)
-    )
+
+# Browsers are launched on first use and shared by all the browser tool calls
+browser_pool = BrowserPool(
+    create_browser,
+    max_size=BROWSER_POOL_MAX_SIZE,
+    min_idle=BROWSER_POOL_MIN_IDLE,
+    idle_timeout=BROWSER_POOL_IDLE_TIMEOUT,
+    lease_timeout=BROWSER_POOL_LEASE_TIMEOUT,
+    max_leases=BROWSER_POOL_MAX_LEASES,
+)
 
 
 class BrowserUseInput(BaseModel):
@@ -31,41 +54,51 @@ class BrowserTool(BaseTool):
         "Use this tool to interact with web browsers. Input should be a natural language description of what you want to do with the browser, such as 'Go to google.com and search for browser-use', or 'Navigate to Reddit and find the top post about AI'."
     )
 
-    _agent: Optional[BrowserAgent] = None
+    _llm: Optional[BaseChatModel] = None
+
+    def _get_llm(self):
+        # Imported here as src.agents imports the tools, see src/agents/agents.py
+        from src.agents.llm import create_openai_llm
+
+        # The agent runs in the browser pool loop, which gets its own client as
+        # HTTP connections can not be shared between event loops
+        if self._llm is None:
+            self._llm = create_openai_llm(
+                model=VL_MODEL, base_url=VL_BASE_URL, api_key=VL_API_KEY
+            )
+        return self._llm
+
+    async def _run_agent(
+        self, instruction: str, browser: "Browser", context: "BrowserContext"
+    ) -> str:
+        from browser_use import AgentHistoryList
+        from browser_use import Agent as BrowserAgent
+
+        agent = BrowserAgent(
+            task=instruction,
+            llm=self._get_llm(),
+            browser=browser,
+            browser_context=context,
+        )
+        result = await agent.run()
+        return (
+            str(result)
+            if not isinstance(result, AgentHistoryList)
+            else result.final_result() or ""
+        )
 
     def _run(self, instruction: str) -> str:
         """Run the browser task synchronously."""
-        self._agent = BrowserAgent(
-            task=instruction,  # Will be set per request
-            llm=vl_llm,
-            browser=expected_browser,
-        )
         try:
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            try:
-                result = loop.run_until_complete(self._agent.run())
-                return (
-                    str(result)
-                    if not isinstance(result, AgentHistoryList)
-                    else result.final_result
-                )
-            finally:
-                loop.close()
+            return browser_pool.run(functools.partial(self._run_agent, instruction))
         except Exception as e:
             return f"Error executing browser task: {str(e)}"
 
     async def _arun(self, instruction: str) -> str:
         """Run the browser task asynchronously."""
-        self._agent = BrowserAgent(
-            task=instruction, llm=vl_llm  # Will be set per request
-        )
         try:
-            result = await self._agent.run()
-            return (
-                str(result)
-                if not isinstance(result, AgentHistoryList)
-                else result.final_result
+            return await browser_pool.arun(
+                functools.partial(self._run_agent, instruction)
             )
         except Exception as e:
             return f"Error executing browser task: {str(e)}"
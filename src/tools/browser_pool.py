@@ -0,0 +1,320 @@
+import asyncio
+import atexit
+import concurrent.futures
+import logging
+import threading
+import time
+from contextlib import asynccontextmanager
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Coroutine,
+    Optional,
+    TypeVar,
+)
+
+if TYPE_CHECKING:
+    from browser_use import Browser
+    from browser_use.browser.context import BrowserContext
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class _Instance:
+    def __init__(self, browser: "Browser"):
+        self.browser = browser
+        # A fresh context, opened ahead of the next lease
+        self.context: Optional["BrowserContext"] = None
+        self.leases = 0
+        self.last_used = time.monotonic()
+
+
+class BrowserPool:
+    """A pool of launched browsers, leased to one task at a time.
+
+    Playwright objects belong to the event loop that created them, so the pool
+    runs its own event loop in a background thread, and tasks are submitted
+    to it from both sync and async code. Every lease gets a fresh browser
+    context opened ahead of time, so tasks don't share cookies or pages.
+
+    Browsers are checked before every lease and replaced when they
+    disconnected, recycled after `max_leases` leases, and closed after
+    `idle_timeout` seconds unused, except for `min_idle` browsers kept warm.
+
+    Args:
+        browser_factory: Creates a browser, not launched yet
+        max_size: Maximum number of browsers
+        min_idle: Number of browsers launched ahead and kept when idle
+        idle_timeout: Idle time after which a browser is closed, in seconds
+        lease_timeout: Maximum wait for a free browser, in seconds
+        max_leases: Number of leases after which a browser is replaced
+    """
+
+    def __init__(
+        self,
+        browser_factory: Callable[[], "Browser"],
+        max_size: int,
+        min_idle: int = 1,
+        idle_timeout: float = 5 * 60,
+        lease_timeout: float = 2 * 60,
+        max_leases: int = 50,
+    ):
+        self.browser_factory = browser_factory
+        self.max_size = max_size
+        self.min_idle = min(min_idle, max_size)
+        self.idle_timeout = idle_timeout
+        self.lease_timeout = lease_timeout
+        self.max_leases = max_leases
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_lock = threading.Lock()
+        # The state below is only used from the pool loop
+        self._condition: Optional[asyncio.Condition] = None
+        # Most recently used last
+        self._idle: list[_Instance] = []
+        # Browsers leased, idle, or being launched or recycled
+        self._size = 0
+        # Browsers being launched ahead
+        self._warming = 0
+        # Browsers leased or being recycled
+        self._busy: set[_Instance] = set()
+        # Background launches, recycles and closes, kept from garbage collection
+        self._tasks: set[asyncio.Task] = set()
+        self._reaper: Optional[asyncio.Task] = None
+        self._closing = False
+
+    def submit(
+        self, task: Callable[["Browser", "BrowserContext"], Awaitable[T]]
+    ) -> concurrent.futures.Future:
+        """Run `task(browser, context)` on a leased browser in the pool loop.
+
+        Returns a future for its result, see `asyncio.wrap_future` to await
+        it from another event loop.
+        """
+        return asyncio.run_coroutine_threadsafe(self._run(task), self._get_loop())
+
+    def run(self, task: Callable[["Browser", "BrowserContext"], Awaitable[T]]) -> T:
+        """Run a task and wait for its result, from sync code."""
+        return self.submit(task).result()
+
+    async def arun(
+        self, task: Callable[["Browser", "BrowserContext"], Awaitable[T]]
+    ) -> T:
+        """Run a task and wait for its result, from async code."""
+        return await asyncio.wrap_future(self.submit(task))
+
+    def close(self, timeout: float = 10) -> None:
+        """Close all the browsers, leased ones included, and stop the pool loop."""
+        with self._loop_lock:
+            loop, self._loop = self._loop, None
+        if loop is None:
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self._close(), loop).result(timeout)
+        except Exception as e:
+            logger.warning(f"Failed to close the browser pool: {repr(e)}")
+        loop.call_soon_threadsafe(loop.stop)
+
+    def _get_loop(self) -> asyncio.AbstractEventLoop:
+        with self._loop_lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(
+                    target=loop.run_forever, name="browser-pool", daemon=True
+                ).start()
+                asyncio.run_coroutine_threadsafe(self._start(), loop).result()
+                self._loop = loop
+                atexit.register(self.close)
+            return self._loop
+
+    async def _start(self) -> None:
+        self._condition = asyncio.Condition()
+        self._closing = False
+        self._reaper = asyncio.create_task(self._reap())
+        # Launch the warm browsers in the background
+        for _ in range(self.min_idle):
+            self._size += 1
+            self._warming += 1
+            self._spawn(self._add_idle())
+
+    def _spawn(self, coro: Coroutine[Any, Any, None]) -> None:
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(
+        self, task: Callable[["Browser", "BrowserContext"], Awaitable[T]]
+    ) -> T:
+        async with self._lease() as instance:
+            return await task(instance.browser, instance.context)
+
+    @asynccontextmanager
+    async def _lease(self) -> AsyncIterator[_Instance]:
+        instance = await self._acquire()
+        try:
+            yield instance
+        finally:
+            instance.leases += 1
+            instance.last_used = time.monotonic()
+            # Open the context of the next lease without holding up this one
+            self._spawn(self._recycle(instance))
+
+    async def _acquire(self) -> _Instance:
+        deadline = time.monotonic() + self.lease_timeout
+        async with self._condition:
+            while True:
+                while self._idle:
+                    instance = self._idle.pop()
+                    if self._is_healthy(instance):
+                        self._busy.add(instance)
+                        return instance
+                    logger.warning("Replacing a disconnected browser")
+                    self._size -= 1
+                    self._spawn(self._close_instance(instance))
+                # Rather wait for a browser launched ahead than launch another
+                if self._size < self.max_size and not self._warming:
+                    self._size += 1
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError(
+                        f"No browser available after {self.lease_timeout} seconds"
+                    )
+                try:
+                    await asyncio.wait_for(self._condition.wait(), remaining)
+                except asyncio.TimeoutError:
+                    pass
+        try:
+            instance = await self._launch()
+        except BaseException:
+            await self._remove()
+            raise
+        self._busy.add(instance)
+        return instance
+
+    async def _launch(self) -> _Instance:
+        logger.info("Launching a browser")
+        instance = _Instance(self.browser_factory())
+        try:
+            await instance.browser.get_playwright_browser()
+            await self._open_context(instance)
+        except BaseException:
+            await self._close_instance(instance)
+            raise
+        return instance
+
+    async def _open_context(self, instance: _Instance) -> None:
+        context = await instance.browser.new_context(
+            instance.browser.config.new_context_config
+        )
+        # Opens the Playwright context and its first page
+        await context.get_session()
+        instance.context = context
+
+    def _is_healthy(self, instance: _Instance) -> bool:
+        browser = instance.browser.playwright_browser
+        return (
+            browser is not None
+            and browser.is_connected()
+            and instance.context is not None
+        )
+
+    async def _add_idle(self) -> None:
+        try:
+            instance = await self._launch()
+        except Exception as e:
+            logger.warning(f"Failed to launch a browser: {repr(e)}")
+            instance = None
+        async with self._condition:
+            self._warming -= 1
+            if instance is None:
+                self._size -= 1
+            else:
+                self._idle.append(instance)
+            self._condition.notify_all()
+
+    async def _recycle(self, instance: _Instance) -> None:
+        context, instance.context = instance.context, None
+        try:
+            if context is not None:
+                await context.close()
+            if instance.leases < self.max_leases:
+                await self._open_context(instance)
+        except Exception as e:
+            logger.warning(f"Failed to reset a browser: {repr(e)}")
+        if self._is_healthy(instance) and not self._closing:
+            async with self._condition:
+                self._busy.discard(instance)
+                self._idle.append(instance)
+                self._condition.notify()
+            return
+        self._busy.discard(instance)
+        await self._close_instance(instance)
+        await self._remove()
+        if self._size < self.min_idle and not self._closing:
+            self._size += 1
+            self._warming += 1
+            await self._add_idle()
+
+    async def _remove(self) -> None:
+        """Give back the place of a browser that is gone."""
+        async with self._condition:
+            self._size -= 1
+            # Wakes up the pool closing as well as the tasks waiting for a lease
+            self._condition.notify_all()
+
+    async def _close_instance(self, instance: _Instance) -> None:
+        try:
+            if instance.context is not None:
+                await instance.context.close()
+            await instance.browser.close()
+        except Exception as e:
+            logger.warning(f"Failed to close a browser: {repr(e)}")
+
+    async def _evict_idle(self) -> None:
+        now = time.monotonic()
+        async with self._condition:
+            # The least recently used browsers go first
+            expired = [
+                instance
+                for instance in self._idle[: max(len(self._idle) - self.min_idle, 0)]
+                if now - instance.last_used > self.idle_timeout
+            ]
+            for instance in expired:
+                self._idle.remove(instance)
+                self._size -= 1
+        for instance in expired:
+            logger.info("Closing an idle browser")
+            await self._close_instance(instance)
+
+    async def _reap(self) -> None:
+        while True:
+            await asyncio.sleep(min(self.idle_timeout / 2, 30))
+            await self._evict_idle()
+
+    async def _close(self) -> None:
+        self._closing = True
+        if self._reaper is not None:
+            self._reaper.cancel()
+        # Close the leased browsers under their tasks, which then fail and end
+        # their leases
+        await asyncio.gather(
+            *(self._close_instance(instance) for instance in list(self._busy))
+        )
+        async with self._condition:
+            await self._condition.wait_for(lambda: not self._busy)
+        # Let the launches and recycles under way finish
+        while pending := [task for task in self._tasks if not task.done()]:
+            await asyncio.gather(*pending, return_exceptions=True)
+        idle, self._idle = self._idle, []
+        self._size -= len(idle)
+        await asyncio.gather(*(self._close_instance(instance) for instance in idle))
+
+    def stats(self) -> dict[str, Any]:
+        """Number of browsers, and of idle ones among them."""
+        return {"size": self._size, "idle": len(self._idle)}
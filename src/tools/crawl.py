@@ -1,26 +1,91 @@
 import logging
-from typing import Annotated
+from typing import Annotated, Optional
 
-from langchain_core.messages import HumanMessage
-from langchain_core.tools import tool
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.tools import StructuredTool
+from langgraph.prebuilt import InjectedState
 from .decorators import log_io
 
-from src.crawler import Crawler
+from src.config import CRAWLER_CACHE_PATH
+from src.crawler import CrawlCache, Crawler
 
 logger = logging.getLogger(__name__)
 
+# Shared crawler so HTTP connections are reused between tool calls
+crawler = Crawler(cache=CrawlCache(CRAWLER_CACHE_PATH) if CRAWLER_CACHE_PATH else None)
+
+
+def research_query(messages: Optional[list]) -> Optional[str]:
+    """The query the agent is researching: its last search, else its task.
+
+    The task is the step instruction of the scheduler, else the request of the
+    user, never the plan or the responses of other agents.
+    """
+    for message in reversed(messages or []):
+        if isinstance(message, AIMessage):
+            for tool_call in reversed(message.tool_calls):
+                if tool_call["name"] == "tavily_search" and tool_call["args"].get(
+                    "query"
+                ):
+                    return tool_call["args"]["query"]
+    for message in reversed(messages or []):
+        if (
+            isinstance(message, HumanMessage)
+            and message.name in (None, "scheduler")
+            and isinstance(message.content, str)
+        ):
+            return message.content
+    return None
+
 
-@tool
 @log_io
-def crawl_tool(
+def crawl(
     url: Annotated[str, "The url to crawl."],
+    query: Annotated[
+        Optional[str],
+        "What to look for in the page, long pages are cut to the passages most "
+        "relevant to it. Defaults to the last search query.",
+    ] = None,
+    full_text: Annotated[
+        bool, "Return the whole page, e.g. to read a page cut before."
+    ] = False,
+    messages: Annotated[Optional[list], InjectedState("messages")] = None,
 ) -> HumanMessage:
     """Use this to crawl a url and get a readable content in markdown format."""
     try:
-        crawler = Crawler()
         article = crawler.crawl(url)
-        return {"role": "user", "content": article.to_message()}
+        query = None if full_text else query or research_query(messages)
+        return {"role": "user", "content": article.to_message(query)}
     except BaseException as e:
         error_msg = f"Failed to crawl. Error: {repr(e)}"
         logger.error(error_msg)
         return error_msg
+
+
+@log_io
+async def acrawl(
+    url: Annotated[str, "The url to crawl."],
+    query: Annotated[
+        Optional[str],
+        "What to look for in the page, long pages are cut to the passages most "
+        "relevant to it. Defaults to the last search query.",
+    ] = None,
+    full_text: Annotated[
+        bool, "Return the whole page, e.g. to read a page cut before."
+    ] = False,
+    messages: Annotated[Optional[list], InjectedState("messages")] = None,
+) -> HumanMessage:
+    """Use this to crawl a url and get a readable content in markdown format."""
+    try:
+        article = await crawler.acrawl(url)
+        query = None if full_text else query or research_query(messages)
+        return {"role": "user", "content": article.to_message(query)}
+    except Exception as e:
+        error_msg = f"Failed to crawl. Error: {repr(e)}"
+        logger.error(error_msg)
+        return error_msg
+
+
+crawl_tool = StructuredTool.from_function(
+    func=crawl, coroutine=acrawl, name="crawl_tool"
+)
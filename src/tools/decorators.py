@@ -1,5 +1,6 @@
 import logging
 import functools
+import inspect
 from typing import Any, Callable, Type, TypeVar
 
 logger = logging.getLogger(__name__)
@@ -10,6 +11,7 @@ T = TypeVar("T")
 def log_io(func: Callable) -> Callable:
     """
     A decorator that logs the input parameters and output of a tool function.
+    Both regular and coroutine functions are supported.
 
     Args:
         func: The tool function to be decorated
@@ -18,20 +20,40 @@ def log_io(func: Callable) -> Callable:
         The wrapped function with input/output logging
     """
 
+    def log_input(*args: Any, **kwargs: Any) -> None:
+        # Formatting the parameters is costly, e.g. for large tool inputs
+        if not logger.isEnabledFor(logging.DEBUG):
+            return
+        params = ", ".join(
+            [
+                *(str(arg) for arg in args),
+                # The injected graph messages would log the whole conversation
+                *(f"{k}={v}" for k, v in kwargs.items() if k != "messages"),
+            ]
+        )
+        logger.debug("Tool %s called with parameters: %s", func.__name__, params)
+
+    if inspect.iscoroutinefunction(func):
+
+        @functools.wraps(func)
+        async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+            log_input(*args, **kwargs)
+            result = await func(*args, **kwargs)
+            logger.debug("Tool %s returned: %s", func.__name__, result)
+            return result
+
+        return async_wrapper
+
     @functools.wraps(func)
     def wrapper(*args: Any, **kwargs: Any) -> Any:
         # Log input parameters
-        func_name = func.__name__
-        params = ", ".join(
-            [*(str(arg) for arg in args), *(f"{k}={v}" for k, v in kwargs.items())]
-        )
-        logger.debug(f"Tool {func_name} called with parameters: {params}")
+        log_input(*args, **kwargs)
 
         # Execute the function
         result = func(*args, **kwargs)
 
         # Log the output
-        logger.debug(f"Tool {func_name} returned: {result}")
+        logger.debug("Tool %s returned: %s", func.__name__, result)
 
         return result
 
@@ -43,18 +65,35 @@ class LoggedToolMixin:
 
     def _log_operation(self, method_name: str, *args: Any, **kwargs: Any) -> None:
         """Helper method to log tool operations."""
+        if not logger.isEnabledFor(logging.DEBUG):
+            return
         tool_name = self.__class__.__name__.replace("Logged", "")
         params = ", ".join(
             [*(str(arg) for arg in args), *(f"{k}={v}" for k, v in kwargs.items())]
         )
-        logger.debug(f"Tool {tool_name}.{method_name} called with parameters: {params}")
+        logger.debug(
+            "Tool %s.%s called with parameters: %s", tool_name, method_name, params
+        )
 
     def _run(self, *args: Any, **kwargs: Any) -> Any:
         """Override _run method to add logging."""
         self._log_operation("_run", *args, **kwargs)
         result = super()._run(*args, **kwargs)
         logger.debug(
-            f"Tool {self.__class__.__name__.replace('Logged', '')} returned: {result}"
+            "Tool %s returned: %s",
+            self.__class__.__name__.replace("Logged", ""),
+            result,
+        )
+        return result
+
+    async def _arun(self, *args: Any, **kwargs: Any) -> Any:
+        """Override _arun method to add logging."""
+        self._log_operation("_arun", *args, **kwargs)
+        result = await super()._arun(*args, **kwargs)
+        logger.debug(
+            "Tool %s returned: %s",
+            self.__class__.__name__.replace("Logged", ""),
+            result,
         )
         return result
 
@@ -1,30 +1,90 @@
+import asyncio
 import logging
 from typing import Annotated
-from langchain_core.tools import tool
-from langchain_experimental.utilities import PythonREPL
+from langchain_core.runnables import RunnableConfig
+from langchain_core.tools import StructuredTool
+from src.config.tools import (
+    REPL_CPU_LIMIT,
+    REPL_MAX_TASKS_PER_WORKER,
+    REPL_MEMORY_LIMIT,
+    REPL_OUTPUT_HEAD_CHARS,
+    REPL_OUTPUT_TAIL_CHARS,
+    REPL_POOL_SIZE,
+    REPL_PRELOAD_MODULES,
+    REPL_SESSION_TTL,
+    REPL_TIMEOUT,
+)
+from src.sandbox import ExecutionResult, PythonWorkerPool
 from .decorators import log_io
 
-# Initialize REPL and logger
-repl = PythonREPL()
+# Initialize the worker pool, started on first use, and logger
+repl_pool = PythonWorkerPool(
+    size=REPL_POOL_SIZE,
+    timeout=REPL_TIMEOUT,
+    cpu_limit=REPL_CPU_LIMIT,
+    memory_limit=REPL_MEMORY_LIMIT,
+    max_tasks_per_worker=REPL_MAX_TASKS_PER_WORKER,
+    session_ttl=REPL_SESSION_TTL,
+    preload_modules=REPL_PRELOAD_MODULES,
+    output_head_chars=REPL_OUTPUT_HEAD_CHARS,
+    output_tail_chars=REPL_OUTPUT_TAIL_CHARS,
+)
 logger = logging.getLogger(__name__)
 
 
-@tool
+def _session_id(config: RunnableConfig) -> str:
+    # Each workflow has its own namespace, kept when a checkpointed run resumes
+    metadata = config.get("metadata") or {}
+    return metadata.get("thread_id") or metadata.get("workflow_id", "default")
+
+
+def _format_result(code: str, result: ExecutionResult) -> str:
+    if result.error:
+        error_msg = f"Failed to execute. Error: {result.error}"
+        if result.stdout:
+            error_msg += f"\nStdout: {result.stdout}"
+        logger.error(error_msg)
+        return error_msg
+    logger.info("Code execution successful")
+    result_str = (
+        f"Successfully executed:\n```python\n{code}\n```\nStdout: {result.stdout}"
+    )
+    return result_str
+
+
+@log_io
+def python_repl(
+    code: Annotated[
+        str, "The python code to execute to do further analysis or calculation."
+    ],
+    config: RunnableConfig,
+):
+    """Use this to execute python code and do data analysis or calculation. If you want to see the output of a value,
+    you should print it out with `print(...)`. This is visible to the user."""
+    logger.info("Executing Python code")
+    return _format_result(code, repl_pool.run(_session_id(config), code))
+
+
 @log_io
-def python_repl_tool(
+async def apython_repl(
     code: Annotated[
         str, "The python code to execute to do further analysis or calculation."
     ],
+    config: RunnableConfig,
 ):
     """Use this to execute python code and do data analysis or calculation. If you want to see the output of a value,
     you should print it out with `print(...)`. This is visible to the user."""
     logger.info("Executing Python code")
+    session_id = _session_id(config)
     try:
-        result = repl.run(code)
-        logger.info("Code execution successful")
-    except BaseException as e:
-        error_msg = f"Failed to execute. Error: {repr(e)}"
-        logger.error(error_msg)
-        return error_msg
-    result_str = f"Successfully executed:\n```python\n{code}\n```\nStdout: {result}"
-    return result_str
+        result = await asyncio.to_thread(repl_pool.run, session_id, code)
+    except asyncio.CancelledError:
+        # The workflow was cancelled, don't let the code run on
+        repl_pool.interrupt(session_id)
+        raise
+    return _format_result(code, result)
+
+
+python_repl_tool = StructuredTool.from_function(
+    func=python_repl, coroutine=apython_repl, name="python_repl_tool"
+)
@@ -1,10 +1,131 @@
+import asyncio
 import logging
+import threading
+from typing import Any
+
 from langchain_community.tools.tavily_search import TavilySearchResults
-from src.config import TAVILY_MAX_RESULTS
+from pydantic import PrivateAttr
+
+from src.config import TAVILY_CACHE_PATH, TAVILY_MAX_RESULTS
+from src.config.tools import (
+    TAVILY_CACHE_MAX_ENTRIES,
+    TAVILY_CACHE_TTL,
+    TAVILY_INFLIGHT_TIMEOUT,
+)
 from .decorators import create_logged_tool
+from .search_cache import SearchCache, normalize_query
 
 logger = logging.getLogger(__name__)
 
 # Initialize Tavily search tool with logging
 LoggedTavilySearch = create_logged_tool(TavilySearchResults)
-tavily_tool = LoggedTavilySearch(name="tavily_search", max_results=TAVILY_MAX_RESULTS)
+
+
+class CachedTavilySearch(LoggedTavilySearch):
+    """Tavily search that memoizes results by normalized query and coalesces
+    identical searches that are in flight at the same time."""
+
+    _cache: SearchCache = PrivateAttr()
+    _lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+    _inflight: dict[str, threading.Event] = PrivateAttr(default_factory=dict)
+    _inflight_timeout: float = PrivateAttr(default=TAVILY_INFLIGHT_TIMEOUT)
+    _async_inflight: dict[tuple[int, str], asyncio.Future] = PrivateAttr(
+        default_factory=dict
+    )
+
+    def __init__(self, cache: SearchCache, **kwargs: Any):
+        super().__init__(**kwargs)
+        self._cache = cache
+
+    def _cache_key(self, query: str) -> str:
+        return f"{self.max_results}:{normalize_query(query)}"
+
+    def _lookup(self, key: str) -> Any:
+        result = self._cache.get(key)
+        if result is not None:
+            logger.debug(f"Search cache hit: {key}")
+            return tuple(result)
+        return None
+
+    def _store(self, key: str, result: Any) -> None:
+        # Failed searches are returned as (error, {}) and must not be cached
+        if result[1]:
+            self._cache.put(key, result)
+
+    def _run(self, query: str, *args: Any, **kwargs: Any) -> Any:
+        key = self._cache_key(query)
+        leader = False
+        while True:
+            result = self._lookup(key)
+            if result is not None:
+                return result
+            with self._lock:
+                event = self._inflight.get(key)
+                if event is None:
+                    self._inflight[key] = threading.Event()
+                    leader = True
+                    break
+            # The same search is running in another thread, wait for it, but
+            # search again rather than hang with it
+            if not event.wait(self._inflight_timeout):
+                logger.warning(
+                    f"Search {key} in flight for over {self._inflight_timeout}s, "
+                    "searching again"
+                )
+                break
+
+        try:
+            result = super()._run(query, *args, **kwargs)
+            self._store(key, result)
+            return result
+        finally:
+            if leader:
+                with self._lock:
+                    self._inflight.pop(key).set()
+
+    async def _arun(self, query: str, *args: Any, **kwargs: Any) -> Any:
+        key = self._cache_key(query)
+        inflight_key = (id(asyncio.get_running_loop()), key)
+        while True:
+            # SQLite lookups block, keep them off the event loop
+            result = await asyncio.to_thread(self._lookup, key)
+            if result is not None:
+                return result
+            future = self._async_inflight.get(inflight_key)
+            if future is None:
+                break
+            # The same search is already running, share its result
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise
+
+        future = asyncio.get_running_loop().create_future()
+        self._async_inflight[inflight_key] = future
+        try:
+            result = await super()._arun(query, *args, **kwargs)
+            self._store(key, result)
+            future.set_result(result)
+            return result
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Avoid "exception was never retrieved" when nobody is waiting
+            future.exception()
+            raise
+        finally:
+            del self._async_inflight[inflight_key]
+
+
+tavily_tool = CachedTavilySearch(
+    cache=SearchCache(
+        ttl=TAVILY_CACHE_TTL,
+        max_entries=TAVILY_CACHE_MAX_ENTRIES,
+        path=TAVILY_CACHE_PATH,
+    ),
+    name="tavily_search",
+    max_results=TAVILY_MAX_RESULTS,
+)
@@ -0,0 +1,109 @@
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from contextlib import closing
+from typing import Any, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_query(query: str) -> str:
+    """Normalize a search query so that trivially different queries match.
+
+    Unicode is NFKC normalized, case is folded, whitespace is collapsed and
+    trailing punctuation is dropped.
+    """
+    query = unicodedata.normalize("NFKC", query).casefold()
+    query = " ".join(query.split())
+    return re.sub(r"[\s.?!。？！]+$", "", query)
+
+
+class SearchCache:
+    """TTL cache of search results with an in-memory LRU and an optional SQLite
+    backend that survives restarts and is shared between worker processes."""
+
+    def __init__(self, ttl: float, max_entries: int, path: Optional[str] = None):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.path = path
+        self._entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0}
+        if path:
+            if os.path.dirname(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+            with closing(self._connect()) as conn, conn:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS searches (
+                        key TEXT PRIMARY KEY,
+                        value TEXT NOT NULL,
+                        expires_at REAL NOT NULL
+                    )
+                    """
+                )
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=30)
+
+    def _remember(self, key: str, expires_at: float, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get(self, key: str) -> Optional[Any]:
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] < now:
+                del self._entries[key]
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self._stats["hits"] += 1
+                return entry[1]
+
+        if self.path:
+            with closing(self._connect()) as conn:
+                row = conn.execute(
+                    "SELECT value, expires_at FROM searches WHERE key = ? AND expires_at >= ?",
+                    (key, now),
+                ).fetchone()
+            if row is not None:
+                value = json.loads(row[0])
+                self._remember(key, row[1], value)
+                with self._lock:
+                    self._stats["hits"] += 1
+                return value
+
+        with self._lock:
+            self._stats["misses"] += 1
+        return None
+
+    def put(self, key: str, value: Any) -> None:
+        expires_at = time.time() + self.ttl
+        self._remember(key, expires_at, value)
+        if self.path:
+            with closing(self._connect()) as conn, conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO searches (key, value, expires_at) VALUES (?, ?, ?)",
+                    (key, json.dumps(value, ensure_ascii=False), expires_at),
+                )
+                conn.execute(
+                    "DELETE FROM searches WHERE expires_at < ?", (time.time(),)
+                )
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+        return stats
@@ -1,6 +1,8 @@
+import asyncio
 import logging
+import uuid
 from src.config import TEAM_MEMBERS
-from src.graph import build_graph
+from src.service.workflow_service import graph
 
 # Configure logging
 logging.basicConfig(
@@ -16,9 +18,6 @@ def enable_debug_logging():
 
 logger = logging.getLogger(__name__)
 
-# Create the graph
-graph = build_graph()
-
 
 def run_agent_workflow(user_input: str, debug: bool = False):
     """Run the agent workflow with the given user input.
@@ -37,15 +36,19 @@ def run_agent_workflow(user_input: str, debug: bool = False):
         enable_debug_logging()
 
     logger.info(f"Starting workflow with user input: {user_input}")
-    result = graph.invoke(
-        {
-            # Constants
-            "TEAM_MEMBERS": TEAM_MEMBERS,
-            # Runtime Variables
-            "messages": [{"role": "user", "content": user_input}],
-            "deep_thinking_mode": True,
-            "search_before_planning": True,
-        }
+    result = asyncio.run(
+        graph.ainvoke(
+            {
+                # Constants
+                "TEAM_MEMBERS": TEAM_MEMBERS,
+                # Runtime Variables
+                "messages": [{"role": "user", "content": user_input}],
+                "deep_thinking_mode": True,
+                "search_before_planning": True,
+            },
+            # Checkpointed under a new thread when checkpointing is enabled
+            config={"configurable": {"thread_id": str(uuid.uuid4())}},
+        )
     )
     logger.debug(f"Final workflow state: {result}")
     logger.info("Workflow completed successfully")
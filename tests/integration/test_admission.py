@@ -0,0 +1,149 @@
+import asyncio
+
+import pytest
+
+from src.service.admission import QueueFullError, WorkflowScheduler
+
+
+async def fake_workflow(name: str, started: list):
+    started.append(name)
+    yield {"event": "start_of_agent", "data": {"agent_name": name}}
+    await asyncio.sleep(0)
+
+
+def test_scheduler_admits_up_to_limit_and_rejects_when_full():
+    """Test that workflows beyond the limit queue, then are rejected."""
+    scheduler = WorkflowScheduler(max_concurrent=2, max_queued=1)
+    admissions = [scheduler.submit() for _ in range(3)]
+    assert [a.state for a in admissions] == ["running", "running", "queued"]
+    with pytest.raises(QueueFullError):
+        scheduler.submit()
+
+    scheduler.release(admissions[0])
+    assert admissions[2].state == "running"
+    assert (scheduler.running, scheduler.queued) == (2, 0)
+
+
+def test_scheduler_orders_by_priority_then_tenant_turns():
+    """Test that high priority goes first and tenants take turns."""
+    scheduler = WorkflowScheduler(max_concurrent=1, max_queued=10)
+    running = scheduler.submit()
+    queued = {
+        "a1": scheduler.submit("a"),
+        "a2": scheduler.submit("a"),
+        "a3": scheduler.submit("a"),
+        "b1": scheduler.submit("b"),
+        "low": scheduler.submit("b", "low"),
+        "high": scheduler.submit("c", "high"),
+    }
+    expected = ["high", "a1", "b1", "a2", "a3", "low"]
+    assert sorted(queued, key=lambda name: scheduler.position(queued[name])) == (
+        expected
+    )
+    assert [scheduler.position(queued[name]) for name in expected] == [1, 2, 3, 4, 5, 6]
+
+    order = []
+    current = running
+    for _ in expected:
+        scheduler.release(current)
+        current = next(a for a in queued.values() if a.state == "running")
+        order.append(next(n for n, a in queued.items() if a is current))
+    assert order == expected
+
+
+def test_admission_stream_reports_position_and_releases():
+    """Test that a queued stream reports its position and starts in turn."""
+    scheduler = WorkflowScheduler(max_concurrent=1, max_queued=10)
+    started = []
+
+    async def run():
+        first = scheduler.submit()
+        second = scheduler.submit("a")
+        third = scheduler.submit("a")
+
+        async def consume(admission, name):
+            return [
+                event async for event in admission.stream(fake_workflow(name, started))
+            ]
+
+        tasks = [
+            asyncio.create_task(consume(admission, name))
+            for admission, name in [(third, "third"), (second, "second")]
+        ]
+        await asyncio.sleep(0.01)
+        assert started == []
+        events = await consume(first, "first")
+        assert [event["event"] for event in events] == ["start_of_agent"]
+        return await asyncio.gather(*tasks)
+
+    third_events, second_events = asyncio.run(run())
+    assert started == ["first", "second", "third"]
+    assert [event["event"] for event in second_events] == ["queued", "start_of_agent"]
+    assert [event["event"] for event in third_events] == [
+        "queued",
+        "queue_position",
+        "start_of_agent",
+    ]
+    assert third_events[1]["data"] == {"position": 1}
+    assert (scheduler.running, scheduler.queued) == (0, 0)
+
+
+def test_cancelled_stream_leaves_the_queue():
+    """Test that a client going away while queued frees its queue entry."""
+    scheduler = WorkflowScheduler(max_concurrent=1, max_queued=10)
+    started = []
+
+    async def run():
+        running = scheduler.submit()
+        queued = scheduler.submit()
+        stream = queued.stream(fake_workflow("queued", started))
+        assert (await anext(stream))["event"] == "queued"
+        task = asyncio.create_task(anext(stream))
+        await asyncio.sleep(0)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        assert scheduler.queued == 0
+        scheduler.release(running)
+
+    asyncio.run(run())
+    assert started == []
+    assert scheduler.running == 0
+
+
+def test_cancel_queued_workflow():
+    """Test that a queued workflow can be cancelled by its id without running."""
+    scheduler = WorkflowScheduler(max_concurrent=1, max_queued=10)
+    started = []
+
+    async def run():
+        running = scheduler.submit()
+        queued = scheduler.submit(workflow_id="queued")
+        stream = queued.stream(fake_workflow("queued", started))
+        first = await anext(stream)
+        assert first["data"]["workflow_id"] == "queued"
+        assert not scheduler.cancel("unknown")
+        assert scheduler.cancel("queued")
+        assert scheduler.queued == 0
+        rest = [event async for event in stream]
+        assert rest == [
+            {"event": "workflow_cancelled", "data": {"workflow_id": "queued"}}
+        ]
+        assert not scheduler.cancel("queued")
+
+        # Admitted but not started yet, its slot is freed
+        assert scheduler.cancel(running.workflow_id)
+        assert scheduler.running == 0
+        events = [event async for event in running.stream(fake_workflow("a", started))]
+        assert [event["event"] for event in events] == ["workflow_cancelled"]
+
+        # Started workflows are cancelled through their graph
+        admission = scheduler.submit()
+        stream = admission.stream(fake_workflow("started", started))
+        await anext(stream)
+        assert not scheduler.cancel(admission.workflow_id)
+        await stream.aclose()
+
+    asyncio.run(run())
+    assert started == ["started"]
+    assert (scheduler.running, scheduler.queued) == (0, 0)
@@ -0,0 +1,77 @@
+import pytest
+from markdownify import markdownify as md
+
+from benchmarks.bench_extract import corpus
+from benchmarks.fakes import article_html
+from src.crawler import Article
+from src.crawler import article as article_module
+from src.crawler.readability_extractor import ReadabilityExtractor
+
+HTML = (
+    '<div id="readability-page-1" class="page"><div>'
+    "<h2>Heading</h2><p>First <b>paragraph</b>.</p>\n"
+    '<p>Second <img src="/a.png" alt="A"> paragraph.</p>'
+    "<ul><li>One</li><li>Two</li></ul><pre>code\n\n\nblock</pre>"
+    "text <a href='/x'>link</a></div></div>"
+)
+
+
+def make_article(html: str) -> Article:
+    article = Article("Title", html)
+    article.url = "https://example.com/page"
+    return article
+
+
+def test_iter_markdown_matches_markdownify():
+    article = make_article(HTML)
+    assert len(list(article.iter_markdown())) > 3
+    assert article.to_markdown() == "# Title\n\n" + md(HTML)
+    assert article.to_markdown(including_title=False) == md(HTML)
+
+
+PAGES = {
+    "inline_siblings": '<div id="readability-page-1"><div>See <a href="/a">One</a> '
+    '<a href="/b">Two</a> <strong>now</strong></div></div>',
+    "inline_code": "<code>x</code> <code>y</code>",
+    "outer_spaces": "  <span>a</span>  \n <span>b</span>  ",
+    "main": "<main> <p>a</p> x </main>",
+    "empty_div": "<p>a</p><div></div><p>b</p>",
+    "full_document": "<!DOCTYPE html>\n<html><body><p>Full</p> <p>page</p></body></html>",
+    "article": article_html(0, paragraphs=12),
+    **corpus(),
+}
+
+
+@pytest.mark.parametrize("html", PAGES.values(), ids=PAGES.keys())
+def test_iter_markdown_matches_markdownify_on_pages(html):
+    assert make_article(html).to_markdown(including_title=False) == md(html)
+
+
+def test_iter_markdown_matches_markdownify_on_extracted_corpus():
+    extractor = ReadabilityExtractor("python")
+    for html in corpus().values():
+        content = extractor.extract_article(html).html_content
+        assert make_article(content).to_markdown(including_title=False) == md(content)
+
+
+def test_iter_markdown_without_content():
+    assert make_article(None).to_markdown() == "# Title\n\n"
+
+
+def test_to_message_splits_images():
+    content = make_article(HTML).to_message()
+    assert [block["type"] for block in content] == ["text", "image_url", "text"]
+    assert content[0]["text"].endswith("Second")
+    assert content[1]["image_url"]["url"] == "https://example.com/a.png"
+    assert content[2]["text"].startswith("paragraph.")
+
+
+def test_iter_message_splits_long_text(monkeypatch):
+    monkeypatch.setattr(article_module, "CRAWLER_TEXT_BLOCK_CHARS", 100)
+    paragraphs = [f"Paragraph {i}. " * 5 for i in range(20)]
+    article = make_article("".join(f"<p>{p}</p>" for p in paragraphs))
+    blocks = list(article.iter_message())
+    assert len(blocks) > 5
+    assert all(len(block["text"]) < 200 for block in blocks)
+    text = "\n\n".join(block["text"] for block in blocks)
+    assert text == article.to_markdown()
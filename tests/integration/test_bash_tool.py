@@ -1,7 +1,8 @@
+import asyncio
+import time
 import unittest
-import subprocess
 from unittest.mock import patch
-from src.tools.bash_tool import bash_tool
+from src.tools.bash_tool import bash_tool, run_command
 
 
 class TestBashTool(unittest.TestCase):
@@ -10,23 +11,17 @@ class TestBashTool(unittest.TestCase):
         result = bash_tool.invoke("echo 'Hello World'")
         self.assertEqual(result.strip(), "Hello World")
 
-    @patch("subprocess.run")
-    def test_command_with_error(self, mock_run):
+    def test_command_with_error(self):
         """Test bash tool when command fails"""
-        # Configure mock to raise CalledProcessError
-        mock_run.side_effect = subprocess.CalledProcessError(
-            returncode=1, cmd="invalid_command", output="", stderr="Command not found"
-        )
-
-        result = bash_tool.invoke("invalid_command")
+        result = bash_tool.invoke("echo 'Command not found' >&2; exit 1")
         self.assertIn("Command failed with exit code 1", result)
         self.assertIn("Command not found", result)
 
-    @patch("subprocess.run")
-    def test_command_with_exception(self, mock_run):
+    @patch("asyncio.create_subprocess_shell")
+    def test_command_with_exception(self, mock_create):
         """Test bash tool when an unexpected exception occurs"""
         # Configure mock to raise a generic exception
-        mock_run.side_effect = Exception("Unexpected error")
+        mock_create.side_effect = Exception("Unexpected error")
 
         result = bash_tool.invoke("some_command")
         self.assertIn("Error executing command: Unexpected error", result)
@@ -39,6 +34,51 @@ class TestBashTool(unittest.TestCase):
         )
         self.assertEqual(result.strip(), "test content")
 
+    def test_timeout_kills_process_group(self):
+        """Test that a hung command and its children are killed on timeout"""
+        start = time.monotonic()
+        result = asyncio.run(
+            run_command("echo started; sleep 30 & sleep 30; echo done", timeout=0.5)
+        )
+        self.assertLess(time.monotonic() - start, 5)
+        self.assertIn("timed out after 0.5 seconds", result)
+        self.assertIn("started", result)
+        self.assertNotIn("done", result)
+
+    def test_background_process_is_not_waited_for(self):
+        """Test that a command done but for a background process is not timed out"""
+        start = time.monotonic()
+        result = asyncio.run(run_command("echo started; sleep 3 &", timeout=2))
+        self.assertLess(time.monotonic() - start, 1.5)
+        self.assertEqual(result, "started\n")
+
+    def test_output_is_capped(self):
+        """Test that only the head and the tail of a long output are kept"""
+        result = bash_tool.invoke("seq 1 100000")
+        self.assertLess(len(result), 25_000)
+        self.assertTrue(result.startswith("1\n2\n3\n"))
+        self.assertTrue(result.endswith("99999\n100000\n"))
+        self.assertIn("characters omitted", result)
+
+    def test_progress_events(self):
+        """Test that the output is streamed as tool_call_progress events"""
+
+        async def collect():
+            return [
+                event
+                async for event in bash_tool.astream_events(
+                    "echo one; sleep 0.3; echo two >&2", version="v2"
+                )
+                if event["event"] == "on_custom_event"
+            ]
+
+        events = asyncio.run(collect())
+        self.assertEqual(
+            [(event["data"]["stream"], event["data"]["content"]) for event in events],
+            [("stdout", "one\n"), ("stderr", "two\n")],
+        )
+        self.assertTrue(all(event["name"] == "tool_call_progress" for event in events))
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,22 @@
+from benchmarks import bench_crawl, bench_extract, bench_workflow
+
+
+def test_workflow_benchmark():
+    """Test that the workflow benchmark runs a full workflow offline."""
+    results = bench_workflow.run(number=1)
+    assert results["events_per_workflow"] > 0
+    assert results["translate_us_per_graph_event"] > 0
+
+
+def test_crawl_benchmark():
+    """Test that the crawl benchmark extracts the stub pages."""
+    results = bench_crawl.run(number=1)
+    for page in ["short", "long"]:
+        assert 0 < results[page]["markdown_chars"] < results[page]["html_chars"]
+
+
+def test_extract_benchmark():
+    """Test that the extraction benchmark compares the available backends."""
+    results = bench_extract.run(number=1)
+    assert results["python"]["available"]
+    assert results[results["reference"]]["text_parity"] == 1
@@ -0,0 +1,156 @@
+import asyncio
+import time
+
+import pytest
+
+from src.tools.browser_pool import BrowserPool
+
+
+class FakePlaywrightBrowser:
+    def __init__(self):
+        self.connected = True
+
+    def is_connected(self):
+        return self.connected
+
+
+class FakeContext:
+    def __init__(self, browser):
+        self.browser = browser
+        self.closed = False
+
+    async def get_session(self):
+        pass
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeBrowser:
+    class config:
+        new_context_config = None
+
+    launched = 0
+
+    def __init__(self):
+        self.playwright_browser = None
+        self.closed = False
+
+    async def get_playwright_browser(self):
+        await asyncio.sleep(0.01)
+        FakeBrowser.launched += 1
+        self.playwright_browser = FakePlaywrightBrowser()
+        return self.playwright_browser
+
+    async def new_context(self, config):
+        return FakeContext(self)
+
+    async def close(self):
+        self.closed = True
+        self.playwright_browser = None
+
+
+@pytest.fixture
+def make_pool():
+    pools = []
+    FakeBrowser.launched = 0
+
+    def make_pool(**kwargs):
+        pools.append(BrowserPool(FakeBrowser, **{"max_size": 2, **kwargs}))
+        return pools[-1]
+
+    yield make_pool
+    for pool in pools:
+        pool.close()
+
+
+async def use(browser, context):
+    return browser, context
+
+
+def test_browsers_are_reused_with_fresh_contexts(make_pool):
+    """Test that the sync and async paths share warm browsers."""
+    pool = make_pool(min_idle=1)
+    browser, context = pool.run(use)
+    second_browser, second_context = asyncio.run(pool.arun(use))
+    assert second_browser is browser
+    assert second_context is not context
+    assert context.closed
+    assert FakeBrowser.launched == 1
+
+
+def test_lease_waits_for_a_free_browser(make_pool):
+    """Test that at most max_size browsers run and extra tasks wait or time out."""
+    pool = make_pool(max_size=1, min_idle=0, lease_timeout=0.2)
+
+    async def slow(browser, context):
+        await asyncio.sleep(0.5)
+        return browser
+
+    first = pool.submit(slow)
+    time.sleep(0.05)
+    with pytest.raises(TimeoutError):
+        pool.run(use)
+    pool.lease_timeout = 5
+    assert pool.run(use)[0] is first.result()
+    assert FakeBrowser.launched == 1
+
+
+def test_disconnected_browser_is_replaced(make_pool):
+    """Test that a browser that crashed is not leased again."""
+    pool = make_pool(min_idle=0)
+    browser, _ = pool.run(use)
+    browser.playwright_browser.connected = False
+    time.sleep(0.05)
+    assert pool.run(use)[0] is not browser
+    assert browser.closed
+
+
+def test_idle_browsers_are_closed(make_pool):
+    """Test that idle browsers beyond min_idle are closed."""
+    pool = make_pool(min_idle=0, idle_timeout=0.1)
+
+    async def hold(browser, context):
+        await asyncio.sleep(0.05)
+        return browser
+
+    browsers = [future.result() for future in [pool.submit(hold), pool.submit(hold)]]
+    assert len(set(browsers)) == 2
+    time.sleep(0.3)
+    assert all(browser.closed for browser in browsers)
+    assert pool.stats() == {"size": 0, "idle": 0}
+
+
+def test_browser_is_recycled_after_max_leases(make_pool):
+    """Test that a browser is replaced after max_leases tasks."""
+    pool = make_pool(min_idle=1, max_leases=2)
+    first, _ = pool.run(use)
+    assert pool.run(use)[0] is first
+    time.sleep(0.05)
+    assert first.closed
+    assert pool.run(use)[0] is not first
+
+
+def test_close_closes_leased_browsers(make_pool):
+    """Test that closing the pool also closes the browsers leased at the time."""
+    pool = make_pool(min_idle=1)
+    leased = []
+
+    async def hold(browser, context):
+        leased.append(browser)
+        while not browser.closed:
+            await asyncio.sleep(0.01)
+        raise RuntimeError("Browser closed")
+
+    held = pool.submit(hold)
+    idle, _ = pool.run(use)
+    while not leased:
+        time.sleep(0.01)
+    time.sleep(0.05)
+    assert pool._tasks == set()
+    pool.close()
+    assert idle.closed
+    assert leased[0].closed
+    with pytest.raises(RuntimeError):
+        held.result()
+    assert pool.stats() == {"size": 0, "idle": 0}
@@ -0,0 +1,217 @@
+import asyncio
+from typing import Any, AsyncIterator, Optional
+
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+from langchain_core.callbacks import (
+    AsyncCallbackManagerForLLMRun,
+    CallbackManagerForLLMRun,
+)
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+from src.api import app as app_module
+from src.api.app import ChatRequest, app
+from src.graph import nodes
+from src.service import workflow_service
+from src.service.admission import WorkflowScheduler
+
+
+class HangingChatModel(BaseChatModel):
+    """Hands every request off to the planner, which never finishes its reply."""
+
+    hanging: Optional[asyncio.Event] = None
+    stopped: Optional[asyncio.Event] = None
+
+    @property
+    def _llm_type(self) -> str:
+        return "hanging"
+
+    def _generate(
+        self,
+        messages: list[BaseMessage],
+        stop: Optional[list[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        message = AIMessage("handoff_to_planner()")
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _astream(
+        self,
+        messages: list[BaseMessage],
+        stop: Optional[list[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        if "Deep Researcher" not in messages[0].content:
+            yield ChatGenerationChunk(message=AIMessageChunk("handoff_to_planner()"))
+            return
+        yield ChatGenerationChunk(message=AIMessageChunk("Plan"))
+        try:
+            self.hanging.set()
+            await asyncio.sleep(60)
+        finally:
+            # Cancelled, or closed by the graph
+            self.stopped.set()
+
+
+@pytest.fixture(autouse=True)
+def model(monkeypatch):
+    model = HangingChatModel()
+    monkeypatch.setattr(nodes, "get_llm_by_type", lambda *args, **kwargs: model)
+    return model
+
+
+async def start_workflow(model: HangingChatModel):
+    model.hanging = asyncio.Event()
+    model.stopped = asyncio.Event()
+    events = workflow_service.run_agent_workflow(
+        [{"role": "user", "content": "research"}]
+    )
+    async for event in events:
+        if event["event"] == "message":
+            # The planner is streaming
+            break
+    await asyncio.wait_for(model.hanging.wait(), 5)
+    return events
+
+
+def test_cancel_workflow(model):
+    """Test that a cancelled workflow stops its LLM call and says so."""
+
+    async def run():
+        events = await start_workflow(model)
+        assert not workflow_service.cancel_workflow("unknown")
+        (workflow_id,) = workflow_service.running_workflows
+        assert workflow_service.cancel_workflow(workflow_id)
+        rest = [event async for event in events]
+        await asyncio.wait_for(model.stopped.wait(), 5)
+        assert rest[-1] == {
+            "event": "workflow_cancelled",
+            "data": {"workflow_id": workflow_id},
+        }
+        assert workflow_service.running_workflows == {}
+
+    asyncio.run(run())
+
+
+def test_cancel_workflow_in_coordinator(model):
+    """Test that a workflow can be cancelled from its first event on."""
+
+    async def run():
+        model.stopped = asyncio.Event()
+        events = workflow_service.run_agent_workflow(
+            [{"role": "user", "content": "research"}], workflow_id="workflow"
+        )
+        first = await anext(events)
+        assert first["data"]["agent_name"] == "coordinator"
+        assert workflow_service.cancel_workflow("workflow")
+        rest = [event async for event in events]
+        assert rest[-1]["event"] == "workflow_cancelled"
+        assert workflow_service.running_workflows == {}
+
+    asyncio.run(run())
+
+
+def test_closing_the_stream_stops_the_workflow(model):
+    """Test that the workflow stops when its client goes away."""
+
+    async def run():
+        events = await start_workflow(model)
+        await events.aclose()
+        await asyncio.wait_for(model.stopped.wait(), 5)
+        assert workflow_service.running_workflows == {}
+
+    asyncio.run(run())
+
+
+def test_cancel_endpoint_unknown_workflow():
+    """Test that cancelling a workflow that is not running is a 404."""
+    response = TestClient(app).post("/api/chat/unknown/cancel")
+    assert response.status_code == 404
+
+
+class ChattyChatModel(HangingChatModel):
+    """Streams a long plan from the planner, one word at a time."""
+
+    async def _astream(
+        self,
+        messages: list[BaseMessage],
+        stop: Optional[list[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        if "Deep Researcher" not in messages[0].content:
+            yield ChatGenerationChunk(message=AIMessageChunk("handoff_to_planner()"))
+            return
+        try:
+            for _ in range(200):
+                yield ChatGenerationChunk(message=AIMessageChunk("Plan "))
+                await asyncio.sleep(0)
+            await asyncio.sleep(60)
+        finally:
+            self.stopped.set()
+
+
+def test_slow_client_holds_up_the_workflow(monkeypatch):
+    """Test that the graph waits for a slow client instead of buffering events."""
+    model = ChattyChatModel()
+    monkeypatch.setattr(nodes, "get_llm_by_type", lambda *args, **kwargs: model)
+    monkeypatch.setattr(workflow_service, "EVENT_BUFFER_SIZE", 4)
+    translated = 0
+    translate = workflow_service.WorkflowEventStream.translate
+
+    def counting_translate(self, event):
+        nonlocal translated
+        for ydata in translate(self, event):
+            translated += 1
+            yield ydata
+
+    monkeypatch.setattr(
+        workflow_service.WorkflowEventStream, "translate", counting_translate
+    )
+
+    async def run():
+        model.stopped = asyncio.Event()
+        events = workflow_service.run_agent_workflow(
+            [{"role": "user", "content": "research"}]
+        )
+        read = 0
+        async for event in events:
+            read += 1
+            if event["event"] == "message":
+                break
+        await asyncio.sleep(0.2)
+        # The read events, the buffered ones and the one waiting for room
+        assert translated <= read + 4 + 1
+        # The full buffer does not keep the workflow from stopping
+        await asyncio.wait_for(events.aclose(), 5)
+        await asyncio.wait_for(model.stopped.wait(), 5)
+        assert workflow_service.running_workflows == {}
+
+    asyncio.run(run())
+
+
+def test_cancel_endpoint_queued_workflow(monkeypatch):
+    """Test that a queued workflow is cancelled with the id of its header."""
+    monkeypatch.setattr(app_module, "workflow_scheduler", WorkflowScheduler(0, 1))
+
+    async def run():
+        response = await app_module.chat_endpoint(
+            ChatRequest(messages=[{"role": "user", "content": "research"}])
+        )
+        workflow_id = response.headers["X-Workflow-Id"]
+        events = response.body_iterator
+        assert (await anext(events))["event"] == "queued"
+        assert await app_module.cancel_endpoint(workflow_id) == {
+            "workflow_id": workflow_id,
+            "cancelled": True,
+        }
+        assert [event["event"] async for event in events] == ["workflow_cancelled"]
+        with pytest.raises(HTTPException):
+            await app_module.cancel_endpoint(workflow_id)
+
+    asyncio.run(run())
@@ -0,0 +1,237 @@
+import asyncio
+import json
+
+import pytest
+
+from langchain_core.messages import AIMessage, AIMessageChunk
+
+from src.graph import SQLiteCheckpointSaver, build_graph, nodes
+
+PLAN = json.dumps(
+    {
+        "thought": "Research then report",
+        "title": "Report",
+        "steps": [
+            {"agent_name": "researcher", "title": "A", "description": "Research A"},
+            {"agent_name": "researcher", "title": "B", "description": "Research B"},
+            {"agent_name": "reporter", "title": "Report", "description": "Write"},
+        ],
+    }
+)
+
+
+class FakeLLM:
+    async def ainvoke(self, messages):
+        return AIMessage(content="handoff_to_planner()")
+
+    async def astream(self, messages):
+        yield AIMessageChunk(content=PLAN)
+
+    def with_structured_output(self, schema):
+        return self.Router()
+
+    class Router:
+        async def ainvoke(self, messages):
+            return {"next": "FINISH"}
+
+
+class FlakyAgent:
+    """Fails once on the second research step, like a crawl timing out."""
+
+    def __init__(self):
+        self.calls = 0
+        self.failed = False
+
+    async def ainvoke(self, state):
+        self.calls += 1
+        is_second_step = state.get("step_index") == 1 or self.calls == 2
+        if is_second_step and not self.failed:
+            self.failed = True
+            raise TimeoutError("crawl timeout")
+        return {"messages": [AIMessage(content=f"result {self.calls}")]}
+
+
+def run_until_failure_and_resume(monkeypatch, tmp_path, **options) -> tuple:
+    agent = FlakyAgent()
+    monkeypatch.setattr(nodes, "get_llm_by_type", lambda *args, **kwargs: FakeLLM())
+    monkeypatch.setattr(nodes, "get_agent", lambda agent_name: agent)
+    graph = build_graph(SQLiteCheckpointSaver(str(tmp_path / "checkpoints.sqlite3")))
+    config = {"configurable": {"thread_id": "thread-1"}}
+    state = {
+        "TEAM_MEMBERS": ["researcher", "reporter"],
+        "messages": [{"role": "user", "content": "Compare A and B"}],
+        **options,
+    }
+
+    async def run():
+        try:
+            await graph.ainvoke(state, config)
+        except TimeoutError:
+            pass
+        calls_before_resume = agent.calls
+        result = await graph.ainvoke(None, config)
+        return calls_before_resume, agent.calls, result
+
+    return asyncio.run(run())
+
+
+def test_resume_reruns_failed_step_only(monkeypatch, tmp_path):
+    """Test that resuming a thread skips the steps that already completed."""
+    before, after, result = run_until_failure_and_resume(
+        monkeypatch, tmp_path, follow_plan=True
+    )
+    assert (before, after) == (2, 3)
+    assert [message.name for message in result["messages"]] == [
+        None,
+        "planner",
+        "researcher",
+        "researcher",
+        "reporter",
+    ]
+
+
+def test_resume_keeps_completed_parallel_steps(monkeypatch, tmp_path):
+    """Test that parallel steps that succeeded are not run again on resume."""
+    before, after, result = run_until_failure_and_resume(
+        monkeypatch, tmp_path, parallel_execution=True
+    )
+    assert (before, after) == (2, 3)
+    assert set(result["step_results"]) == {0, 1, 2}
+
+
+def test_checkpoint_only_stores_changed_channels(tmp_path):
+    """Test that unchanged channel values are not written again."""
+    saver = SQLiteCheckpointSaver(str(tmp_path / "checkpoints.sqlite3"))
+    config = {"configurable": {"thread_id": "t", "checkpoint_ns": ""}}
+    checkpoint = {
+        "v": 1,
+        "id": "1",
+        "ts": "2025-01-01T00:00:00+00:00",
+        "channel_values": {"messages": ["hi"], "full_plan": "plan"},
+        "channel_versions": {"messages": "1", "full_plan": "1"},
+        "versions_seen": {},
+        "pending_sends": [],
+    }
+    config = saver.put(config, checkpoint, {}, {"messages": "1", "full_plan": "1"})
+    checkpoint = {
+        **checkpoint,
+        "id": "2",
+        "channel_values": {"messages": ["hi", "there"], "full_plan": "plan"},
+        "channel_versions": {"messages": "2", "full_plan": "1"},
+    }
+    saver.put(config, checkpoint, {}, {"messages": "2"})
+
+    latest = saver.get_tuple({"configurable": {"thread_id": "t"}})
+    assert latest.checkpoint["channel_values"] == {
+        "messages": ["hi", "there"],
+        "full_plan": "plan",
+    }
+    assert latest.parent_config["configurable"]["checkpoint_id"] == "1"
+    assert [
+        c.checkpoint["id"] for c in saver.list({"configurable": {"thread_id": "t"}})
+    ] == ["2", "1"]
+
+
+def test_prune_keeps_most_recent_threads(tmp_path, monkeypatch):
+    """Test that only the recent threads are kept, and all the young ones."""
+    import src.graph.checkpoint as checkpoint_module
+
+    clock = {"now": 1000.0}
+
+    class FakeTime:
+        @staticmethod
+        def time():
+            return clock["now"]
+
+    monkeypatch.setattr(checkpoint_module, "time", FakeTime)
+    path = str(tmp_path / "checkpoints.sqlite3")
+    saver = SQLiteCheckpointSaver(path)
+    checkpoint = {
+        "v": 1,
+        "ts": "2025-01-01T00:00:00+00:00",
+        "channel_values": {"messages": ["hi"]},
+        "channel_versions": {"messages": "1"},
+        "versions_seen": {},
+        "pending_sends": [],
+    }
+    # Thread "a" is the oldest but updated last
+    for checkpoint_id, thread_id in enumerate(["a", "b", "c", "a"]):
+        clock["now"] += 60
+        config = {"configurable": {"thread_id": thread_id, "checkpoint_ns": ""}}
+        config = saver.put(
+            config, {**checkpoint, "id": str(checkpoint_id)}, {}, {"messages": "1"}
+        )
+        saver.put_writes(config, [("messages", ["there"])], "task")
+    assert saver.prune() == 0
+
+    # Thread "b" was updated 3 minutes ago, too recently to be deleted
+    assert SQLiteCheckpointSaver(path, max_threads=2, min_age=600).prune() == 0
+
+    saver = SQLiteCheckpointSaver(path, max_threads=2, min_age=60)
+    threads = {c.config["configurable"]["thread_id"] for c in saver.list(None)}
+    assert threads == {"a", "c"}
+    assert saver.get_tuple({"configurable": {"thread_id": "b"}}) is None
+    assert saver.get_tuple({"configurable": {"thread_id": "a"}}).pending_writes
+    assert saver.prune() == 0
+
+
+def test_resume_agent_workflow_streams_remaining_nodes(monkeypatch, tmp_path):
+    """Test that the service resumes a failed thread and rejects reusing it."""
+    from src.service import workflow_service
+
+    monkeypatch.setattr(nodes, "get_llm_by_type", lambda *args, **kwargs: FakeLLM())
+    agent = FlakyAgent()
+    monkeypatch.setattr(nodes, "get_agent", lambda agent_name: agent)
+    saver = SQLiteCheckpointSaver(str(tmp_path / "checkpoints.sqlite3"))
+    monkeypatch.setattr(workflow_service, "checkpointer", saver)
+    monkeypatch.setattr(workflow_service, "graph", build_graph(saver))
+    messages = [{"role": "user", "content": "Compare A and B"}]
+
+    async def run():
+        events = []
+        try:
+            async for event in workflow_service.run_agent_workflow(
+                messages, follow_plan=True, thread_id="thread-1"
+            ):
+                events.append(event)
+        except TimeoutError:
+            pass
+        started = [e for e in events if e["event"] == "start_of_workflow"]
+        assert started[0]["data"]["thread_id"] == "thread-1"
+
+        with pytest.raises(ValueError):
+            await anext(
+                workflow_service.run_agent_workflow(messages, thread_id="thread-1")
+            )
+
+        checkpoints = await workflow_service.list_workflow_checkpoints("thread-1")
+        assert checkpoints[0]["next"] == ["researcher"]
+
+        return [
+            event["event"]
+            async for event in workflow_service.resume_agent_workflow("thread-1")
+        ]
+
+    events = asyncio.run(run())
+    assert events[0] == "start_of_workflow"
+    assert events[-1] == "end_of_workflow"
+
+
+def test_resume_endpoint_errors(monkeypatch):
+    """Test that resume errors are HTTP errors, not broken streams."""
+    from fastapi.testclient import TestClient
+
+    from src.api import app as app_module
+
+    async def resume(thread_id, *args):
+        if thread_id == "unknown":
+            raise LookupError(f"No checkpoint found for thread {thread_id}")
+        raise OSError("database is locked")
+        yield
+
+    monkeypatch.setattr(app_module, "resume_agent_workflow", resume)
+    client = TestClient(app_module.app)
+    assert client.post("/api/chat/unknown/resume", json={}).status_code == 404
+    response = client.post("/api/chat/thread-1/resume", json={})
+    assert response.status_code == 500
+    assert response.json() == {"detail": "database is locked"}
@@ -0,0 +1,120 @@
+import asyncio
+
+import pytest
+
+from src.service.event_stream import coalesce_message_deltas
+
+
+def message(message_id: str, text: str, kind: str = "content") -> dict:
+    return {
+        "event": "message",
+        "data": {"message_id": message_id, "delta": {kind: text}},
+    }
+
+
+async def source(events: list, delay: float = 0):
+    for event in events:
+        if delay:
+            await asyncio.sleep(delay)
+        yield event
+
+
+async def collect(events, **kwargs) -> list:
+    return [event async for event in coalesce_message_deltas(events, **kwargs)]
+
+
+def test_consecutive_deltas_are_merged_in_order():
+    """Test that deltas of a message merge and other events keep their place."""
+    events = [
+        {"event": "start_of_llm", "data": {"agent_name": "planner"}},
+        message("a", "Hel"),
+        message("a", "lo"),
+        message("a", "think", kind="reasoning_content"),
+        message("b", "!"),
+        {"event": "end_of_llm", "data": {"agent_name": "planner"}},
+        message("b", "x"),
+    ]
+    assert asyncio.run(collect(source(events), window=10)) == [
+        events[0],
+        message("a", "Hello"),
+        events[3],
+        events[4],
+        events[5],
+        events[6],
+    ]
+
+
+def test_deltas_are_held_within_window_and_size():
+    """Test that held deltas are sent when the window or the size runs out."""
+    events = [message("a", "x") for _ in range(4)]
+    # A delta every 50ms with a 10ms window is sent as it comes
+    assert asyncio.run(collect(source(events, delay=0.05), window=0.01)) == events
+    assert asyncio.run(collect(source(events), window=10, max_chars=3)) == [
+        message("a", "xxx"),
+        message("a", "x"),
+    ]
+
+
+def test_held_delta_is_sent_while_waiting_for_next_event():
+    """Test that a held delta does not wait for the next event beyond the window."""
+
+    async def run():
+        received = asyncio.Event()
+
+        async def slow_source():
+            yield message("a", "x")
+            await received.wait()
+            yield message("a", "y")
+
+        stream = coalesce_message_deltas(slow_source(), window=0.01)
+        first = await asyncio.wait_for(anext(stream), 1)
+        received.set()
+        rest = [event async for event in stream]
+        return [first, *rest]
+
+    assert asyncio.run(run()) == [message("a", "x"), message("a", "y")]
+
+
+def test_closing_closes_the_source():
+    """Test that closing the coalesced stream stops the workflow events."""
+
+    async def run():
+        closed = asyncio.Event()
+
+        async def endless():
+            try:
+                while True:
+                    yield message("a", "x")
+                    await asyncio.sleep(0.001)
+            finally:
+                closed.set()
+
+        stream = coalesce_message_deltas(endless(), window=0.005)
+        await anext(stream)
+        await stream.aclose()
+        return closed.is_set()
+
+    assert asyncio.run(run())
+
+
+def test_closing_does_not_swallow_cancellation():
+    """Test that cancelling the task closing the stream still cancels it."""
+
+    async def slow_to_stop():
+        yield message("a", "Hel")
+        try:
+            await asyncio.sleep(60)
+        finally:
+            await asyncio.sleep(0.1)
+        yield message("a", "lo")
+
+    async def run():
+        events = coalesce_message_deltas(slow_to_stop(), window=0.01)
+        assert await anext(events) == message("a", "Hel")
+        closing = asyncio.create_task(events.aclose())
+        await asyncio.sleep(0.02)
+        closing.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await closing
+
+    asyncio.run(run())
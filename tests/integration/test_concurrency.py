@@ -0,0 +1,133 @@
+import asyncio
+import random
+from typing import Any, AsyncIterator, Optional
+
+import pytest
+from langchain_core.callbacks import (
+    AsyncCallbackManagerForLLMRun,
+    CallbackManagerForLLMRun,
+)
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+from src.graph import nodes
+from src.service import workflow_service
+
+NUM_STREAMS = 16
+
+
+class ScriptedChatModel(BaseChatModel):
+    """Streams a reply derived from the user request, token by token.
+
+    The coordinator greets requests starting with `hi` and hands the others
+    off to the planner, whose reply is not a valid plan so that the workflow
+    ends right after it.
+    """
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted"
+
+    def _reply(self, messages: list[BaseMessage]) -> list[str]:
+        request = next(m.content for m in messages if m.type == "human")
+        if "Deep Researcher" in messages[0].content:
+            return ["Plan", " for", " ", request]
+        if request.startswith("hi"):
+            return ["Hello", " ", request, ",", " nice", " to", " meet", " you"]
+        return ["hand", "off_to_planner()"]
+
+    def _generate(
+        self,
+        messages: list[BaseMessage],
+        stop: Optional[list[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        content = "".join(self._reply(messages))
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content))])
+
+    async def _astream(
+        self,
+        messages: list[BaseMessage],
+        stop: Optional[list[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        for token in self._reply(messages):
+            # Let the other streams run between two tokens
+            await asyncio.sleep(random.random() / 1000)
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=token))
+            if run_manager:
+                await run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
+
+
+@pytest.fixture(autouse=True)
+def scripted_llm(monkeypatch):
+    model = ScriptedChatModel()
+    monkeypatch.setattr(nodes, "get_llm_by_type", lambda *args, **kwargs: model)
+
+
+async def collect(request: str) -> list[dict]:
+    return [
+        event
+        async for event in workflow_service.run_agent_workflow(
+            [{"role": "user", "content": request}]
+        )
+    ]
+
+
+def message_text(events: list[dict]) -> str:
+    return "".join(
+        event["data"]["delta"].get("content", "")
+        for event in events
+        if event["event"] == "message"
+    )
+
+
+def run_concurrently(requests: list[str]) -> list[list[dict]]:
+    async def run():
+        return await asyncio.gather(*(collect(request) for request in requests))
+
+    return asyncio.run(run())
+
+
+def test_concurrent_greetings_are_not_mixed():
+    """Test that each stream only carries the reply to its own request."""
+    requests = [f"hi {i}" for i in range(NUM_STREAMS)]
+    for request, events in zip(requests, run_concurrently(requests)):
+        assert message_text(events) == f"Hello {request}, nice to meet you"
+        assert "end_of_workflow" not in [event["event"] for event in events]
+
+
+def test_greeting_reports_usage():
+    """Test that a request the coordinator answers still reports its usage."""
+    (events,) = run_concurrently(["hi"])
+    assert events[-1]["event"] == "workflow_usage"
+    usage = events[-1]["data"]["usage"]
+    assert list(usage["nodes"]) == ["coordinator"]
+    assert usage["total"]["llm_calls"] == 1
+
+
+def test_concurrent_handoffs_do_not_leak_into_greetings():
+    """Test that a handoff in one stream does not hide or end another one."""
+    requests = [f"hi {i}" if i % 2 else f"research {i}" for i in range(NUM_STREAMS)]
+    for request, events in zip(requests, run_concurrently(requests)):
+        kinds = [event["event"] for event in events]
+        if request.startswith("hi"):
+            assert message_text(events) == f"Hello {request}, nice to meet you"
+            assert "start_of_workflow" not in kinds
+        else:
+            assert message_text(events) == f"Plan for {request}"
+            assert kinds[-2:] == ["workflow_usage", "end_of_workflow"]
+            assert (
+                len(
+                    {
+                        e["data"]["workflow_id"]
+                        for e in events
+                        if "workflow_id" in e["data"]
+                    }
+                )
+                == 1
+            )
@@ -0,0 +1,55 @@
+from langchain_core.messages import HumanMessage
+
+from src.prompts.context import compact_messages, estimate_tokens
+from src.prompts.template import apply_prompt_template
+
+
+def make_messages() -> list:
+    return [
+        HumanMessage(content="Compare A and B"),
+        HumanMessage(content="{}", name="planner"),
+        HumanMessage(content="crawl dump A " * 2000, name="researcher"),
+        HumanMessage(content="crawl dump B " * 2000, name="researcher"),
+        HumanMessage(content="result " * 200, name="coder"),
+    ]
+
+
+def test_compact_messages_within_budget_is_noop():
+    """Test that messages under the budget are returned unchanged."""
+    messages = make_messages()
+    assert compact_messages(messages, 100000) is messages
+    assert compact_messages(messages, None) is messages
+
+
+def test_compact_messages_excerpts_old_agent_responses():
+    """Test that old agent responses are cut while recent turns stay verbatim."""
+    messages = make_messages()
+    compacted = compact_messages(
+        messages, budget=10000, keep_recent=2, excerpt_tokens=100
+    )
+    assert compacted[0] is messages[0]
+    assert compacted[1] is messages[1]
+    assert "truncated" in compacted[2].content
+    assert estimate_tokens(compacted[2].content) < 150
+    assert compacted[2].name == "researcher"
+    assert compacted[3:] == messages[3:]
+    # The state messages are never modified
+    assert "truncated" not in messages[2].content
+
+
+def test_compact_messages_drops_oldest_excerpts_when_over_budget():
+    """Test that excerpts are replaced by a note when still over budget."""
+    compacted = compact_messages(
+        make_messages(), budget=300, keep_recent=1, excerpt_tokens=100
+    )
+    assert compacted[2].content == "[Earlier response from researcher omitted]"
+
+
+def test_reporter_sees_full_transcript():
+    """Test that the reporter prompt is never compacted."""
+    messages = make_messages() + [HumanMessage(content="go on", name="supervisor")]
+    state = {"messages": messages, "TEAM_MEMBERS": ["researcher"]}
+    reporter = apply_prompt_template("reporter", state, stable_prefix=False)
+    supervisor = apply_prompt_template("supervisor", state, stable_prefix=False)
+    assert reporter[1:] == state["messages"]
+    assert "truncated" in supervisor[3].content
@@ -0,0 +1,99 @@
+from src.crawler import Article, CrawlCache, Crawler
+from src.crawler.cache import normalize_url
+from src.crawler.readability_extractor import ReadabilityExtractor
+
+
+class FakeJinaClient:
+    def __init__(self, html: str):
+        self.html = html
+        self.calls = 0
+
+    def crawl(self, url: str, return_format: str = "html") -> str:
+        self.calls += 1
+        return self.html
+
+
+def test_normalize_url():
+    """Test that equivalent urls share the same cache key."""
+    assert normalize_url("HTTPS://Example.com:443/a/?b=2&a=1#top") == normalize_url(
+        "https://example.com/a?a=1&b=2"
+    )
+    assert normalize_url("http://example.com:8080/") == "http://example.com:8080/"
+
+
+def test_cache_hit_miss_and_ttl(tmp_path):
+    """Test cache hits, misses and expiry counters."""
+    cache = CrawlCache(str(tmp_path / "crawl.sqlite3"), ttl=60)
+    assert cache.get("https://example.com/a") is None
+    cache.put("https://example.com/a", "<p>a</p>", Article("A", "<p>a</p>"))
+    article = cache.get("https://example.com/a/")
+    assert article.title == "A"
+    assert article.url == "https://example.com/a/"
+
+    assert cache.get_by_content("<p>a</p>").title == "A"
+
+    cache.ttl = -1
+    assert cache.get_by_content("<p>a</p>") is None
+    assert cache.get("https://example.com/a") is None
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 2
+    assert stats["expired"] == 1
+    assert stats["entries"] == 0
+
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    """Test that the least recently used pages are evicted over the size limit."""
+    cache = CrawlCache(str(tmp_path / "crawl.sqlite3"), max_bytes=250)
+    page = "x" * 50
+    for name in ["a", "b"]:
+        cache.put(f"https://example.com/{name}", page, Article(name, page))
+    cache.get("https://example.com/a")
+    cache.put("https://example.com/c", page, Article("c", page))
+
+    assert cache.get("https://example.com/b") is None
+    assert cache.get("https://example.com/a") is not None
+    assert cache.get("https://example.com/c") is not None
+    assert cache.stats()["evictions"] == 1
+
+
+def test_crawler_uses_cache(tmp_path, monkeypatch):
+    """Test that the crawler skips fetching and extraction on cache hits."""
+    extractions = []
+
+    def extract_article(self, html):
+        extractions.append(html)
+        return Article(title="Page", html_content=html)
+
+    monkeypatch.setattr(ReadabilityExtractor, "extract_article", extract_article)
+    client = FakeJinaClient("<p>same page</p>")
+    crawler = Crawler(client, cache=CrawlCache(str(tmp_path / "crawl.sqlite3")))
+
+    crawler.crawl("https://example.com/a")
+    crawler.crawl("https://example.com/a")
+    # Identical content under another url reuses the extracted article
+    article = crawler.crawl("https://example.com/b")
+
+    assert client.calls == 2
+    assert len(extractions) == 1
+    assert article.url == "https://example.com/b"
+
+
+def test_cache_stats_endpoint(tmp_path, monkeypatch):
+    """Test that the crawl cache counters are exposed by the API."""
+    from fastapi.testclient import TestClient
+
+    from src.api import app as app_module
+
+    client = TestClient(app_module.app)
+    monkeypatch.setattr(app_module.crawler, "cache", None)
+    assert client.get("/api/cache/stats").json() == {"crawl": None}
+
+    cache = CrawlCache(str(tmp_path / "crawl.sqlite3"))
+    monkeypatch.setattr(app_module.crawler, "cache", cache)
+    cache.put("https://example.com/a", "<p>a</p>", Article("A", "<p>a</p>"))
+    cache.get("https://example.com/a")
+    cache.get("https://example.com/b")
+    stats = client.get("/api/cache/stats").json()["crawl"]
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 1, 1)
+    assert stats["hit_rate"] == 0.5
@@ -0,0 +1,112 @@
+import asyncio
+import json
+import threading
+
+import httpx
+
+from src.crawler import Article, Crawler
+from src.crawler.jina_client import JinaClient
+from src.crawler.readability_extractor import ReadabilityExtractor
+
+HTML = "<html><head><title>Test</title></head><body><p>Hello world</p></body></html>"
+
+
+def make_transport(state: dict) -> httpx.MockTransport:
+    async def handler(request: httpx.Request) -> httpx.Response:
+        state["active"] += 1
+        state["peak"] = max(state["peak"], state["active"])
+        await asyncio.sleep(0.01)
+        state["active"] -= 1
+        state["urls"].append(json.loads(request.content)["url"])
+        return httpx.Response(200, text=HTML)
+
+    return httpx.MockTransport(handler)
+
+
+def test_acrawl_limits_concurrency_per_host():
+    """Test that concurrent crawls of the same host respect the per-host limit."""
+    state = {"active": 0, "peak": 0, "urls": []}
+    client = JinaClient(
+        max_connections_per_host=2, async_transport=make_transport(state)
+    )
+
+    async def run():
+        urls = [f"https://example.com/{i}" for i in range(6)]
+        results = await asyncio.gather(*(client.acrawl(url) for url in urls))
+        await client.aclose()
+        return results
+
+    results = asyncio.run(run())
+    assert results == [HTML] * 6
+    assert state["peak"] == 2
+    assert len(state["urls"]) == 6
+    assert client._host_semaphores == {}
+    assert client._host_users == {}
+
+
+def test_crawler_acrawl_extracts_article(monkeypatch):
+    """Test that the async crawler returns an article for the crawled url."""
+    monkeypatch.setattr(
+        ReadabilityExtractor,
+        "extract_article",
+        lambda self, html: Article(title="Test", html_content=html),
+    )
+    state = {"active": 0, "peak": 0, "urls": []}
+    crawler = Crawler(JinaClient(async_transport=make_transport(state)))
+    article = asyncio.run(crawler.acrawl("https://example.com/article"))
+    assert article.url == "https://example.com/article"
+    assert "Hello world" in article.to_markdown()
+
+
+def test_crawl_stops_reading_at_max_bytes():
+    """Test that a page over the size cap is cut and its download stopped."""
+    sent = []
+
+    def body():
+        for i in range(100):
+            sent.append(i)
+            yield "é".encode() * 500
+
+    transport = httpx.MockTransport(
+        lambda request: httpx.Response(
+            200, headers={"Content-Type": "text/html; charset=utf-8"}, content=body()
+        )
+    )
+    client = JinaClient(transport=transport, max_bytes=2501)
+    text = client.crawl("https://example.com/huge")
+    # The character cut in half at the end is dropped
+    assert text == "é" * 1250
+    assert len(sent) < 100
+
+
+def test_acrawl_reads_whole_page_under_max_bytes():
+    """Test that the async crawl returns pages under the size cap whole."""
+    state = {"active": 0, "peak": 0, "urls": []}
+    client = JinaClient(async_transport=make_transport(state), max_bytes=len(HTML))
+    assert asyncio.run(client.acrawl("https://example.com/")) == HTML
+    client = JinaClient(async_transport=make_transport(state), max_bytes=10)
+    assert asyncio.run(client.acrawl("https://example.com/")) == HTML[:10]
+
+
+def test_acrawl_closes_client_of_previous_loop():
+    """Test that the client of another, still running loop is closed on it."""
+    state = {"active": 0, "peak": 0, "urls": []}
+    client = JinaClient(async_transport=make_transport(state))
+    other_loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=other_loop.run_forever)
+    thread.start()
+    try:
+        asyncio.run_coroutine_threadsafe(
+            client.acrawl("https://example.com/1"), other_loop
+        ).result(5)
+        previous = client._async_client
+        assert asyncio.run(client.acrawl("https://example.com/2")) == HTML
+        assert client._async_client is not previous
+        asyncio.run_coroutine_threadsafe(asyncio.sleep(0), other_loop).result(5)
+        assert previous.is_closed
+    finally:
+        other_loop.call_soon_threadsafe(other_loop.stop)
+        thread.join()
+        other_loop.close()
+    # The loop of the last crawl is closed, its client is dropped
+    assert asyncio.run(client.acrawl("https://example.com/3")) == HTML
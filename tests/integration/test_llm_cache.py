@@ -0,0 +1,59 @@
+import asyncio
+
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.load import dumps
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+
+from src.agents.cache import LRUResponseCache, SQLiteResponseCache, cache_key
+
+
+def make_llm(cache, *contents: str) -> GenericFakeChatModel:
+    return GenericFakeChatModel(
+        messages=iter(AIMessage(content=content) for content in contents),
+        cache=cache,
+    )
+
+
+def test_cache_key_ignores_message_ids_and_time():
+    """Test that replays of the same conversation share one cache key."""
+
+    def prompt(message_id: str, time: str) -> str:
+        return dumps(
+            [
+                SystemMessage(content=f"---\nCURRENT_TIME: {time}\n---\nRoute."),
+                HumanMessage(content="hi", id=message_id),
+            ]
+        )
+
+    key = cache_key(prompt("a", "Mon Jan 01 2025 10:00:00"), "gpt-4o")
+    assert key == cache_key(prompt("b", "Mon Jan 01 2025 10:00:05"), "gpt-4o")
+    assert key != cache_key(prompt("a", "Mon Jan 01 2025 10:00:00"), "gpt-4o-mini")
+
+
+def test_lru_cache_serves_identical_requests():
+    """Test that an identical request does not reach the model again."""
+    llm = make_llm(LRUResponseCache(maxsize=2), "first", "second")
+    assert llm.invoke("hello").content == "first"
+    assert asyncio.run(llm.ainvoke("hello")).content == "first"
+    assert llm.invoke("bye").content == "second"
+
+
+def test_lru_cache_evicts_least_recently_used():
+    """Test that the least recently used response is evicted."""
+    cache = LRUResponseCache(maxsize=2)
+    for prompt in ["a", "b"]:
+        cache.update(prompt, "llm", [prompt])
+    cache.lookup("a", "llm")
+    cache.update("c", "llm", ["c"])
+    assert cache.lookup("b", "llm") is None
+    assert cache.lookup("a", "llm") == ["a"]
+
+
+def test_sqlite_cache_survives_restart(tmp_path):
+    """Test that cached responses are shared between cache instances."""
+    path = str(tmp_path / "llm.sqlite3")
+    assert make_llm(SQLiteResponseCache(path, 10), "first").invoke("hi").content == (
+        "first"
+    )
+    llm = make_llm(SQLiteResponseCache(path, 10), "second")
+    assert llm.invoke("hi").content == "first"
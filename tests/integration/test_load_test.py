@@ -0,0 +1,25 @@
+import asyncio
+
+from benchmarks import load_test
+
+
+def test_load_test_sweep():
+    """Test that a small in-process sweep streams every workflow to the end."""
+    report = asyncio.run(
+        load_test.sweep(
+            2, requests=1, latency_ms=0, token_interval_ms=0, in_process=True
+        )
+    )
+    assert [level["clients"] for level in report["levels"]] == [1, 2]
+    for level in report["levels"]:
+        assert level["errors"] == 0
+        assert level["workflows"] == level["clients"]
+        assert level["events_per_workflow"] > 0
+        assert level["workflow_ms"]["p50"] >= level["time_to_first_event_ms"]["p50"]
+
+
+def test_percentiles():
+    """Test the percentiles of durations in milliseconds."""
+    values = [i / 1000 for i in range(1, 101)]
+    assert load_test.percentiles(values) == {"p50": 50.5, "p95": 95.05, "p99": 99.01}
+    assert load_test.percentiles([]) == {"p50": None, "p95": None, "p99": None}
@@ -0,0 +1,155 @@
+from langchain_core.messages import AIMessage, HumanMessage
+
+from src.crawler import Article, select_passages
+from src.crawler.passages import bm25_scores, split_passages, tokenize
+from src.prompts.context import estimate_tokens
+from src.tools.crawl import research_query
+
+
+def long_page() -> str:
+    sections = [
+        f"## Section {i}\n\n"
+        + "\n\n".join(
+            f"Paragraph {j} of section {i}, about the weather and the markets. " * 8
+            for j in range(4)
+        )
+        for i in range(20)
+    ]
+    sections.insert(
+        12,
+        "## Protocols\n\nThe Model Context Protocol connects LLM applications "
+        "to tools and data sources.",
+    )
+    return "# A long page\n\n" + "\n\n".join(sections)
+
+
+def test_tokenize_splits_cjk_characters():
+    assert tokenize("Hello, World! 模型上下文 v2_beta") == [
+        "hello",
+        "world",
+        "模",
+        "型",
+        "上",
+        "下",
+        "文",
+        "v2",
+        "beta",
+    ]
+
+
+def test_split_passages_keeps_headings_and_size():
+    passages = split_passages(long_page(), passage_tokens=200)
+    assert all(passage.tokens <= 200 for passage in passages)
+    protocol = next(p for p in passages if "Model Context Protocol" in p.text)
+    assert protocol.heading == "## Protocols"
+    assert passages[-1].heading == "## Section 19"
+
+
+def test_split_passages_splits_long_paragraphs():
+    paragraph = "A sentence that goes on. " * 200
+    passages = split_passages(paragraph, passage_tokens=100)
+    assert len(passages) > 1
+    assert all(passage.tokens <= 100 for passage in passages)
+
+
+def test_bm25_ranks_matching_passages_first():
+    passages = split_passages(long_page())
+    scores = bm25_scores(passages, "model context protocol")
+    assert "Model Context Protocol" in passages[scores.argmax()].text
+    assert not bm25_scores(passages, "").any()
+
+
+def test_select_passages_within_budget():
+    page = long_page()
+    selected = select_passages(page, "What is the Model Context Protocol?")
+    assert estimate_tokens(page) > 2000
+    assert estimate_tokens(selected) <= 2000 + 100
+    assert "## Protocols" in selected
+    assert "The Model Context Protocol connects" in selected
+    assert "[...]" in selected
+
+
+def test_select_passages_keeps_short_pages_whole():
+    page = "# Short\n\nNothing to cut here."
+    assert select_passages(page, "anything") == page
+
+
+def test_select_passages_without_match_keeps_the_beginning():
+    selected = select_passages(long_page(), "xyzzy", max_tokens=500)
+    assert "# A long page" in selected
+    assert "## Section 19" not in selected
+
+
+def test_article_to_message_with_query():
+    article = Article("Page", "<p>" + "</p><p>".join(["Filler text. " * 50] * 30))
+    article.url = "https://example.com/"
+    full = article.to_message()
+    selected = article.to_message("filler")
+    assert len(selected[0]["text"]) < len(full[0]["text"])
+
+
+def test_research_query():
+    messages = [
+        HumanMessage(content="Research the protocol"),
+        AIMessage(
+            content="",
+            tool_calls=[{"name": "tavily_search", "args": {"query": "MCP"}, "id": "1"}],
+        ),
+    ]
+    assert research_query(messages) == "MCP"
+    assert research_query(messages[:1]) == "Research the protocol"
+    assert research_query(None) is None
+
+    # Falls back to the step instruction or the user request, never to the
+    # plan or the responses of other agents
+    messages = [
+        HumanMessage(content="Research the protocol"),
+        HumanMessage(content='{"steps": []}', name="planner"),
+        HumanMessage(content="Some findings", name="researcher"),
+    ]
+    assert research_query(messages) == "Research the protocol"
+    messages.append(HumanMessage(content="Research MCP servers", name="scheduler"))
+    messages.append(HumanMessage(content="Some code", name="coder"))
+    assert research_query(messages) == "Research MCP servers"
+
+
+def test_tool_call_input_drops_injected_messages():
+    from src.service.event_stream import tool_call_input
+
+    tool_input = {"url": "https://example.com", "messages": [HumanMessage("Hi")]}
+    assert tool_call_input(tool_input) == {"url": "https://example.com"}
+
+
+def test_log_io_skips_injected_messages(caplog):
+    import logging
+
+    from src.tools.decorators import log_io
+
+    class Conversation(list):
+        formatted = 0
+
+        def __str__(self):
+            Conversation.formatted += 1
+            return super().__str__()
+
+    @log_io
+    def tool(url, messages=None):
+        return url
+
+    messages = Conversation([HumanMessage("Hi")])
+    tool("https://example.com", messages=messages)
+    with caplog.at_level(logging.DEBUG, logger="src.tools.decorators"):
+        tool("https://example.com", messages=messages)
+    assert Conversation.formatted == 0
+    assert "called with parameters: https://example.com" in caplog.text
+
+
+def test_select_passages_from_chunks():
+    """Test that passages are selected the same from markdown chunks."""
+    page = long_page()
+    # Blank lines cut across chunks, as well as blocks split in two
+    chunks = [page[i : i + 97] for i in range(0, len(page), 97)]
+    query = "What is the Model Context Protocol?"
+    assert split_passages(iter(chunks)) == split_passages(page)
+    assert select_passages(iter(chunks), query) == select_passages(page, query)
+    assert select_passages(iter(["# Short\n\n", "page"]), query) == "# Short\n\npage"
@@ -0,0 +1,70 @@
+import os
+from datetime import datetime
+
+import pytest
+
+from src.prompts.template import PromptRegistry, apply_prompt_template
+
+
+def test_registry_renders_variables(tmp_path):
+    """Test that placeholders are substituted and braces are kept verbatim."""
+    (tmp_path / "greeting.md").write_text('Hello <<NAME>>, {"json": true}')
+    registry = PromptRegistry(str(tmp_path))
+    assert registry.render("greeting", {"NAME": "LangManus"}) == (
+        'Hello LangManus, {"json": true}'
+    )
+    with pytest.raises(KeyError):
+        registry.render("greeting", {})
+
+
+def test_registry_hot_reload(tmp_path):
+    """Test that changed prompt files are reloaded only with hot reload enabled."""
+    path = tmp_path / "greeting.md"
+    path.write_text("Hello <<NAME>>")
+    cached = PromptRegistry(str(tmp_path))
+    reloading = PromptRegistry(str(tmp_path), hot_reload=True)
+
+    path.write_text("Bye <<NAME>>")
+    mtime = os.path.getmtime(path) + 1
+    os.utime(path, (mtime, mtime))
+
+    assert cached.render("greeting", {"NAME": "A"}) == "Hello A"
+    assert reloading.render("greeting", {"NAME": "A"}) == "Bye A"
+
+
+def test_apply_prompt_template():
+    """Test that the system prompt is rendered in front of the state messages."""
+    messages = [{"role": "user", "content": "hi"}]
+    result = apply_prompt_template(
+        "supervisor", {"messages": messages, "TEAM_MEMBERS": ["researcher"]}
+    )
+    assert result[0]["role"] == "system"
+    assert "['researcher']" in result[0]["content"]
+    assert "<<" not in result[0]["content"]
+    assert result[1:] == messages
+
+
+def test_apply_prompt_template_stable_prefix(monkeypatch):
+    """Test that the system prompt stays byte-identical when the time changes."""
+    import src.prompts.template as template
+
+    class FakeDatetime:
+        current = None
+
+        @classmethod
+        def now(cls):
+            return cls.current
+
+    monkeypatch.setattr(template, "datetime", FakeDatetime)
+    state = {"messages": [{"role": "user", "content": "hi"}], "TEAM_MEMBERS": []}
+    prompts = []
+    for timestamp in ["2025-01-01 00:00:00", "2025-01-01 00:00:01"]:
+        FakeDatetime.current = datetime.fromisoformat(timestamp)
+        prompts.append(apply_prompt_template("supervisor", state, stable_prefix=True))
+
+    # Everything but the volatile message is the same prefix
+    assert prompts[0][:-1] == prompts[1][:-1]
+    assert prompts[0][1] == state["messages"][0]
+    assert prompts[0][-1]["content"] != prompts[1][-1]["content"]
+    assert prompts[1][-1]["role"] == "user"
+    assert prompts[1][-1]["content"].startswith("CURRENT_TIME: Wed Jan 01 2025")
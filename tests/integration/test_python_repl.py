@@ -0,0 +1,87 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from src.sandbox import PythonWorkerPool
+
+
+@pytest.fixture
+def pool():
+    pool = PythonWorkerPool(size=2, timeout=10, cpu_limit=10, session_ttl=60)
+    yield pool
+    pool.close()
+
+
+def test_sessions_have_separate_namespaces(pool):
+    """Test that variables persist within a session and not across sessions."""
+    assert pool.run("a", "x = 1").error is None
+    assert pool.run("b", "x = 2").error is None
+    assert pool.run("a", "print(x)").stdout == "1\n"
+    assert pool.run("b", "print(x)").stdout == "2\n"
+
+    pool.drop_session("a")
+    assert "NameError" in pool.run("a", "print(x)").error
+
+
+def test_error_keeps_stdout(pool):
+    """Test that an exception is reported along with the output before it."""
+    result = pool.run("a", "print('before')\n1 / 0")
+    assert result.stdout == "before\n"
+    assert "ZeroDivisionError" in result.error
+
+
+def test_stdout_is_capped():
+    """Test that only the head and the tail of a long stdout are sent back."""
+    pool = PythonWorkerPool(
+        size=1, timeout=10, output_head_chars=100, output_tail_chars=100
+    )
+    try:
+        result = pool.run(
+            "a", "import sys\nfor i in range(100000): print(i)\nsys.stdout.flush()"
+        )
+    finally:
+        pool.close()
+    assert result.error is None
+    assert len(result.stdout) < 300
+    assert result.stdout.startswith("0\n1\n2\n")
+    assert result.stdout.endswith("99998\n99999\n")
+    assert "characters omitted" in result.stdout
+
+
+def test_timeout_replaces_worker(pool):
+    """Test that a runaway execution is killed without breaking the pool."""
+    pool.timeout = 0.5
+    pool.run("a", "x = 1")
+    result = pool.run("a", "while True: pass")
+    assert "timed out" in result.error
+
+    pool.timeout = 10
+    # The session starts over in a fresh worker
+    assert "NameError" in pool.run("a", "print(x)").error
+    assert pool.run("b", "print(6 * 7)").stdout == "42\n"
+
+
+def test_worker_is_recycled(pool):
+    """Test that a worker is replaced after its maximum number of executions."""
+    pool.max_tasks_per_worker = 2
+    pool.run("a", "import os; print(os.getpid())")
+    first_pid = pool.run("a", "print(os.getpid())").stdout
+    pool.drop_session("a")
+    pids = {pool.run("b", "import os; print(os.getpid())").stdout}
+    pids.add(pool.run("c", "import os; print(os.getpid())").stdout)
+    assert first_pid not in pids
+
+
+def test_interrupt_stops_running_code(pool):
+    """Test that interrupting a session stops its code and nothing else."""
+    pool.run("a", "x = 1")
+    pool.run("b", "y = 2")
+    with ThreadPoolExecutor() as executor:
+        future = executor.submit(pool.run, "a", "import time; time.sleep(30)")
+        time.sleep(0.5)
+        pool.interrupt("b")
+        assert not future.done()
+        pool.interrupt("a")
+        assert "interrupted" in future.result(timeout=5).error
+    assert pool.run("b", "print(y)").stdout == "2\n"
@@ -0,0 +1,117 @@
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from src.crawler import readability_extractor
+from src.crawler.readability_extractor import (
+    ReadabilityExtractor,
+    ReadabilityWorker,
+    ReadabilityWorkerPool,
+)
+
+requires_node = pytest.mark.skipif(
+    shutil.which("node") is None, reason="Node.js is not installed"
+)
+
+# Stand-ins for the jsdom and Readability.js modules, to test the worker
+# protocol without installing them
+FAKE_JSDOM = """
+class JSDOM {
+    constructor(html) { this.window = { document: { html }, close() {} }; }
+}
+module.exports = { JSDOM };
+"""
+
+FAKE_READABILITY = """
+class Readability {
+    constructor(document) { this.html = document.html; }
+    parse() {
+        if (this.html.includes('broken')) throw new Error('broken page');
+        if (this.html.includes('endless')) while (true) {}
+        if (this.html.includes('empty')) return null;
+        if (this.html.includes('slow')) {
+            Atomics.wait(new Int32Array(new SharedArrayBuffer(4)), 0, 0, 500);
+        }
+        return { title: 'Fake', content: this.html };
+    }
+}
+module.exports = { Readability };
+"""
+
+
+@pytest.fixture
+def node_modules(tmp_path):
+    (tmp_path / "jsdom").mkdir()
+    (tmp_path / "jsdom" / "index.js").write_text(FAKE_JSDOM)
+    (tmp_path / "@mozilla" / "readability").mkdir(parents=True)
+    (tmp_path / "@mozilla" / "readability" / "index.js").write_text(FAKE_READABILITY)
+    return str(tmp_path)
+
+
+@pytest.fixture
+def worker(node_modules):
+    worker = ReadabilityWorker(timeout=2, node_modules=node_modules)
+    yield worker
+    worker.close()
+
+
+@requires_node
+def test_worker_reuses_one_process(worker):
+    html = "  <p>Hello\nworld ✓</p>\n"
+    assert worker.extract(html) == {"title": "Fake", "content": html.strip()}
+    pid = worker._process.pid
+    assert worker.extract("<p>Again</p>")["content"] == "<p>Again</p>"
+    assert worker._process.pid == pid
+
+
+@requires_node
+def test_worker_errors(worker):
+    assert worker.extract("<p>empty</p>") == {}
+    with pytest.raises(RuntimeError, match="broken page"):
+        worker.extract("<p>broken</p>")
+    pid = worker._process.pid
+    with pytest.raises(TimeoutError):
+        worker.extract("<p>endless</p>")
+    # A new process takes over after the timeout
+    assert worker.extract("<p>Fine</p>")["title"] == "Fake"
+    assert worker._process.pid != pid
+
+
+@requires_node
+def test_worker_pool_extracts_in_parallel(node_modules):
+    pool = ReadabilityWorkerPool(size=2, timeout=5, node_modules=node_modules)
+    try:
+        # Start both workers before timing
+        with pool.lease(), pool.lease():
+            pass
+        for worker in pool._workers:
+            worker.extract("<p>warm</p>")
+        start = time.perf_counter()
+        with ThreadPoolExecutor(4) as executor:
+            articles = list(executor.map(pool.extract, ["<p>slow</p>"] * 4))
+        elapsed = time.perf_counter() - start
+        assert [article["title"] for article in articles] == ["Fake"] * 4
+        # Two rounds of two pages in parallel, not four pages in a row
+        assert 0.9 < elapsed < 1.8
+        assert len(pool._workers) == 2
+    finally:
+        pool.close()
+
+
+def test_extractor_falls_back_to_python(monkeypatch):
+    monkeypatch.setattr(readability_extractor, "have_readability_js", lambda: False)
+    extractor = ReadabilityExtractor("worker")
+    assert extractor.backend == "python"
+    article = extractor.extract_article(
+        "<html><head><title>Page</title></head>"
+        "<body><article><p>Some text of the page.</p></article></body></html>"
+    )
+    assert article.title == "Page"
+    assert "Some text of the page." in article.to_markdown()
+
+
+def test_extractor_rejects_unknown_backend():
+    with pytest.raises(ValueError):
+        ReadabilityExtractor("lynx")
@@ -0,0 +1,64 @@
+import asyncio
+import json
+
+from langgraph.types import Send
+
+from src.graph.nodes import scheduler_node
+from src.graph.scheduler import parse_plan, ready_steps
+
+PLAN = json.dumps(
+    {
+        "thought": "Compare two companies",
+        "title": "Comparison",
+        "steps": [
+            {"agent_name": "researcher", "title": "A", "description": "Research A"},
+            {"agent_name": "researcher", "title": "B", "description": "Research B"},
+            {
+                "agent_name": "coder",
+                "title": "Compute",
+                "description": "Compare numbers",
+                "depends_on": [0, 1],
+            },
+            {"agent_name": "reporter", "title": "Report", "description": "Write"},
+        ],
+    }
+)
+
+
+def test_parse_plan_infers_dependencies():
+    """Test that researcher steps are independent and reporter waits for all."""
+    steps = parse_plan(PLAN)
+    assert [step["depends_on"] for step in steps] == [[], [], [0, 1], [0, 1, 2]]
+
+
+def test_parse_plan_invalid_json():
+    """Test that an invalid plan yields no steps."""
+    assert parse_plan("not a plan") == []
+
+
+def test_ready_steps_waves():
+    """Test that steps are released wave by wave in plan order."""
+    steps = parse_plan(PLAN)
+    assert [step["index"] for step in ready_steps(steps, set())] == [0, 1]
+    assert [step["index"] for step in ready_steps(steps, {0})] == [1]
+    assert [step["index"] for step in ready_steps(steps, {0, 1})] == [2]
+    assert [step["index"] for step in ready_steps(steps, {0, 1, 2})] == [3]
+    assert ready_steps(steps, {0, 1, 2, 3}) == []
+
+
+def test_scheduler_node_fans_out_and_merges_in_order():
+    """Test that the scheduler dispatches ready steps and merges results by index."""
+    state = {"messages": [], "full_plan": PLAN}
+    command = asyncio.run(scheduler_node(state))
+    assert all(isinstance(send, Send) for send in command.goto)
+    assert [send.arg["step_index"] for send in command.goto] == [0, 1]
+
+    state = {
+        **state,
+        **command.update,
+        "step_results": {1: "result B", 0: "result A"},
+    }
+    command = asyncio.run(scheduler_node(state))
+    contents = [message.content for message in command.update["messages"]]
+    assert "result A" in contents[0] and "result B" in contents[1]
+    assert [send.node for send in command.goto] == ["coder"]
@@ -0,0 +1,119 @@
+import asyncio
+import threading
+import time
+
+from langchain_community.tools.tavily_search import TavilySearchResults
+
+from src.tools.search import CachedTavilySearch
+from src.tools.search_cache import SearchCache, normalize_query
+
+RESULT = ([{"url": "https://example.com", "content": "result"}], {"results": []})
+
+
+def make_tool(cache: SearchCache) -> CachedTavilySearch:
+    return CachedTavilySearch(
+        cache=cache, name="tavily_search", max_results=5, tavily_api_key="test"
+    )
+
+
+def test_normalize_query():
+    """Test that queries differing in case, spacing and punctuation match."""
+    assert normalize_query("  What is  MCP? ") == normalize_query("what is mcp")
+
+
+def test_search_cache_ttl_and_persistence(tmp_path):
+    """Test that entries expire and survive a new cache instance."""
+    path = str(tmp_path / "search.sqlite3")
+    cache = SearchCache(ttl=60, max_entries=2, path=path)
+    cache.put("5:mcp", [1, 2])
+    assert SearchCache(ttl=60, max_entries=2, path=path).get("5:mcp") == [1, 2]
+
+    expired = SearchCache(ttl=-1, max_entries=2)
+    expired.put("5:mcp", [1, 2])
+    assert expired.get("5:mcp") is None
+
+
+def test_async_searches_are_coalesced(monkeypatch):
+    """Test that identical concurrent searches run only once."""
+    calls = []
+
+    async def fake_arun(self, query, *args, **kwargs):
+        calls.append(query)
+        await asyncio.sleep(0.01)
+        return RESULT
+
+    monkeypatch.setattr(TavilySearchResults, "_arun", fake_arun)
+    tool = make_tool(SearchCache(ttl=60, max_entries=10))
+
+    async def run():
+        queries = ["What is MCP?", "what is mcp", "WHAT IS MCP"]
+        return await asyncio.gather(*(tool.ainvoke({"query": q}) for q in queries))
+
+    results = asyncio.run(run())
+    assert len(calls) == 1
+    assert results == [RESULT[0]] * 3
+    assert asyncio.run(tool.ainvoke({"query": "what is mcp?"})) == RESULT[0]
+    assert len(calls) == 1
+
+
+def test_sync_searches_are_coalesced(monkeypatch):
+    """Test that identical searches from several threads run only once."""
+    calls = []
+
+    def fake_run(self, query, *args, **kwargs):
+        calls.append(query)
+        time.sleep(0.05)
+        return RESULT
+
+    monkeypatch.setattr(TavilySearchResults, "_run", fake_run)
+    tool = make_tool(SearchCache(ttl=60, max_entries=10))
+    threads = [
+        threading.Thread(target=tool.invoke, args=({"query": "mcp"},)) for _ in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1
+
+
+def test_failed_searches_are_not_cached(monkeypatch):
+    """Test that error results are not memoized."""
+    calls = []
+
+    def fake_run(self, query, *args, **kwargs):
+        calls.append(query)
+        return "HTTPError('429')", {}
+
+    monkeypatch.setattr(TavilySearchResults, "_run", fake_run)
+    tool = make_tool(SearchCache(ttl=60, max_entries=10))
+    tool.invoke({"query": "mcp"})
+    tool.invoke({"query": "mcp"})
+    assert len(calls) == 2
+
+
+def test_sync_search_stops_waiting_for_a_hanging_search(monkeypatch):
+    """Test that a search waits for the same one in flight only so long."""
+    release = threading.Event()
+    calls = []
+
+    def fake_run(self, query, *args, **kwargs):
+        calls.append(query)
+        if len(calls) == 1:
+            release.wait(5)
+        return RESULT
+
+    monkeypatch.setattr(TavilySearchResults, "_run", fake_run)
+    tool = make_tool(SearchCache(ttl=60, max_entries=10))
+    tool._inflight_timeout = 0.05
+    hanging = threading.Thread(target=tool.invoke, args=({"query": "mcp"},))
+    hanging.start()
+    try:
+        while not calls:
+            time.sleep(0.001)
+        assert tool.invoke({"query": "mcp"}) == RESULT[0]
+        assert len(calls) == 2
+    finally:
+        release.set()
+        hanging.join()
+    assert tool._inflight == {}
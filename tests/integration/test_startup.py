@@ -0,0 +1,33 @@
+import json
+import subprocess
+import sys
+
+import pytest
+
+PROBE = """
+import json, sys
+import {module}
+from src.agents import get_agent
+from src.agents.llm import _llm_cache
+print(json.dumps({{
+    "browser_use": "browser_use" in sys.modules,
+    "llms": len(_llm_cache),
+    "agents": get_agent.cache_info().currsize,
+}}))
+"""
+
+
+@pytest.mark.parametrize("module", ["src.api.app", "src.workflow"])
+def test_startup_is_lazy(module):
+    """Test that no browser, LLM client or agent is set up on import."""
+    output = subprocess.run(
+        [sys.executable, "-c", PROBE.format(module=module)],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    assert json.loads(output.strip().splitlines()[-1]) == {
+        "browser_use": False,
+        "llms": 0,
+        "agents": 0,
+    }
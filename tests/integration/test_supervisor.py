@@ -0,0 +1,125 @@
+import asyncio
+import functools
+import json
+
+from langchain_core.messages import AIMessage, AIMessageChunk, HumanMessage, ToolMessage
+
+from src.graph import nodes
+from src.graph.nodes import _step_failed, planner_node, supervisor_node
+from src.prompts.template import apply_prompt_template
+
+PLAN = json.dumps(
+    {
+        "thought": "Research then report",
+        "title": "Report",
+        "steps": [
+            {"agent_name": "researcher", "title": "A", "description": "Research A"},
+            {"agent_name": "reporter", "title": "Report", "description": "Write"},
+        ],
+    }
+)
+
+
+class FakeRouterLLM:
+    def __init__(self, next_agent: str):
+        self.next_agent = next_agent
+        self.calls = 0
+
+    def with_structured_output(self, schema):
+        return self
+
+    async def ainvoke(self, messages):
+        self.calls += 1
+        return {"next": self.next_agent}
+
+
+def run_supervisor(monkeypatch, state: dict, next_agent: str = "FINISH"):
+    llm = FakeRouterLLM(next_agent)
+    monkeypatch.setattr(nodes, "get_llm_by_type", lambda *args, **kwargs: llm)
+    state = {"TEAM_MEMBERS": ["researcher", "reporter"], "messages": [], **state}
+    return asyncio.run(supervisor_node(state)), llm
+
+
+def test_supervisor_follows_plan_without_llm(monkeypatch):
+    """Test that plan steps are routed in order without calling the LLM."""
+    state = {"full_plan": PLAN, "follow_plan": True}
+    command, llm = run_supervisor(monkeypatch, state)
+    assert command.goto == "researcher"
+    assert command.update["plan_cursor"] == 1
+
+    command, llm = run_supervisor(monkeypatch, {**state, **command.update})
+    assert command.goto == "reporter"
+    assert llm.calls == 0
+
+
+def test_supervisor_falls_back_to_llm_when_plan_exhausted(monkeypatch):
+    """Test that the LLM decides once every plan step has been dispatched."""
+    state = {"full_plan": PLAN, "follow_plan": True, "plan_cursor": 2}
+    command, llm = run_supervisor(monkeypatch, state)
+    assert command.goto == "__end__"
+    assert llm.calls == 1
+
+
+def test_supervisor_falls_back_to_llm_when_step_failed(monkeypatch):
+    """Test that a failed step hands routing back to the LLM for good."""
+    state = {
+        "full_plan": PLAN,
+        "follow_plan": True,
+        "plan_cursor": 1,
+        "last_step_failed": True,
+    }
+    command, llm = run_supervisor(monkeypatch, state, "researcher")
+    assert command.goto == "researcher"
+    assert command.update["follow_plan"] is False
+    assert llm.calls == 1
+
+
+def test_step_failed():
+    """Test that empty answers and errored tool calls count as failures."""
+    ok = [HumanMessage(content="go"), AIMessage(content="done")]
+    assert not _step_failed(ok)
+    assert _step_failed([HumanMessage(content="go"), AIMessage(content="")])
+    errored = ToolMessage(content="boom", tool_call_id="1", status="error")
+    assert _step_failed([HumanMessage(content="go"), errored, AIMessage(content="x")])
+
+
+class FakePlannerLLM:
+    def __init__(self):
+        self.messages = None
+
+    async def astream(self, messages):
+        self.messages = messages
+        yield AIMessageChunk(content=PLAN)
+
+
+class FakeSearchTool:
+    async def ainvoke(self, args):
+        return [{"title": "Result", "content": f"About {args['query']}"}]
+
+
+def test_planner_searches_with_stable_prompt_prefix(monkeypatch):
+    """Test that search results go into the user request with a stable prefix."""
+    llm = FakePlannerLLM()
+    monkeypatch.setattr(nodes, "get_llm_by_type", lambda *args, **kwargs: llm)
+    monkeypatch.setattr(nodes, "tavily_tool", FakeSearchTool())
+    monkeypatch.setattr(
+        nodes,
+        "apply_prompt_template",
+        functools.partial(apply_prompt_template, stable_prefix=True),
+    )
+    request = HumanMessage(content="Tell me about MCP")
+    state = {
+        "TEAM_MEMBERS": ["researcher", "reporter"],
+        "messages": [request],
+        "search_before_planning": True,
+    }
+    command = asyncio.run(planner_node(state))
+
+    assert command.goto == "supervisor"
+    assert llm.messages[0]["role"] == "system"
+    assert llm.messages[-1]["role"] == "user"
+    assert llm.messages[-1]["content"].startswith("CURRENT_TIME:")
+    assert "# Relative Search Results" in llm.messages[-2].content
+    assert "About Tell me about MCP" in llm.messages[-2].content
+    # The state message itself is left untouched
+    assert request.content == "Tell me about MCP"
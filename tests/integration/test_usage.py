@@ -0,0 +1,116 @@
+import uuid
+
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, LLMResult
+
+from src.agents.usage import (
+    PromptCacheCallbackHandler,
+    UsageCallbackHandler,
+    get_token_usage,
+)
+
+
+def make_result(usage_metadata=None, token_usage=None) -> LLMResult:
+    message = AIMessage(content="ok", usage_metadata=usage_metadata)
+    return LLMResult(
+        generations=[[ChatGeneration(message=message)]],
+        llm_output={"token_usage": token_usage} if token_usage else None,
+    )
+
+
+def test_get_token_usage_from_usage_metadata():
+    """Test that OpenAI style cached tokens are read from usage metadata."""
+    result = make_result(
+        usage_metadata={
+            "input_tokens": 100,
+            "output_tokens": 10,
+            "total_tokens": 110,
+            "input_token_details": {"cache_read": 64},
+            "output_token_details": {"reasoning": 4},
+        }
+    )
+    assert get_token_usage(result) == {
+        "prompt_tokens": 100,
+        "completion_tokens": 10,
+        "reasoning_tokens": 4,
+        "cached_tokens": 64,
+    }
+
+
+def test_get_token_usage_from_deepseek_usage():
+    """Test that DeepSeek prompt cache hits are read from the raw usage."""
+    result = make_result(
+        token_usage={
+            "prompt_tokens": 100,
+            "completion_tokens": 10,
+            "prompt_cache_hit_tokens": 80,
+        }
+    )
+    assert get_token_usage(result)["cached_tokens"] == 80
+
+
+def test_prompt_cache_handler_aggregates_per_node():
+    """Test that the handler groups cached token counts by graph node."""
+    handler = PromptCacheCallbackHandler()
+    for run_id, node, cached in [(1, "supervisor", 0), (2, "supervisor", 90)]:
+        handler.on_chat_model_start(
+            {}, [], run_id=run_id, metadata={"langgraph_node": node}
+        )
+        handler.on_llm_end(
+            make_result(
+                token_usage={"prompt_tokens": 100, "prompt_cache_hit_tokens": cached}
+            ),
+            run_id=run_id,
+        )
+    assert handler.usage["supervisor"] == {
+        "calls": 2,
+        "prompt_tokens": 200,
+        "cached_tokens": 90,
+    }
+    assert handler.hit_rates() == {"supervisor": 0.45}
+
+
+def test_prompt_cache_handler_attributes_subgraph_runs_to_outer_node():
+    """Test that LLM calls inside an agent subgraph count for the agent node."""
+    handler = PromptCacheCallbackHandler()
+    metadata = {
+        "langgraph_node": "agent",
+        "checkpoint_ns": "researcher:2f820784-0edf-76e9-b44d-384b0ae0fff4",
+    }
+    handler.on_chat_model_start({}, [], run_id=1, metadata=metadata)
+    handler.on_llm_end(make_result(token_usage={"prompt_tokens": 10}), run_id=1)
+    assert list(handler.usage) == ["researcher"]
+
+
+def test_usage_handler_records_calls_and_tools():
+    """Test that LLM calls and tool runs are timed and summed per node."""
+    handler = UsageCallbackHandler()
+    run_id = uuid.uuid4()
+    metadata = {"checkpoint_ns": "researcher:1", "ls_model_name": "gpt-4o"}
+    handler.on_chat_model_start({}, [], run_id=run_id, metadata=metadata)
+    handler.on_llm_new_token("Hel", run_id=run_id)
+    handler.on_llm_end(
+        make_result(
+            usage_metadata={
+                "input_tokens": 100,
+                "output_tokens": 10,
+                "total_tokens": 110,
+            }
+        ),
+        run_id=run_id,
+    )
+    tool_run_id = uuid.uuid4()
+    handler.on_tool_start({}, "query", run_id=tool_run_id, metadata=metadata)
+    handler.on_tool_end("result", run_id=tool_run_id)
+
+    call = handler.pop_call(str(run_id))
+    assert call["agent_name"] == "researcher"
+    assert call["model"] == "gpt-4o"
+    assert call["prompt_tokens"] == 100
+    assert 0 <= call["ttft_ms"] <= call["latency_ms"]
+    assert handler.pop_call(run_id) is None
+
+    summary = handler.summary()
+    assert summary["nodes"]["researcher"]["llm_calls"] == 1
+    assert summary["nodes"]["researcher"]["tool_calls"] == 1
+    assert summary["total"]["completion_tokens"] == 10
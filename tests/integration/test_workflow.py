@@ -1,4 +1,5 @@
 import pytest
+from benchmarks.fakes import offline
 from src.workflow import run_agent_workflow, enable_debug_logging
 import logging
 
@@ -10,12 +11,17 @@ def test_enable_debug_logging():
     assert logger.getEffectiveLevel() == logging.DEBUG
 
 
-@pytest.mark.skip(reason="Temporarily skipping this test")
 def test_run_agent_workflow_basic():
     """Test basic workflow execution."""
     test_input = "What is the weather today?"
-    result = run_agent_workflow(test_input)
+    with offline():
+        result = run_agent_workflow(test_input)
     assert result is not None
+    assert [m.name for m in result["messages"] if m.name] == [
+        "planner",
+        "researcher",
+        "reporter",
+    ]
 
 
 def test_run_agent_workflow_empty_input():